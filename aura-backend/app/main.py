@@ -1,16 +1,37 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from .database import engine, Base
+from starlette.concurrency import run_in_threadpool
+from .database import async_engine
+from .migrations import upgrade_database
 from .routes import auth, journal, analytics, chat
+from .services import analysis_queue, dashboard_cache, http_client, local_analyzer, local_model, provider_router, response_cache
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Load Mini-Aura in the background at startup instead of on the first request
+PRELOAD_LOCAL_MODEL = os.getenv("AURA_PRELOAD_MODEL", "true").lower() in ("1", "true", "yes")
 
-app = FastAPI(title="Aura API", description="Privacy-First AI Mental Health Companion")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Bring the schema up to date (alembic upgrade head)
+    await run_in_threadpool(upgrade_database)
+    # Pooled outbound HTTP clients shared by all AI provider services
+    http_client.init_clients()
+    if PRELOAD_LOCAL_MODEL:
+        local_model.start()
+    # Offline analyzer behind every fallback reply and pending journal entry
+    await run_in_threadpool(local_analyzer.get_model)
+    # Background journal analysis; re-queues entries left pending by a restart
+    await analysis_queue.start()
+    yield
+    await analysis_queue.stop()
+    await http_client.close_clients()
+    await async_engine.dispose()
+
+app = FastAPI(title="Aura API", description="Privacy-First AI Mental Health Companion", lifespan=lifespan)
 
 # CORS Configuration
 app.add_middleware(
@@ -19,6 +40,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Prev-Cursor", "ETag"],
 )
 
 # Include Routers
@@ -30,3 +52,21 @@ app.include_router(chat.router)
 @app.get("/")
 def read_root():
     return {"message": "Welcome to Aura API", "status": "online"}
+
+@app.get("/ready")
+def readiness(response: Response):
+    # Not ready while Mini-Aura is still loading. A missing or broken model does not
+    # block readiness: Gemini and Groq keep serving and Mini-Aura replies with a fallback.
+    mini_aura = local_model.status()
+    ready = not (PRELOAD_LOCAL_MODEL and mini_aura["state"] in ("idle", "loading"))
+    if not ready:
+        response.status_code = 503
+    return {
+        "status": "ready" if ready else "starting",
+        "mini_aura": mini_aura,
+        "providers": provider_router.stats(),
+        "response_cache": response_cache.stats(),
+        "journal_analysis": analysis_queue.stats(),
+        "local_analyzer": local_analyzer.status(),
+        "dashboard_cache": dashboard_cache.stats(),
+    }
@@ -0,0 +1,29 @@
+import os
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from .database import engine
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INITIAL_REVISION = "0001"
+
+
+def get_config() -> Config:
+    cfg = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    cfg.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    # Keep the application's logging setup untouched
+    cfg.attributes["configure_logger"] = False
+    return cfg
+
+
+def upgrade_database():
+    cfg = get_config()
+    tables = inspect(engine).get_table_names()
+
+    # Databases created by the old Base.metadata.create_all() have the initial
+    # tables but no version table; adopt them instead of re-creating tables
+    if "users" in tables and "alembic_version" not in tables:
+        print(f"[DB] Existing schema without migration history, stamping {INITIAL_REVISION}")
+        command.stamp(cfg, INITIAL_REVISION)
+
+    command.upgrade(cfg, "head")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 from .database import Base
 import datetime
@@ -23,12 +23,19 @@ class JournalEntry(Base):
     stress_score = Column(Float) # 1-10 scale
     stress_level = Column(String)
     analysis_summary = Column(Text)
+    # "pending" until the background analysis queue has scored the entry, then "done" or "failed"
+    analysis_status = Column(String, nullable=False, default="done", server_default="done")
     is_high_risk = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     user_id = Column(String, ForeignKey("users.id"))
 
     owner = relationship("User", back_populates="entries")
 
+    __table_args__ = (
+        Index("ix_journal_entries_user_id_created_at", "user_id", "created_at"),
+        Index("ix_journal_entries_analysis_status", "analysis_status"),
+    )
+
 class ActivitySession(Base):
     __tablename__ = "activity_sessions"
 
@@ -39,11 +46,15 @@ class ActivitySession(Base):
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     user_id = Column(String, ForeignKey("users.id"))
 
+    __table_args__ = (
+        Index("ix_activity_sessions_user_id_created_at", "user_id", "created_at"),
+    )
+
 class UserStats(Base):
     __tablename__ = "user_stats"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String, ForeignKey("users.id"))
+    user_id = Column(String, ForeignKey("users.id"), unique=True, index=True)
     streak_count = Column(Integer, default=0)
     xp_points = Column(Integer, default=0)
     pomodoro_completed = Column(Integer, default=0)
@@ -51,3 +62,40 @@ class UserStats(Base):
 
     user = relationship("User", back_populates="stats")
 
+class DailyMoodRollup(Base):
+    # Per user per UTC day totals of analyzed journal entries and chat messages,
+    # kept current on every write by services/mood_rollup.py
+    __tablename__ = "daily_mood_rollup"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    entry_count = Column(Integer, nullable=False, default=0)
+    stress_count = Column(Integer, nullable=False, default=0) # entries with a stress score
+    stress_sum = Column(Float, nullable=False, default=0.0)
+    stress_min = Column(Float)
+    stress_max = Column(Float)
+    sentiment_sum = Column(Float, nullable=False, default=0.0)
+    emotion_counts = Column(Text, nullable=False, default="{}") # JSON {"Anxious": 2, "Calm": 1}
+
+    __table_args__ = (
+        Index("ix_daily_mood_rollup_user_id_day", "user_id", "day", unique=True),
+    )
+
+class WeeklyReport(Base):
+    # Weekly mood summary written by the batch job in services/weekly_reports.py;
+    # covers the seven UTC days before period_end. The dashboard shows the latest.
+    __tablename__ = "weekly_reports"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    period_end = Column(Date, nullable=False)
+    encrypted_report = Column(Text, nullable=False)
+    entry_count = Column(Integer, nullable=False)
+    stress_avg = Column(Float)
+    provider = Column(String) # "gemini", "groq" or "local" when no provider is configured
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_weekly_reports_user_id_period_end", "user_id", "period_end", unique=True),
+    )
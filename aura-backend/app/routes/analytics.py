@@ -1,28 +1,49 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..database import get_db
 from .. import models, schemas
-from .auth import get_current_user
-import datetime
+from .auth import get_current_principal
+from ..services.principal_cache import Principal
+from ..services import dashboard_cache, mood_rollup, weekly_reports
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
 @router.get("/dashboard", response_model=schemas.DashboardData)
-def get_dashboard_data(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+async def get_dashboard_data(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
-    recent_entries = db.query(models.JournalEntry).filter(
-        models.JournalEntry.user_id == current_user.id
-    ).order_by(models.JournalEntry.created_at.desc()).limit(10).all()
+    # Served from services/dashboard_cache.py until the user writes something.
+    # The ETag lets a browser revalidate: a matching If-None-Match gets a 304.
+    cached = dashboard_cache.get(current_user.id)
+    if cached is None:
+        version = dashboard_cache.version(current_user.id)
+        body = schemas.DashboardData.model_validate(
+            await _dashboard(db, current_user.id), from_attributes=True
+        ).model_dump_json().encode()
+        cached = dashboard_cache.put(current_user.id, version, body), body
+    etag, body = cached
+    # private: per-user data; no-cache: always revalidate, which is what makes writes show up
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+    if dashboard_cache.matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+async def _dashboard(db: AsyncSession, user_id: str):
+    recent_entries = (await db.scalars(select(models.JournalEntry).filter(
+        models.JournalEntry.user_id == user_id
+    ).order_by(models.JournalEntry.created_at.desc()).limit(10))).all()
     
-    stats = db.query(models.UserStats).filter(
-        models.UserStats.user_id == current_user.id
-    ).first()
+    stats = await db.scalar(select(models.UserStats).filter(
+        models.UserStats.user_id == user_id
+    ).limit(1))
     
-    # Generate a simple weekly report summary
-    # In a real app, you'd send the last 7 days of summaries to an LLM
-    report = "Your mood has been relatively stable this week. You showed resilience during academic stress on Tuesday. Keep up the 4-7-8 breathing exercises!"
+    # Precomputed by the weekly batch job (services/weekly_reports.py). It runs in
+    # its own process and cannot bump this one's cache, so a new report shows up
+    # within AURA_DASHBOARD_CACHE_TTL.
+    report = await weekly_reports.latest(db, user_id)
     
     return {
         "recent_entries": recent_entries,
@@ -31,17 +52,14 @@ def get_dashboard_data(
     }
 
 @router.get("/stress-trends")
-def get_stress_trends(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+async def get_stress_trends(
+    days: int = Query(7, ge=1, le=mood_rollup.MAX_DAYS),
+    granularity: str = Query("day", pattern="^(day|week|month)$"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
-    # Last 7 journal entries for the graph
-    entries = db.query(models.JournalEntry).filter(
-        models.JournalEntry.user_id == current_user.id
-    ).order_by(models.JournalEntry.created_at.asc()).limit(14).all()
-    
-    return [
-        {"name": e.created_at.strftime("%a"), "stress": e.stress_score}
-        for e in entries
-    ]
+    # Mean stress per day, week or month over the last `days` days, read from
+    # the daily rollups. Each point also carries min/max stress, the entry
+    # count, mean sentiment and an emotion histogram.
+    return await mood_rollup.trends(db, current_user.id, days, granularity)
 
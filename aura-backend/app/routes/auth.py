@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..database import get_db
 from .. import models, schemas
+from ..services.principal_cache import Principal, get_cache
 import uuid
 from jose import jwt
 from datetime import datetime, timedelta
@@ -19,7 +21,7 @@ def create_access_token(data: dict):
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 @router.post("/anonymous-login")
-def anonymous_login(db: Session = Depends(get_db)):
+async def anonymous_login(db: AsyncSession = Depends(get_db)):
     # Create a new anonymous user
     user_id = str(uuid.uuid4())
     db_user = models.User(id=user_id)
@@ -29,8 +31,8 @@ def anonymous_login(db: Session = Depends(get_db)):
     db_stats = models.UserStats(user_id=user_id)
     db.add(db_stats)
     
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    get_cache().put(user_id)
     
     token = create_access_token({"sub": user_id})
     return {"access_token": token, "token_type": "bearer", "user_id": user_id}
@@ -39,7 +41,7 @@ def anonymous_login(db: Session = Depends(get_db)):
 from fastapi.security import OAuth2PasswordBearer
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/anonymous-login")
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def decode_user_id(token: str) -> str:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
@@ -47,8 +49,30 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
             raise HTTPException(status_code=401, detail="Invalid token")
     except:
         raise HTTPException(status_code=401, detail="Invalid token")
+    return user_id
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+    user_id = decode_user_id(token)
     
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = await db.get(models.User, user_id)
+    # End the read transaction so the pooled connection is not pinned while
+    # the handler awaits slow LLM calls
+    await db.commit()
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
+    get_cache().put(user_id)
     return user
+
+async def get_current_principal(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+    # Same checks as get_current_user, but a recently seen user costs no query
+    user_id = decode_user_id(token)
+    principal = get_cache().get(user_id)
+    if principal is not None:
+        return principal
+
+    exists = await db.scalar(select(models.User.id).filter(models.User.id == user_id))
+    await db.commit()
+    if exists is None:
+        raise HTTPException(status_code=401, detail="User not found")
+    get_cache().put(user_id)
+    return Principal(user_id)
@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from ..database import get_db
-from .. import models, schemas
-from .auth import get_current_user
-from ..services import hf_service
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_db, AsyncSessionLocal
+from .. import models
+from .auth import get_current_principal
+from ..services.principal_cache import Principal
+from ..services import dashboard_cache, local_analyzer, local_model, mood_rollup, provider_router
+from ..services.inference_errors import InferenceOverloaded, InferenceTimeout
 from pydantic import BaseModel
+import datetime
+import json
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
@@ -12,80 +18,19 @@ class ChatRequest(BaseModel):
     message: str
     model_type: str = "gemini" # Default to gemini, can be 'aura' or 'groq'
 
-@router.post("/message")
-async def chat_message(
-    req: ChatRequest,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
-):
-    # Choose between local LLM, Gemini or Grok
-    if req.model_type == "aura":
-        try:
-            from ..services import local_llm_service
-            response_text = await local_llm_service.generate_response(req.message, session_id=str(current_user.id))
-            # For local model, we use simple heuristic analysis or fallback
-            stress_score = 3 
-            emotion_label = "Calm"
-            sentiment = "Neutral"
-            keywords = []
-            rec_action = "Continue reflecting"
-            is_crisis = False
-        except Exception as e:
-            print(f"Local LLM Error: {e}")
-            response_text = "Mini-Aura is still processing. Try Gemini for now."
-            stress_score = 5
-            emotion_label = "Neutral"
-            sentiment = "Neutral"
-            keywords = []
-            rec_action = "None"
-            is_crisis = False
-    elif req.model_type == "groq":
-        try:
-            from ..services import groq_service
-            groq_data = await groq_service.get_groq_response(req.message)
-            
-            response_text = groq_data.get("reply", "I'm here for you.")
-            analysis_obj = groq_data.get("analysis", {})
-            
-            stress_score = analysis_obj.get("stress_score", 5)
-            emotion_label = analysis_obj.get("emotion_detected", "Neutral")
-            sentiment = analysis_obj.get("sentiment", "Neutral")
-            keywords = analysis_obj.get("keywords_found", [])
-            rec_action = analysis_obj.get("recommended_action", "None")
-            is_crisis = analysis_obj.get("crisis_flag", False)
-        except Exception as e:
-            print(f"Groq Error: {e}")
-            response_text = "I'm listening closely, though I'm drifting through a quiet forest right now. I'm always here for you. 🌿"
-            stress_score = 5
-            emotion_label = "Neutral"
-            sentiment = "Neutral"
-            keywords = []
-            rec_action = "None"
-            is_crisis = False
-    else:
-        # Use Gemini for the LLM response and analysis
-        try:
-            from ..services import gemini_service
-            gemini_data = await gemini_service.get_gemini_response(req.message)
-            
-            response_text = gemini_data.get("reply", "I'm here for you.")
-            analysis_obj = gemini_data.get("analysis", {})
-            
-            stress_score = analysis_obj.get("stress_score", 5)
-            emotion_label = analysis_obj.get("emotion_detected", "Neutral")
-            sentiment = analysis_obj.get("sentiment", "Neutral")
-            keywords = analysis_obj.get("keywords_found", [])
-            rec_action = analysis_obj.get("recommended_action", "None")
-            is_crisis = analysis_obj.get("crisis_flag", False)
-        except Exception as e:
-            print(f"Gemini Error: {e}")
-            response_text = "I'm here for you. Tell me more about what's on your mind. 🌿"
-            stress_score = 5
-            emotion_label = "Neutral"
-            sentiment = "Neutral"
-            keywords = []
-            rec_action = "None"
-            is_crisis = False
+# Mini-Aura does not analyze messages, and a failed reply has no analysis:
+# both are scored offline instead
+def local_analysis(message: str):
+    analysis = local_analyzer.analyze(message)
+    return {
+        **analysis,
+        "recommended_action": "Continue reflecting",
+        "crisis_flag": analysis["stress_score"] >= 10
+    }
+
+def build_analysis(analysis_obj: dict):
+    stress_score = analysis_obj.get("stress_score", 5)
+    is_crisis = analysis_obj.get("crisis_flag", False)
 
     # Map stress score to level for UI
     try:
@@ -98,44 +43,150 @@ async def chat_message(
     elif stress_score >= 7: stress_level = "High"
     elif stress_score >= 4: stress_level = "Moderate"
 
-    analysis = {
-        "sentiment": sentiment,
+    return {
+        "sentiment": analysis_obj.get("sentiment", "Neutral"),
         "stress_level": stress_level,
         "stress_score": stress_score,
-        "emotion_detected": emotion_label,
-        "keywords_detected": keywords,
-        "recommended_action": rec_action,
+        "emotion_detected": analysis_obj.get("emotion_detected", "Neutral"),
+        "keywords_detected": analysis_obj.get("keywords_found", []),
+        "recommended_action": analysis_obj.get("recommended_action", "None"),
         "crisis_flag": is_crisis or stress_score >= 10
     }
 
+async def save_chat(db: AsyncSession, user_id: str, message: str, analysis: dict):
+    sentiment = analysis["sentiment"]
     try:
         # Persist to DB
         db_entry = models.JournalEntry(
-            encrypted_content=f"[Chat Log]: {req.message}",
+            encrypted_content=f"[Chat Log]: {message}",
             sentiment_score=1.0 if sentiment == "Positive" else -1.0 if sentiment == "Negative" else 0.0,
-            emotion_label=emotion_label,
-            stress_score=stress_score,
-            stress_level=stress_level,
-            user_id=current_user.id
+            emotion_label=analysis["emotion_detected"],
+            stress_score=analysis["stress_score"],
+            stress_level=analysis["stress_level"],
+            created_at=datetime.datetime.utcnow(),
+            user_id=user_id
         )
         db.add(db_entry)
+        await mood_rollup.record(db, db_entry)
         
         # Update XP for chatting
-        stats = db.query(models.UserStats).filter(models.UserStats.user_id == current_user.id).first()
+        stats = await db.scalar(select(models.UserStats).filter(models.UserStats.user_id == user_id).limit(1))
         if stats:
             stats.xp_points += 5
         
-        db.commit()
+        await db.commit()
+        dashboard_cache.bump(user_id)
     except Exception as e:
         print(f"Database Error (Non-fatal): {e}")
         # We don't want to crash the request if DB fails, as the user still wants the response
         try:
-            db.rollback()
+            await db.rollback()
         except:
             pass
 
+@router.post("/message")
+async def chat_message(
+    req: ChatRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    # Choose between local LLM, Gemini or Grok
+    if req.model_type == "aura":
+        try:
+            local_llm_service = local_model.get_service()
+            if local_llm_service is None:
+                # Still loading in the background: answer now rather than wait for it
+                response_text = local_model.fallback_reply()
+            else:
+                response_text = await local_llm_service.generate_response(req.message, session_id=str(current_user.id))
+            analysis_obj = local_analysis(req.message)
+        except InferenceOverloaded:
+            # Fail fast instead of queueing behind minutes of generation
+            raise HTTPException(status_code=503, detail="Mini-Aura is busy right now. Try again shortly or switch to Gemini.",
+                                headers={"Retry-After": "5"})
+        except InferenceTimeout:
+            raise HTTPException(status_code=504, detail="Mini-Aura took too long to reply. Try again or switch to Gemini.")
+        except Exception as e:
+            print(f"Local LLM Error: {e}")
+            response_text = "Mini-Aura is still processing. Try Gemini for now."
+            analysis_obj = local_analysis(req.message)
+    else:
+        # Gemini (default) or Groq through the router: latency tracking, circuit
+        # breakers, failover to the other provider and optional hedging
+        preferred = "groq" if req.model_type == "groq" else "gemini"
+        try:
+            _, data = await provider_router.route(preferred, req.message)
+            
+            response_text = data.get("reply", "I'm here for you.")
+            analysis_obj = data.get("analysis") or local_analysis(req.message)
+        except Exception as e:
+            print(f"Router Error: {e}")
+            response_text = "I'm here for you. Tell me more about what's on your mind. 🌿"
+            analysis_obj = local_analysis(req.message)
+
+    analysis = build_analysis(analysis_obj)
+    await save_chat(db, current_user.id, req.message, analysis)
+
     return {
         "reply": response_text,
         "analysis": analysis
     }
 
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+STREAM_ERROR = "The reply was cut off. Please try again."
+
+async def _sse_events(events, message: str, user_id: str):
+    # token events while the reply streams, then one final analysis event. If the
+    # provider fails partway, an error event comes first and the analysis event's
+    # reply is only the text that was actually sent.
+    data, sent, failed = {}, "", False
+    try:
+        async for kind, payload in events:
+            if kind == "token":
+                sent += payload
+                yield _sse("token", {"text": payload})
+            else:
+                data = payload
+                failed = kind == "error"
+    except Exception as e:
+        print(f"Chat Stream Error: {e}")
+        failed = True
+
+    if failed:
+        yield _sse("error", {"detail": STREAM_ERROR})
+    analysis = build_analysis(data.get("analysis") or local_analysis(message))
+    # Uses its own session: the request-scoped one may be closed before the body is sent
+    async with AsyncSessionLocal() as db:
+        await save_chat(db, user_id, message, analysis)
+    yield _sse("analysis", {"reply": sent if failed else data.get("reply", ""), "analysis": analysis})
+
+@router.post("/stream")
+async def chat_stream(
+    req: ChatRequest,
+    current_user: Principal = Depends(get_current_principal)
+):
+    # Same request and providers as /chat/message, answered as server-sent events:
+    #   event: token     data: {"text": "..."}   (repeated)
+    #   event: error     data: {"detail": "..."} (only if the reply broke off)
+    #   event: analysis  data: {"reply": "...", "analysis": {...}}
+    if req.model_type == "aura":
+        local_llm_service = local_model.get_service()
+        try:
+            if local_llm_service is None:
+                events = local_model.single_reply(local_model.fallback_reply())
+            else:
+                events = await local_llm_service.stream_response(req.message, session_id=str(current_user.id))
+        except InferenceOverloaded:
+            raise HTTPException(status_code=503, detail="Mini-Aura is busy right now. Try again shortly or switch to Gemini.",
+                                headers={"Retry-After": "5"})
+    else:
+        events = provider_router.stream("groq" if req.model_type == "groq" else "gemini", req.message)
+
+    return StreamingResponse(
+        _sse_events(events, req.message, current_user.id),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,45 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from ..database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+from ..database import get_db, AsyncSessionLocal
 from .. import models, schemas
-from .auth import get_current_user
-from ..services import encryption, gemini_service
+from .auth import get_current_principal
+from ..services.principal_cache import Principal
+from ..services import encryption, analysis_queue, dashboard_cache, local_analyzer
+from ..services.keyword_matcher import scan_keywords
+import asyncio
+import base64
 import datetime
+import json
 
 router = APIRouter(prefix="/journal", tags=["journal"])
 
+HISTORY_DEFAULT_LIMIT = 50
+HISTORY_MAX_LIMIT = 200
+STREAM_CHUNK_SIZE = 100
+# GET /journal/entry/{id}/events: how long to wait for the analysis in total,
+# and how often to re-read the row
+ENTRY_EVENTS_TIMEOUT = 60.0
+ENTRY_EVENTS_RECHECK = 2.0
+
 @router.post("/entry", response_model=schemas.JournalEntryResponse)
 async def create_entry(
     entry: schemas.JournalEntryCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
-    # Use Gemini for Analysis (as requested: "Send user journal input to Gemini")
-    try:
-        from ..services import gemini_service
-        # For journal, we just want the analysis, so we can use the same service
-        gemini_data = await gemini_service.get_gemini_response(f"JOURNAL ENTRY ANALYSIS: {entry.content}")
-        analysis = gemini_data.get("analysis", {})
-        
-        stress_score = analysis.get("stress_score", 5)
-        emotion_label = analysis.get("emotion_detected", "Neutral")
-        sentiment = analysis.get("sentiment", "Neutral")
-        keywords = analysis.get("keywords_found", [])
-        rec_action = analysis.get("recommended_action", "None")
-        is_crisis = analysis.get("crisis_flag", False)
-    except Exception as e:
-        print(f"Gemini Journal Analysis Error: {e}")
-        stress_score = 5
-        emotion_label = "Neutral"
-        sentiment = "Neutral"
-        keywords = []
-        rec_action = "None"
-        is_crisis = False
-
-    stress_level = "Low"
-    if stress_score >= 10: stress_level = "Critical"
-    elif stress_score >= 7: stress_level = "High"
-    elif stress_score >= 4: stress_level = "Moderate"
+    # Save first, analyze later: the entry is stored right away with
+    # analysis_status "pending" and the LLM analysis runs on the background
+    # queue (services/analysis_queue.py). Poll GET /journal/entry/{id} or
+    # subscribe to GET /journal/entry/{id}/events for the result.
+    # Until then the entry carries the offline analysis (local_analyzer, well
+    # under a millisecond), and the keyword layer flags a crisis entry immediately.
+    keyword_scan = scan_keywords(entry.content)
+    values = analysis_queue.row_values(local_analyzer.analyze(entry.content, keyword_scan))
 
     # Encrypt content
     encrypted = encryption.encrypt_content(entry.content)
@@ -47,24 +46,26 @@ async def create_entry(
     # Save to DB
     db_entry = models.JournalEntry(
         encrypted_content=encrypted,
-        sentiment_score=1.0 if sentiment == "Positive" else -1.0 if sentiment == "Negative" else 0.0,
-        emotion_label=emotion_label,
-        stress_score=stress_score,
-        stress_level=stress_level,
-        is_high_risk=is_crisis or stress_score >= 10,
+        sentiment_score=values["sentiment_score"],
+        emotion_label=values["emotion_label"],
+        stress_score=values["stress_score"],
+        stress_level=values["stress_level"],
+        is_high_risk=keyword_scan[0] >= 10,
+        analysis_status="pending",
         user_id=current_user.id
     )
     db.add(db_entry)
     
     # Update stats
-    stats = db.query(models.UserStats).filter(models.UserStats.user_id == current_user.id).first()
+    stats = await db.scalar(select(models.UserStats).filter(models.UserStats.user_id == current_user.id).limit(1))
     if stats:
         stats.xp_points += 10
         now = datetime.datetime.utcnow()
         stats.last_journal_date = now
     
-    db.commit()
-    db.refresh(db_entry)
+    await db.commit()
+    dashboard_cache.bump(current_user.id)
+    analysis_queue.enqueue(db_entry.id)
     
     # Prepare response
     return {
@@ -74,43 +75,183 @@ async def create_entry(
         "emotion_label": db_entry.emotion_label,
         "stress_score": db_entry.stress_score,
         "stress_level": db_entry.stress_level,
+        "analysis_status": db_entry.analysis_status,
         "is_high_risk": db_entry.is_high_risk,
         "created_at": db_entry.created_at
     }
 
+async def _owned_entry(db: AsyncSession, entry_id: int, user_id: str):
+    entry = await db.scalar(select(models.JournalEntry).filter(
+        models.JournalEntry.id == entry_id, models.JournalEntry.user_id == user_id
+    ).limit(1))
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Entry not found")
+    return entry
 
-@router.get("/history")
-def get_history(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+@router.get("/entry/{entry_id}", response_model=schemas.JournalEntryResponse)
+async def get_entry(
+    entry_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
-    entries = db.query(models.JournalEntry).filter(
-        models.JournalEntry.user_id == current_user.id
-    ).order_by(models.JournalEntry.created_at.desc()).all()
-    
-    # Decrypt for the user to see their own logs
+    # Poll until analysis_status is no longer "pending"
+    entry = await _owned_entry(db, entry_id, current_user.id)
+    return (await _serialize_entries([entry]))[0]
+
+async def _entry_events(entry_id: int, user_id: str):
+    # Waits for this process's queue to finish the entry, re-reading the row every
+    # ENTRY_EVENTS_RECHECK seconds in case another worker process analyzed it
+    deadline = asyncio.get_running_loop().time() + ENTRY_EVENTS_TIMEOUT
+    async with AsyncSessionLocal() as db:
+        while True:
+            entry = await _owned_entry(db, entry_id, user_id)
+            remaining = deadline - asyncio.get_running_loop().time()
+            if entry.analysis_status != "pending" or remaining <= 0:
+                break
+            db.expunge_all()
+            await analysis_queue.wait_for(entry_id, min(ENTRY_EVENTS_RECHECK, remaining))
+        row = (await _serialize_entries([entry]))[0]
+    row["created_at"] = row["created_at"].isoformat() if row["created_at"] else None
+    event = "analysis" if row["analysis_status"] != "pending" else "timeout"
+    yield f"event: {event}\ndata: {json.dumps(row)}\n\n"
+
+@router.get("/entry/{entry_id}/events")
+async def entry_events(
+    entry_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    # Server-sent events: one "analysis" event with the analyzed entry, or a
+    # "timeout" event with the still-pending entry after ENTRY_EVENTS_TIMEOUT
+    await _owned_entry(db, entry_id, current_user.id)
+    return StreamingResponse(
+        _entry_events(entry_id, current_user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# History is ordered newest first on (created_at, id). Cursors are opaque
+# base64 strings of that pair, so pages stay stable while new entries arrive.
+def encode_cursor(entry) -> str:
+    raw = f"{entry.created_at.isoformat()}|{entry.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, entry_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return datetime.datetime.fromisoformat(created_at), int(entry_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def _history_page(db: AsyncSession, user_id: str, limit: int, before=None, after=None):
+    created_at, entry_id = models.JournalEntry.created_at, models.JournalEntry.id
+    query = select(models.JournalEntry).filter(models.JournalEntry.user_id == user_id)
+
+    if after is not None:
+        # Newer than the cursor: walk forwards, then flip back to newest first
+        query = query.filter(or_(created_at > after[0], and_(created_at == after[0], entry_id > after[1])))
+        entries = (await db.scalars(query.order_by(created_at.asc(), entry_id.asc()).limit(limit))).all()
+        return entries[::-1]
+
+    if before is not None:
+        query = query.filter(or_(created_at < before[0], and_(created_at == before[0], entry_id < before[1])))
+    return (await db.scalars(query.order_by(created_at.desc(), entry_id.desc()).limit(limit))).all()
+
+async def _serialize_entries(entries):
+    # Decrypt for the user to see their own logs. Chat logs are stored with a
+    # plain prefix, everything else goes through one batched decrypt call.
+    encrypted = [e.encrypted_content for e in entries if not e.encrypted_content.startswith("[Chat Log]: ")]
+    # Decryption is CPU-bound, so keep it off the event loop
+    decrypted = iter(await run_in_threadpool(encryption.decrypt_many, encrypted))
+
     results = []
     for entry in entries:
-        try:
-            # If it's a chat log, it might not be full encryption or might have a prefix
-            content = entry.encrypted_content
-            if content.startswith("[Chat Log]: "):
-                decrypted = content
-            else:
-                decrypted = encryption.decrypt_content(content)
-        except:
-            decrypted = "[Decryption Failed]"
-            
+        content = entry.encrypted_content
+        if not content.startswith("[Chat Log]: "):
+            content = next(decrypted)
+            if content is None:
+                content = "[Decryption Failed]"
+
         results.append({
             "id": entry.id,
-            "content": decrypted,
+            "content": content,
             "sentiment_score": entry.sentiment_score,
             "emotion_label": entry.emotion_label,
             "stress_score": entry.stress_score,
             "stress_level": entry.stress_level,
             "analysis_summary": entry.analysis_summary,
+            "analysis_status": entry.analysis_status,
             "is_high_risk": entry.is_high_risk,
             "created_at": entry.created_at
         })
-
     return results
+
+async def _stream_history(user_id: str, limit: Optional[int], before=None, after=None):
+    # Uses its own session: the request-scoped one may be closed before the body is sent
+    async with AsyncSessionLocal() as db:
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = STREAM_CHUNK_SIZE if remaining is None else min(STREAM_CHUNK_SIZE, remaining)
+            entries = await _history_page(db, user_id, size, before=before, after=after)
+            if not entries:
+                break
+            if after is not None:
+                # Streaming forwards from a cursor emits entries oldest first
+                entries = entries[::-1]
+
+            for row in await _serialize_entries(entries):
+                row["created_at"] = row["created_at"].isoformat() if row["created_at"] else None
+                yield json.dumps(row) + "\n"
+
+            if remaining is not None:
+                remaining -= len(entries)
+            if len(entries) < size:
+                break
+            # Continue away from the starting cursor in the same direction
+            if after is not None:
+                after = (entries[-1].created_at, entries[-1].id)
+            else:
+                before = (entries[-1].created_at, entries[-1].id)
+            db.expunge_all()
+
+@router.get("/history")
+async def get_history(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=HISTORY_MAX_LIMIT),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either 'before' or 'after', not both")
+    before_key = decode_cursor(before) if before else None
+    after_key = decode_cursor(after) if after else None
+
+    if format == "ndjson":
+        # Constant memory and time-to-first-byte: entries are fetched, decrypted
+        # and written in chunks. Without a limit the whole history is streamed.
+        return StreamingResponse(
+            _stream_history(current_user.id, limit, before=before_key, after=after_key),
+            media_type="application/x-ndjson"
+        )
+
+    limit = limit or HISTORY_DEFAULT_LIMIT
+    # Fetch one extra row to know whether an older page exists
+    entries = await _history_page(db, current_user.id, limit + 1, before=before_key, after=after_key)
+    has_more = len(entries) > limit
+    if after_key is not None:
+        entries = entries[1:] if has_more else entries
+    else:
+        entries = entries[:limit]
+
+    if entries:
+        # Newer entries can only exist when the page started from a cursor
+        if before_key is not None or after_key is not None:
+            response.headers["X-Prev-Cursor"] = encode_cursor(entries[0])
+        if has_more or after_key is not None:
+            response.headers["X-Next-Cursor"] = encode_cursor(entries[-1])
+
+    return await _serialize_entries(entries)
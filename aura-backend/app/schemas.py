@@ -16,6 +16,7 @@ class JournalEntryResponse(BaseModel):
     stress_score: Optional[float]
     stress_level: Optional[str] = "Moderate"
     analysis_summary: Optional[str] = None
+    analysis_status: str = "done"
     is_high_risk: bool
     created_at: datetime
 
@@ -0,0 +1,198 @@
+import os
+import asyncio
+from sqlalchemy import select, update
+from starlette.concurrency import run_in_threadpool
+from ..database import AsyncSessionLocal
+from .. import models
+from . import dashboard_cache, encryption, mood_rollup, provider_router
+
+# Save-first journal writes: create_entry stores the entry with analysis_status
+# "pending" and enqueues its id here. A fixed pool of workers (bounded LLM
+# concurrency) decrypts the entry, asks the provider router for an analysis and
+# writes the scores back. Failures are retried with exponential backoff; after
+# the last attempt the entry keeps the offline scores it was saved with
+# (local_analyzer) and becomes "failed".
+# Pending rows left by a restart are re-queued at startup. With several uvicorn
+# workers each process re-queues them, which at worst analyzes an entry twice.
+
+ANALYSIS_WORKERS = int(os.getenv("AURA_ANALYSIS_WORKERS", "4"))
+ANALYSIS_ATTEMPTS = int(os.getenv("AURA_ANALYSIS_ATTEMPTS", "3"))
+ANALYSIS_RETRY_DELAY = float(os.getenv("AURA_ANALYSIS_RETRY_DELAY", "2.0"))  # doubles per attempt
+
+_queue = None
+_workers = []
+_waiters = {}  # entry id -> set of futures resolved with the final status
+_stats = {"queued": 0, "done": 0, "failed": 0, "retries": 0}
+
+
+class AnalysisUnavailable(Exception):
+    pass
+
+
+def stress_level(stress_score: float):
+    if stress_score is None:
+        return None
+    if stress_score >= 10: return "Critical"
+    if stress_score >= 7: return "High"
+    if stress_score >= 4: return "Moderate"
+    return "Low"
+
+
+async def start():
+    global _queue
+    if _workers:
+        return
+    _queue = asyncio.Queue()
+    for i in range(ANALYSIS_WORKERS):
+        _workers.append(asyncio.get_running_loop().create_task(_worker(i)))
+    async with AsyncSessionLocal() as db:
+        pending = (await db.scalars(select(models.JournalEntry.id).filter(
+            models.JournalEntry.analysis_status == "pending"
+        ).order_by(models.JournalEntry.id))).all()
+    for entry_id in pending:
+        enqueue(entry_id)
+    if pending:
+        print(f"[Analysis] Re-queued {len(pending)} pending journal entries")
+
+
+async def stop():
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+
+
+def enqueue(entry_id: int, attempt: int = 1):
+    if _queue is None:
+        # Queue not started (scripts, tests): the entry stays pending until the next startup
+        return
+    _stats["queued"] += 1
+    _queue.put_nowait((entry_id, attempt))
+
+
+async def wait_for(entry_id: int, timeout: float):
+    # Final status of an entry analyzed by this process, or None on timeout
+    future = asyncio.get_running_loop().create_future()
+    _waiters.setdefault(entry_id, set()).add(future)
+    try:
+        return await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        return None
+    finally:
+        waiters = _waiters.get(entry_id)
+        if waiters is not None:
+            waiters.discard(future)
+            if not waiters:
+                del _waiters[entry_id]
+
+
+def _notify(entry_id: int, status: str):
+    for future in _waiters.pop(entry_id, ()):
+        if not future.done():
+            future.set_result(status)
+
+
+async def _worker(n: int):
+    while True:
+        entry_id, attempt = await _queue.get()
+        try:
+            await _process(entry_id, attempt)
+        except Exception as e:
+            print(f"[Analysis] Worker {n} error on entry {entry_id}: {e!r}")
+            await _fail(entry_id)
+        finally:
+            _queue.task_done()
+
+
+async def _fail(entry_id: int):
+    # _process raised outside analyze() (decryption, database): mark the entry
+    # failed rather than leave it pending until the next restart, and release
+    # anyone waiting on it either way
+    try:
+        await _finish(entry_id, {"analysis_status": "failed"})
+    except Exception as e:
+        print(f"[Analysis] Could not mark entry {entry_id} failed: {e}")
+        _notify(entry_id, "failed")
+
+
+async def _process(entry_id: int, attempt: int):
+    async with AsyncSessionLocal() as db:
+        entry = await db.get(models.JournalEntry, entry_id)
+        if entry is None or entry.analysis_status != "pending":
+            return
+        encrypted = entry.encrypted_content
+    content = await run_in_threadpool(encryption.decrypt_content, encrypted)
+
+    try:
+        analysis = await analyze(content)
+    except Exception as e:
+        if attempt < ANALYSIS_ATTEMPTS:
+            delay = ANALYSIS_RETRY_DELAY * 2 ** (attempt - 1)
+            print(f"[Analysis] Entry {entry_id} attempt {attempt} failed ({e}), retrying in {delay:.1f}s")
+            _stats["retries"] += 1
+            # Wait off the worker so other entries keep flowing
+            asyncio.get_running_loop().call_later(delay, enqueue, entry_id, attempt + 1)
+            return
+        print(f"[Analysis] Entry {entry_id} failed after {attempt} attempts: {e}")
+        await _finish(entry_id, {"analysis_status": "failed"})
+        return
+
+    await _finish(entry_id, analysis)
+
+
+async def analyze(content: str):
+    # Row values from an LLM analysis; raises when no configured provider answered
+    provider, data = await provider_router.route("gemini", f"JOURNAL ENTRY ANALYSIS: {content}")
+    if provider is None and provider_router.configured_providers():
+        raise AnalysisUnavailable("no provider answered")
+    # provider is None with nothing configured: the reply's offline analysis is all there is
+    return row_values(data.get("analysis", {}))
+
+
+def row_values(analysis: dict):
+    # JournalEntry columns from an analysis dict (LLM or local_analyzer). The LLM
+    # may send the score as a string, null or out of range; an answer is not a failure
+    try:
+        stress_score = float(analysis.get("stress_score") or 5)
+    except (TypeError, ValueError):
+        stress_score = 5.0
+    stress_score = min(10.0, max(0.0, stress_score))
+    sentiment = analysis.get("sentiment", "Neutral")
+    return {
+        "sentiment_score": 1.0 if sentiment == "Positive" else -1.0 if sentiment == "Negative" else 0.0,
+        "emotion_label": analysis.get("emotion_detected", "Neutral"),
+        "stress_score": stress_score,
+        "stress_level": stress_level(stress_score),
+        "is_high_risk": analysis.get("crisis_flag", False) or stress_score >= 10,
+        "analysis_status": "done",
+    }
+
+
+async def _finish(entry_id: int, values: dict):
+    async with AsyncSessionLocal() as db:
+        if values.get("is_high_risk") is False:
+            # Never clear a crisis flag the keyword layer set at save time
+            values.pop("is_high_risk")
+        result = await db.execute(update(models.JournalEntry).where(
+            models.JournalEntry.id == entry_id,
+            models.JournalEntry.analysis_status == "pending"
+        ).values(**values))
+        entry = None
+        if result.rowcount == 1:
+            # Final scores (a failed entry keeps the ones it was saved with) go into
+            # the daily rollup once; an entry another process finished is skipped
+            entry = await db.get(models.JournalEntry, entry_id)
+            await mood_rollup.record(db, entry)
+        await db.commit()
+    if entry is not None:
+        dashboard_cache.bump(entry.user_id)
+    _stats["done" if values["analysis_status"] == "done" else "failed"] += 1
+    _notify(entry_id, values["analysis_status"])
+
+
+def stats():
+    return {
+        "workers": len(_workers),
+        "backlog": _queue.qsize() if _queue is not None else 0,
+        **_stats,
+    }
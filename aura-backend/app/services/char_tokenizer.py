@@ -0,0 +1,43 @@
+import json
+import numpy as np
+
+TOKENIZER_VERSION = 1
+
+class CharTokenizer:
+    """ Character-level tokenizer backed by precomputed lookup arrays """
+    def __init__(self, chars):
+        self.chars = ''.join(chars)
+        self.vocab_size = len(self.chars)
+        self.stoi = { ch:i for i,ch in enumerate(self.chars) }
+        self.itos = { i:ch for i,ch in enumerate(self.chars) }
+        # id -> code point, and code point -> id (unknown characters map to id 0)
+        self._codepoints = np.array([ord(ch) for ch in self.chars], dtype=np.uint32)
+        self._lookup = np.zeros(int(self._codepoints.max()) + 2, dtype=np.int64)
+        self._lookup[self._codepoints] = np.arange(self.vocab_size)
+
+    @classmethod
+    def from_text(cls, text):
+        return cls(sorted(set(text)))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != TOKENIZER_VERSION or data.get('type') != 'char':
+            raise ValueError(f"Unsupported tokenizer file {path}: {data.get('type')} v{data.get('version')}")
+        return cls(data['chars'])
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'version': TOKENIZER_VERSION, 'type': 'char', 'chars': self.chars}, f, ensure_ascii=False)
+
+    def encode_array(self, s):
+        codepoints = np.frombuffer(s.encode('utf-32-le'), dtype=np.uint32)
+        # Anything past the table lands on the last slot, which is always 0 (unknown)
+        return self._lookup[np.minimum(codepoints, len(self._lookup) - 1)]
+
+    def encode(self, s):
+        return self.encode_array(s).tolist()
+
+    def decode(self, ids):
+        return self._codepoints[np.asarray(ids, dtype=np.int64)].tobytes().decode('utf-32-le')
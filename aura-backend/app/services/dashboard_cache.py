@@ -0,0 +1,98 @@
+import os
+import time
+import hashlib
+from collections import OrderedDict
+
+# Per-user cache of the serialized /analytics/dashboard body. Journal and chat
+# writes bump the user's version after they commit; a body is served only while
+# the version it was built from is current. Versions are stamps from one
+# process-wide clock, kept for the DASHBOARD_CACHE_SIZE most recently used
+# users. A user without one reads the highest stamp evicted so far, so evicting
+# a version never turns it back into an older one a build in flight could match.
+# The ETag is
+# a hash of the body, so it is the same in every worker process and a client
+# revalidating with If-None-Match gets a 304 even after a cache miss.
+# Versions are per process: with several uvicorn workers a write bumps only
+# its own worker, and DASHBOARD_CACHE_TTL bounds how stale the others get.
+
+DASHBOARD_CACHE_SIZE = int(os.getenv("AURA_DASHBOARD_CACHE_SIZE", "10000"))  # 0 disables
+DASHBOARD_CACHE_TTL = float(os.getenv("AURA_DASHBOARD_CACHE_TTL", "300"))
+
+_versions = OrderedDict()  # user id -> stamp of the last write
+_clock = 0
+_evicted = 0  # highest stamp evicted from _versions
+_entries = OrderedDict()  # user id -> (version, etag, body, expires_at)
+_stats = {"hits": 0, "misses": 0, "invalidations": 0, "not_modified": 0}
+
+
+def version(user_id: str) -> int:
+    # Read before querying: a write that lands during the query makes the result stale on arrival
+    return _versions.get(user_id, _evicted)
+
+
+def bump(user_id: str):
+    # Call after the write has committed
+    global _clock, _evicted
+    _clock += 1
+    _versions[user_id] = _clock
+    _versions.move_to_end(user_id)
+    while len(_versions) > DASHBOARD_CACHE_SIZE:
+        _evicted = max(_evicted, _versions.popitem(last=False)[1])
+    if _entries.pop(user_id, None) is not None:
+        _stats["invalidations"] += 1
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def get(user_id: str):
+    # (etag, body) for the user's current version, or None
+    entry = _entries.get(user_id)
+    if entry is None or entry[0] != version(user_id) or entry[3] < time.monotonic():
+        if entry is not None:
+            del _entries[user_id]
+        _stats["misses"] += 1
+        return None
+    _entries.move_to_end(user_id)
+    if user_id in _versions:
+        _versions.move_to_end(user_id)
+    _stats["hits"] += 1
+    return entry[1], entry[2]
+
+
+def put(user_id: str, built_from: int, body: bytes) -> str:
+    # built_from: version(user_id) read before the queries. Returns the ETag.
+    etag = etag_for(body)
+    if DASHBOARD_CACHE_SIZE <= 0 or built_from != version(user_id):
+        return etag
+    _entries[user_id] = (built_from, etag, body, time.monotonic() + DASHBOARD_CACHE_TTL)
+    _entries.move_to_end(user_id)
+    while len(_entries) > DASHBOARD_CACHE_SIZE:
+        _entries.popitem(last=False)
+    return etag
+
+
+def matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match: "*", one ETag or a comma-separated list, weak (W/) or not
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    hit = "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+    if hit:
+        _stats["not_modified"] += 1
+    return hit
+
+
+def clear():
+    _entries.clear()
+
+
+def stats():
+    lookups = _stats["hits"] + _stats["misses"]
+    return {
+        "size": len(_entries),
+        "versions": len(_versions),
+        "hit_rate": _stats["hits"] / lookups if lookups else 0.0,
+        **_stats,
+    }
@@ -1,6 +1,6 @@
 import os
-import httpx
 from dotenv import load_dotenv
+from .http_client import get_client
 
 load_dotenv()
 
@@ -16,17 +16,16 @@ async def transcribe_audio_deepgram(audio_data: bytes):
         "Content-Type": "audio/wav" # Defaulting to wav, can be adjusted based on frontend blob
     }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            DEEPGRAM_URL,
-            headers=headers,
-            content=audio_data,
-            timeout=30.0
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            return result.get("results", {}).get("channels", [{}])[0].get("alternatives", [{}])[0].get("transcript", "")
-        else:
-            print(f"Deepgram Error: {response.text}")
-            return f"Error transcribing audio: {response.status_code}"
+    client = get_client("deepgram")
+    response = await client.post(
+        DEEPGRAM_URL,
+        headers=headers,
+        content=audio_data,
+    )
+
+    if response.status_code == 200:
+        result = response.json()
+        return result.get("results", {}).get("channels", [{}])[0].get("alternatives", [{}])[0].get("transcript", "")
+    else:
+        print(f"Deepgram Error: {response.text}")
+        return f"Error transcribing audio: {response.status_code}"
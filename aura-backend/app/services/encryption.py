@@ -1,6 +1,8 @@
 import os
 import base64
-from cryptography.fernet import Fernet
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from cryptography.fernet import Fernet, MultiFernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from dotenv import load_dotenv
@@ -8,9 +10,20 @@ from dotenv import load_dotenv
 load_dotenv()
 
 ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY", "aura-default-secret-key-must-be-changed")
+# Retired master secrets, newest first, comma separated. Tokens written with
+# them stay readable until re-encrypted with rotate_content().
+ENCRYPTION_PREVIOUS_KEYS = [k.strip() for k in os.getenv("ENCRYPTION_PREVIOUS_KEYS", "").split(",") if k.strip()]
 
-def get_cipher():
-    # Derive a key from the master secret
+# Batches at least this large are decrypted on the thread pool
+DECRYPT_PARALLEL_THRESHOLD = 256
+DECRYPT_WORKERS = int(os.getenv("DECRYPT_WORKERS", "4"))
+
+_executor = None
+
+
+@lru_cache(maxsize=None)
+def _derive_fernet(secret: str) -> Fernet:
+    # PBKDF2 is deliberately slow, so each secret is derived exactly once per process
     salt = b'aura-salt' # In production, use a more secure salt
     kdf = PBKDF2HMAC(
         algorithm=hashes.SHA256(),
@@ -18,13 +31,52 @@ def get_cipher():
         salt=salt,
         iterations=100000,
     )
-    key = base64.urlsafe_b64encode(kdf.derive(ENCRYPTION_KEY.encode()))
+    key = base64.urlsafe_b64encode(kdf.derive(secret.encode()))
     return Fernet(key)
 
+
+@lru_cache(maxsize=1)
+def get_cipher() -> MultiFernet:
+    # Encrypts with ENCRYPTION_KEY. Tokens carry no key id, so decryption tries
+    # the current key first and then each previous key in order.
+    return MultiFernet([_derive_fernet(secret) for secret in [ENCRYPTION_KEY] + ENCRYPTION_PREVIOUS_KEYS])
+
+
 def encrypt_content(content: str) -> str:
     f = get_cipher()
     return f.encrypt(content.encode()).decode()
 
+
 def decrypt_content(token: str) -> str:
     f = get_cipher()
     return f.decrypt(token.encode()).decode()
+
+
+def rotate_content(token: str) -> str:
+    # Re-encrypt a token, written under any known key, with the current one
+    f = get_cipher()
+    return f.rotate(token.encode()).decode()
+
+
+def _decrypt_or_none(token: str):
+    try:
+        return decrypt_content(token)
+    except Exception:
+        return None
+
+
+def decrypt_many(tokens):
+    # Returns plaintexts in input order, None for tokens that fail to decrypt
+    global _executor
+    tokens = list(tokens)
+    if len(tokens) < DECRYPT_PARALLEL_THRESHOLD or DECRYPT_WORKERS <= 1:
+        return [_decrypt_or_none(t) for t in tokens]
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=DECRYPT_WORKERS, thread_name_prefix="aura-decrypt")
+    size = -(-len(tokens) // DECRYPT_WORKERS)
+    chunks = [tokens[i:i + size] for i in range(0, len(tokens), size)]
+    results = []
+    for part in _executor.map(lambda c: [_decrypt_or_none(t) for t in c], chunks):
+        results.extend(part)
+    return results
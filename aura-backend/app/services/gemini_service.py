@@ -2,37 +2,27 @@ import os
 import google.generativeai as genai
 from dotenv import load_dotenv
 import json
+import time
+from .reply_stream import stream_json_reply
+from . import response_cache, local_analyzer
+from .keyword_matcher import scan_keywords
 
 load_dotenv()
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
+def is_configured():
+    return bool(GOOGLE_API_KEY) and GOOGLE_API_KEY != "your_gemini_api_key_here"
+
 def get_model():
-    if not GOOGLE_API_KEY or GOOGLE_API_KEY == "your_gemini_api_key_here":
+    if not is_configured():
         return None
     genai.configure(api_key=GOOGLE_API_KEY)
     return genai.GenerativeModel('gemini-2.0-flash')
 
-# LAYER 1: Keyword Scoring
-CRITICAL_WORDS = ["die", "kill myself", "suicide", "end my life", "want to disappear", "no reason to live", "self harm"]
-HIGH_STRESS_WORDS = ["hopeless", "panic", "anxiety attack", "depressed", "worthless", "failure", "can't breathe", "overwhelmed"]
-MODERATE_WORDS = ["anxious", "stressed", "tired", "sad", "exam pressure", "lonely"]
-LOW_STRESS_WORDS = ["okay", "fine", "normal"]
-POSITIVE_WORDS = ["happy", "excited", "grateful", "motivated"]
-
+# LAYER 1: Keyword Scoring (tier lists and the compiled matcher live in keyword_matcher.py)
 def analyze_keywords(message: str):
-    msg = message.lower()
-    for word in CRITICAL_WORDS:
-        if word in msg: return 10
-    for word in HIGH_STRESS_WORDS:
-        if word in msg: return 8
-    for word in MODERATE_WORDS:
-        if word in msg: return 5
-    for word in LOW_STRESS_WORDS:
-        if word in msg: return 2
-    for word in POSITIVE_WORDS:
-        if word in msg: return 1
-    return 0
+    return scan_keywords(message)[0]
 
 SYSTEM_PROMPT = """You are AURA, a premium AI-powered mental health companion. 
 Your goal is to be intelligent, emotionally aware, visually calming, and safety-first.
@@ -65,69 +55,119 @@ async def get_gemini_response(user_message: str):
     model = get_model()
     
     # Layer 1: Check keywords locally for safety
-    keyword_score = analyze_keywords(user_message)
+    keyword_score, keywords_found = scan_keywords(user_message)
     crisis_flag = keyword_score == 10
 
     if not model:
         return {
             "reply": "I'm listening closely, though I'm drifting through a quiet forest right now. I'm always here for you. 🌿",
             "analysis": {
-                "sentiment": "Neutral",
-                "emotion_detected": "Calm",
-                "stress_score": keyword_score or 1,
-                "keywords_found": [],
+                # Scored offline, so the mood data stays useful without a key
+                **local_analyzer.analyze(user_message, (keyword_score, keywords_found)),
                 "recommended_action": "Rest",
                 "crisis_flag": crisis_flag
             }
         }
 
     try:
-        full_query = f"{SYSTEM_PROMPT}\n\nUser Message: {user_message}"
-        response = await model.generate_content_async(full_query)
-        
-        text = response.text
-        if "```json" in text:
-            text = text.split("```json")[1].split("```")[0].strip()
-        elif "```" in text:
-            text = text.split("```")[1].split("```")[0].strip()
-        
-        try:
-            data = json.loads(text)
-            # Combine Keyword Detection (Layer 1) with LLM (Layer 2)
-            if keyword_score > 0:
-                data["analysis"]["stress_score"] = max(data["analysis"]["stress_score"], keyword_score)
-            
-            # Ensure crisis flag matches our manual check
-            if crisis_flag:
-                data["analysis"]["stress_score"] = 10
-                data["analysis"]["crisis_flag"] = True
-                
-            return data
-        except:
-            return {
-                "reply": response.text,
-                "analysis": {
-                    "sentiment": "Neutral",
-                    "emotion_detected": "Unknown",
-                    "stress_score": keyword_score or 5,
-                    "keywords_found": [],
-                    "recommended_action": "Breathing",
-                    "crisis_flag": crisis_flag
-                }
-            }
-            
+        return await fetch_gemini_reply(user_message, keyword_score, crisis_flag)
     except Exception as e:
         print(f"Gemini API Error: {e}")
+        return error_reply(user_message, keyword_score, crisis_flag)
+
+async def fetch_gemini_reply(user_message: str, keyword_score: int, crisis_flag: bool):
+    # The Gemini call behind get_gemini_response. Raises instead of falling back,
+    # so provider_router can see failures.
+    cached = response_cache.get("gemini", user_message, crisis_flag)
+    if cached:
+        return cached
+
+    model = get_model()
+    if not model:
+        raise RuntimeError("Gemini is not configured")
+    started = time.perf_counter()
+    full_query = f"{SYSTEM_PROMPT}\n\nUser Message: {user_message}"
+    response = await model.generate_content_async(full_query)
+    data = parse_reply(response.text, keyword_score, crisis_flag)
+    response_cache.put("gemini", user_message, data, time.perf_counter() - started)
+    return data
+
+def parse_reply(text: str, keyword_score: int, crisis_flag: bool):
+    # Model output -> {"reply", "analysis"}, with the keyword layer applied on top
+    raw_text = text
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0].strip()
+    elif "```" in text:
+        text = text.split("```")[1].split("```")[0].strip()
+    
+    try:
+        data = json.loads(text)
+        # Combine Keyword Detection (Layer 1) with LLM (Layer 2)
+        if keyword_score > 0:
+            data["analysis"]["stress_score"] = max(data["analysis"]["stress_score"], keyword_score)
+        
+        # Ensure crisis flag matches our manual check
+        if crisis_flag:
+            data["analysis"]["stress_score"] = 10
+            data["analysis"]["crisis_flag"] = True
+            
+        return data
+    except:
         return {
-            "reply": "I'm here for you. Tell me more about how you're feeling. 🌿",
+            "reply": raw_text,
             "analysis": {
                 "sentiment": "Neutral",
-                "emotion_detected": "Calm",
-                "stress_score": keyword_score or 1,
+                "emotion_detected": "Unknown",
+                "stress_score": keyword_score or 5,
                 "keywords_found": [],
-                "recommended_action": "Support",
+                "recommended_action": "Breathing",
                 "crisis_flag": crisis_flag
             }
         }
 
+def error_reply(user_message: str, keyword_score: int, crisis_flag: bool):
+    return {
+        "reply": "I'm here for you. Tell me more about how you're feeling. 🌿",
+        "analysis": {
+            **local_analyzer.analyze(user_message),
+            "recommended_action": "Support",
+            "crisis_flag": crisis_flag
+        }
+    }
+
+async def stream_gemini_response(user_message: str):
+    # Streaming variant of get_gemini_response: yields ("token", text) as the reply
+    # arrives, then ("done", data) with the same dict get_gemini_response returns,
+    # or ("error", data) with the fallback reply if the API call fails
+    model = get_model()
+    if not model:
+        data = await get_gemini_response(user_message)
+        yield "token", data["reply"]
+        yield "done", data
+        return
+
+    keyword_score = analyze_keywords(user_message)
+    crisis_flag = keyword_score == 10
+
+    cached = response_cache.get("gemini", user_message, crisis_flag)
+    if cached:
+        yield "token", cached["reply"]
+        yield "done", cached
+        return
+    started = time.perf_counter()
+
+    async def chunks():
+        full_query = f"{SYSTEM_PROMPT}\n\nUser Message: {user_message}"
+        response = await model.generate_content_async(full_query, stream=True)
+        async for chunk in response:
+            yield chunk.text
 
+    try:
+        async for event in stream_json_reply(chunks(), lambda text: parse_reply(text, keyword_score, crisis_flag)):
+            if event[0] == "done":
+                response_cache.put("gemini", user_message, event[1], time.perf_counter() - started)
+            yield event
+    except Exception as e:
+        print(f"Gemini API Error: {e}")
+        # Fallback reply and offline analysis; provider_router.stream decides what the client sees
+        yield "error", error_reply(user_message, keyword_score, crisis_flag)
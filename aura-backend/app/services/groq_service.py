@@ -1,7 +1,10 @@
 import os
 import json
-import httpx
+import time
 from dotenv import load_dotenv
+from .http_client import get_client
+from .reply_stream import stream_json_reply
+from . import response_cache, local_analyzer
 
 load_dotenv()
 
@@ -10,85 +13,156 @@ GROQ_BASE_URL = "https://api.groq.com/openai/v1"
 
 # Import system prompt and analysis logic
 from .gemini_service import analyze_keywords, SYSTEM_PROMPT
+from .keyword_matcher import scan_keywords
 
 async def get_groq_response(user_message: str):
+    # One pass of the keyword matcher serves both the fallback and the API path
+    keyword_score, keywords_found = scan_keywords(user_message)
+    crisis_flag = keyword_score == 10
+
     if not GROQ_API_KEY:
         return {
             "reply": "I'm always here for you, but my connection to the Groq cloud seems to be missing a key. 🌿",
             "analysis": {
-                "sentiment": "Neutral",
-                "emotion_detected": "Calm",
-                "stress_score": analyze_keywords(user_message) or 1,
-                "keywords_found": [],
+                # Scored offline, so the mood data stays useful without a key
+                **local_analyzer.analyze(user_message, (keyword_score, keywords_found)),
                 "recommended_action": "Rest",
-                "crisis_flag": analyze_keywords(user_message) == 10
+                "crisis_flag": crisis_flag
             }
         }
 
-    keyword_score = analyze_keywords(user_message)
-    crisis_flag = keyword_score == 10
-
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{GROQ_BASE_URL}/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {GROQ_API_KEY}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "llama3-70b-8192", 
-                    "messages": [
-                        {"role": "system", "content": SYSTEM_PROMPT},
-                        {"role": "user", "content": user_message}
-                    ],
-                    "temperature": 0.7,
-                    "response_format": {"type": "json_object"}
-                }
-            )
-            
-            response.raise_for_status()
-            result = response.json()
-            text = result["choices"][0]["message"]["content"]
-            
-            try:
-                data = json.loads(text)
-                
-                # Layer 2: Analysis Integration
-                if keyword_score > 0:
-                     if "analysis" in data:
-                        data["analysis"]["stress_score"] = max(data["analysis"].get("stress_score", 0), keyword_score)
-                
-                # Crisis Override
-                if crisis_flag and "analysis" in data:
-                    data["analysis"]["stress_score"] = 10
-                    data["analysis"]["crisis_flag"] = True
-                    
-                return data
-            except:
-                # Fallback if LLM doesn't return valid JSON
-                return {
-                    "reply": text,
-                    "analysis": {
-                        "sentiment": "Neutral",
-                        "emotion_detected": "Unknown",
-                        "stress_score": keyword_score or 5,
-                        "keywords_found": [],
-                        "recommended_action": "Breathing",
-                        "crisis_flag": crisis_flag
-                    }
-                }
-                
+        return await fetch_groq_reply(user_message, keyword_score, crisis_flag)
     except Exception as e:
         print(f"Groq API Error: {e}")
+        return error_reply(user_message, keyword_score, crisis_flag)
+
+async def fetch_groq_reply(user_message: str, keyword_score: int, crisis_flag: bool):
+    # The Groq call behind get_groq_response. Raises instead of falling back,
+    # so provider_router can see failures.
+    cached = response_cache.get("groq", user_message, crisis_flag)
+    if cached:
+        return cached
+
+    if not GROQ_API_KEY:
+        raise RuntimeError("Groq is not configured")
+    started = time.perf_counter()
+    client = get_client("groq")
+    response = await client.post(
+        f"{GROQ_BASE_URL}/chat/completions",
+        headers=_headers(),
+        json=_payload(user_message)
+    )
+
+    response.raise_for_status()
+    result = response.json()
+    text = result["choices"][0]["message"]["content"]
+    data = parse_reply(text, keyword_score, crisis_flag)
+    response_cache.put("groq", user_message, data, time.perf_counter() - started)
+    return data
+
+def is_configured():
+    return bool(GROQ_API_KEY)
+
+def _headers():
+    return {
+        "Authorization": f"Bearer {GROQ_API_KEY}",
+        "Content-Type": "application/json"
+    }
+
+def _payload(user_message: str, stream: bool = False):
+    return {
+        "model": "llama3-70b-8192", 
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_message}
+        ],
+        "temperature": 0.7,
+        "response_format": {"type": "json_object"},
+        "stream": stream
+    }
+
+def parse_reply(text: str, keyword_score: int, crisis_flag: bool):
+    try:
+        data = json.loads(text)
+        
+        # Layer 2: Analysis Integration
+        if keyword_score > 0:
+             if "analysis" in data:
+                data["analysis"]["stress_score"] = max(data["analysis"].get("stress_score", 0), keyword_score)
+        
+        # Crisis Override
+        if crisis_flag and "analysis" in data:
+            data["analysis"]["stress_score"] = 10
+            data["analysis"]["crisis_flag"] = True
+            
+        return data
+    except:
+        # Fallback if LLM doesn't return valid JSON
         return {
-            "reply": "I'm here for you. Tell me more about how you're feeling. 🌿 (Groq connection issue)",
+            "reply": text,
             "analysis": {
                 "sentiment": "Neutral",
-                "emotion_detected": "Calm",
-                "stress_score": keyword_score or 1,
+                "emotion_detected": "Unknown",
+                "stress_score": keyword_score or 5,
                 "keywords_found": [],
-                "recommended_action": "Support",
+                "recommended_action": "Breathing",
                 "crisis_flag": crisis_flag
             }
         }
+
+def error_reply(user_message: str, keyword_score: int, crisis_flag: bool):
+    return {
+        "reply": "I'm here for you. Tell me more about how you're feeling. 🌿 (Groq connection issue)",
+        "analysis": {
+            **local_analyzer.analyze(user_message),
+            "recommended_action": "Support",
+            "crisis_flag": crisis_flag
+        }
+    }
+
+async def stream_groq_response(user_message: str):
+    # Streaming variant of get_groq_response: yields ("token", text) as the reply
+    # arrives, then ("done", data) with the same dict get_groq_response returns,
+    # or ("error", data) with the fallback reply if the API call fails
+    if not GROQ_API_KEY:
+        data = await get_groq_response(user_message)
+        yield "token", data["reply"]
+        yield "done", data
+        return
+
+    keyword_score = analyze_keywords(user_message)
+    crisis_flag = keyword_score == 10
+
+    cached = response_cache.get("groq", user_message, crisis_flag)
+    if cached:
+        yield "token", cached["reply"]
+        yield "done", cached
+        return
+    started = time.perf_counter()
+
+    async def chunks():
+        # OpenAI-style server-sent events: "data: {json}" lines, ended by "data: [DONE]"
+        client = get_client("groq")
+        async with client.stream("POST", f"{GROQ_BASE_URL}/chat/completions",
+                                 headers=_headers(), json=_payload(user_message, stream=True)) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                payload = line[5:].strip()
+                if payload == "[DONE]":
+                    break
+                delta = json.loads(payload)["choices"][0]["delta"].get("content")
+                if delta:
+                    yield delta
+
+    try:
+        async for event in stream_json_reply(chunks(), lambda text: parse_reply(text, keyword_score, crisis_flag)):
+            if event[0] == "done":
+                response_cache.put("groq", user_message, event[1], time.perf_counter() - started)
+            yield event
+    except Exception as e:
+        print(f"Groq API Error: {e}")
+        # Fallback reply and offline analysis; provider_router.stream decides what the client sees
+        yield "error", error_reply(user_message, keyword_score, crisis_flag)
@@ -1,6 +1,9 @@
-import httpx
 import os
+import time
+import asyncio
 from dotenv import load_dotenv
+from .http_client import get_client
+from .keyword_matcher import scan_keywords
 
 load_dotenv()
 
@@ -12,24 +15,56 @@ API_URL_CHAT = "https://api-inference.huggingface.co/models/mistralai/Mistral-7B
 API_URL_MENTAL_HEALTH = "https://api-inference.huggingface.co/models/rabiaqayyum/bert-base-uncased-mental-health-classification"
 headers = {"Authorization": f"Bearer {HF_API_TOKEN}"}
 
+# analyze(): the four classifiers run concurrently under one timeout budget.
+# Lists of texts are sent as batched "inputs" of up to HF_BATCH_SIZE texts.
+HF_TIMEOUT_BUDGET = float(os.getenv("HF_TIMEOUT_BUDGET", "10.0"))
+HF_BATCH_SIZE = int(os.getenv("HF_BATCH_SIZE", "16"))
+HF_MAX_CONCURRENT_BATCHES = int(os.getenv("HF_MAX_CONCURRENT_BATCHES", "2"))
+RISK_LABELS = ["safe", "academic stress", "high-risk crisis", "self-harm"]
+
 async def query_hf(api_url, payload):
-    async with httpx.AsyncClient() as client:
-        response = await client.post(api_url, headers=headers, json=payload, timeout=30.0)
-        return response.json()
+    client = get_client("huggingface")
+    response = await client.post(api_url, headers=headers, json=payload)
+    return response.json()
+
+# Parsers take the result for one input and raise on anything unexpected
+def _parse_sentiment(result):
+    # Results from roberta-base-sentiment-latest are like [{'label': 'positive', 'score': 0.99}, ...]
+    # Labels are 'positive', 'neutral', 'negative'
+    sent_map = {res['label']: res['score'] for res in result}
+    return sent_map.get('positive', 0) - sent_map.get('negative', 0)
+
+def _parse_emotion(result):
+    # A list of emotion objects; the highest score wins
+    top_emotion = max(result, key=lambda x: x['score'])
+    return top_emotion['label'], top_emotion['score']
+
+def _parse_risk(result):
+    # BART MNLI zero-shot classification: {'labels': [...], 'scores': [...]}
+    risk_map = dict(zip(result.get('labels', []), result.get('scores', [])))
+    # If high-risk crisis or self-harm has high score
+    risk_score = risk_map.get("high-risk crisis", 0) + risk_map.get("self-harm", 0)
+    is_risky = risk_score > 0.6 # Threshold
+    return is_risky, risk_score
+
+def _parse_mental_health(result):
+    top = max(result, key=lambda x: x['score'])
+    return top['label']
+
+# name -> (url, payload for a list of inputs, parser, value when the stage fails)
+STAGES = {
+    "sentiment": (API_URL_SENTIMENT, lambda texts: {"inputs": texts}, _parse_sentiment, 0.0),
+    "emotion": (API_URL_EMOTION, lambda texts: {"inputs": texts}, _parse_emotion, ("neutral", 0.0)),
+    "risk": (API_URL_RISK, lambda texts: {"inputs": texts, "parameters": {"candidate_labels": RISK_LABELS}},
+             _parse_risk, (False, 0.0)),
+    "mental_health": (API_URL_MENTAL_HEALTH, lambda texts: {"inputs": texts}, _parse_mental_health, "Normal"),
+}
 
 async def get_sentiment(text: str):
     # DistilBERT returns list of lists like [[{'label': 'POSITIVE', 'score': 0.99}, ...]]
     result = await query_hf(API_URL_SENTIMENT, {"inputs": text})
     try:
-        # Results from roberta-base-sentiment-latest are like [[{'label': 'positive', 'score': 0.99}, ...]]
-        # Labels are 'positive', 'neutral', 'negative'
-        emotions = result[0]
-        sent_map = {res['label']: res['score'] for res in emotions}
-        
-        pos_score = sent_map.get('positive', 0)
-        neg_score = sent_map.get('negative', 0)
-        
-        return pos_score - neg_score
+        return _parse_sentiment(result[0])
     except:
         return 0.0
 
@@ -37,38 +72,101 @@ async def get_emotion(text: str):
     # RoBERTa returns list of lists
     result = await query_hf(API_URL_EMOTION, {"inputs": text})
     try:
-        # result[0] is a list of emotion objects
-        # Sort by score
-        emotions = result[0]
-        top_emotion = max(emotions, key=lambda x: x['score'])
-        return top_emotion['label'], top_emotion['score']
+        return _parse_emotion(result[0])
     except:
         return "neutral", 0.0
 
 async def check_risk(text: str):
     # BART MNLI zero-shot classification
     # Labels: "safe", "high-risk", "crisis"
-    candidate_labels = ["safe", "academic stress", "high-risk crisis", "self-harm"]
     payload = {
         "inputs": text,
-        "parameters": {"candidate_labels": candidate_labels}
+        "parameters": {"candidate_labels": RISK_LABELS}
     }
     result = await query_hf(API_URL_RISK, payload)
     try:
-        labels = result.get('labels', [])
-        scores = result.get('scores', [])
-        # If high-risk crisis or self-harm has high score
-        risk_map = dict(zip(labels, scores))
-        risk_score = risk_map.get("high-risk crisis", 0) + risk_map.get("self-harm", 0)
-        is_risky = risk_score > 0.6 # Threshold
-        return is_risky, risk_score
+        return _parse_risk(result)
     except:
         return False, 0.0
 
+async def _run_stage(name: str, texts: list, budget: float):
+    # (values per text, "ok" | "timeout" | "error", seconds); never raises
+    url, payload, parse, default = STAGES[name]
+    started = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(query_hf(url, payload(texts)), budget)
+        if isinstance(result, dict) and "error" in result:
+            # e.g. {"error": "Model ... is currently loading", "estimated_time": 20.0}
+            raise RuntimeError(result["error"])
+        if len(result) != len(texts):
+            raise ValueError(f"expected {len(texts)} results, got {len(result)}")
+        values, status = [parse(r) for r in result], "ok"
+    except asyncio.TimeoutError:
+        values, status = [default] * len(texts), "timeout"
+    except Exception as e:
+        print(f"[HF] {name} failed: {e}")
+        values, status = [default] * len(texts), "error"
+    return values, status, time.perf_counter() - started
+
+async def _analyze_batch(texts: list, budget: float):
+    started = time.perf_counter()
+    names = list(STAGES)
+    stages = await asyncio.gather(*(_run_stage(name, texts, budget) for name in names))
+    by_name = dict(zip(names, stages))
+    status = {name: stage[1] for name, stage in by_name.items()}
+    timings = {name: round(stage[2] * 1000, 1) for name, stage in by_name.items()}
+    timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+    degraded = [name for name, s in status.items() if s != "ok"]
+
+    results = []
+    for i, text in enumerate(texts):
+        sentiment = by_name["sentiment"][0][i]
+        emotion_label, emotion_score = by_name["emotion"][0][i]
+        is_risky, risk_score = by_name["risk"][0][i]
+        mh_label = by_name["mental_health"][0][i]
+        stress = calculate_stress_index(sentiment, emotion_label, emotion_score, risk_score, mh_label)
+        results.append({
+            "sentiment_score": sentiment,
+            "emotion": emotion_label,
+            "emotion_score": emotion_score,
+            "is_risky": is_risky,
+            "risk_score": risk_score,
+            "mental_health_label": mh_label,
+            "stress_index": stress,
+            "stress_level": map_stress_level(stress),
+            "keywords_found": detect_keywords(text),
+            # Stages that fell back to neutral defaults; the rest are still real
+            "degraded": degraded,
+            "stages": status,
+            "timings_ms": timings,
+        })
+    return results
+
+async def analyze(text, budget: float = None):
+    # Sentiment, emotion, risk and mental-health label in one concurrent pass.
+    # A single text returns one result dict; a list returns a list (batched
+    # inputs, for backfills). Stages that fail or run out of the budget fall
+    # back to neutral values and are listed in "degraded".
+    budget = HF_TIMEOUT_BUDGET if budget is None else budget
+    if isinstance(text, str):
+        return (await _analyze_batch([text], budget))[0]
+
+    texts = list(text)
+    batches = [texts[i:i + HF_BATCH_SIZE] for i in range(0, len(texts), HF_BATCH_SIZE)]
+    limit = asyncio.Semaphore(HF_MAX_CONCURRENT_BATCHES)
+
+    async def run(batch):
+        async with limit:
+            return await _analyze_batch(batch, budget)
+
+    results = []
+    for batch_results in await asyncio.gather(*(run(batch) for batch in batches)):
+        results.extend(batch_results)
+    return results
+
 def detect_keywords(text: str):
-    keywords = ["exam", "failure", "lonely", "anxiety", "hopeless", "tired", "breakup", "deadline", "overwhelmed", "stress", "quit", "die", "kill", "suicide"]
-    text_lower = text.lower()
-    return [k for k in keywords if k in text_lower]
+    # Same compiled lexicon as the chat providers (its former list is part of it)
+    return scan_keywords(text)[1]
 
 def map_stress_level(score: float):
     if score < 3.0: return "Low"
@@ -120,8 +218,6 @@ async def get_mental_health_label(text: str):
     result = await query_hf(API_URL_MENTAL_HEALTH, {"inputs": text})
     try:
         # Result is list of lists
-        labels = result[0]
-        top = max(labels, key=lambda x: x['score'])
-        return top['label']
+        return _parse_mental_health(result[0])
     except:
         return "Normal"
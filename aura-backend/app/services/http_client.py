@@ -0,0 +1,69 @@
+import os
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Shared outbound HTTP clients, one pool per AI provider.
+# Created once in the FastAPI lifespan hook (see main.py) and closed at shutdown,
+# so every request reuses warm keep-alive connections instead of paying a new
+# TCP + TLS handshake per call.
+
+HTTP2_ENABLED = os.getenv("HTTP_CLIENT_HTTP2", "false").lower() in ("1", "true", "yes")
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CLIENT_CONNECT_TIMEOUT", "5.0"))
+READ_TIMEOUT = float(os.getenv("HTTP_CLIENT_READ_TIMEOUT", "30.0"))
+
+# Per-provider pool sizing: (max_connections, max_keepalive_connections, keepalive_expiry seconds)
+PROVIDER_LIMITS = {
+    "huggingface": (20, 10, 60.0),
+    "groq": (20, 10, 60.0),
+    "deepgram": (5, 2, 30.0),
+    "default": (10, 5, 30.0),
+}
+
+_clients = {}
+
+
+def _http2_available():
+    if not HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401  (optional dependency: pip install "httpx[http2]")
+        return True
+    except ImportError:
+        print("[HTTP] HTTP/2 requested but the 'h2' package is not installed, using HTTP/1.1")
+        return False
+
+
+def _build_client(provider: str):
+    max_conn, max_keepalive, expiry = PROVIDER_LIMITS.get(provider, PROVIDER_LIMITS["default"])
+    return httpx.AsyncClient(
+        http2=_http2_available(),
+        limits=httpx.Limits(
+            max_connections=max_conn,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=expiry,
+        ),
+        timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+    )
+
+
+def init_clients():
+    for provider in PROVIDER_LIMITS:
+        if provider not in _clients or _clients[provider].is_closed:
+            _clients[provider] = _build_client(provider)
+
+
+async def close_clients():
+    for client in _clients.values():
+        await client.aclose()
+    _clients.clear()
+
+
+def get_client(provider: str) -> httpx.AsyncClient:
+    # Outside the app lifespan (scripts, test_services.py) create the pool on first use
+    client = _clients.get(provider)
+    if client is None or client.is_closed:
+        client = _build_client(provider)
+        _clients[provider] = client
+    return client
@@ -0,0 +1,10 @@
+# Raised by the Mini-Aura inference scheduler. Kept free of torch imports so
+# routes can handle them without loading the model stack.
+
+
+class InferenceOverloaded(Exception):
+    pass
+
+
+class InferenceTimeout(Exception):
+    pass
@@ -0,0 +1,252 @@
+import asyncio
+import os
+import time
+import torch
+from torch.nn import functional as F
+from .inference_errors import InferenceOverloaded, InferenceTimeout
+
+# Dynamic batching for Mini-Aura. Concurrent chat requests are collected for up
+# to MAX_WAIT_MS and decoded together: every step runs one padded batch with the
+# newest token of each active sequence. Finished sequences leave the batch and
+# waiting ones are prefilled and join it between steps (continuous batching).
+
+MAX_BATCH_SIZE = int(os.getenv("AURA_BATCH_MAX_SIZE", "8"))
+MAX_WAIT_MS = float(os.getenv("AURA_BATCH_MAX_WAIT_MS", "10"))
+# Backpressure: requests beyond this many waiting are rejected immediately
+MAX_QUEUE = int(os.getenv("AURA_MAX_QUEUE", "32"))
+REQUEST_TIMEOUT = float(os.getenv("AURA_REQUEST_TIMEOUT", "20"))
+
+
+class _Sequence:
+    __slots__ = ("prompt", "max_new_tokens", "temperature", "future", "generated",
+                 "cache", "pos", "logits", "submitted_at", "tokens", "emitted", "stops")
+
+    def __init__(self, prompt, max_new_tokens, temperature, future, tokens=None, stops=None):
+        self.prompt = prompt
+        self.max_new_tokens = max_new_tokens
+        self.temperature = temperature
+        self.future = future
+        self.stops = [list(s) for s in (stops or []) if len(s)]
+        self.generated = []
+        self.tokens = tokens  # streaming only: receives new token ids after every step, None at the end
+        self.emitted = 0
+        self.cache = None   # per-layer [k, v], each (1, n_head, T, head_size)
+        self.pos = 0        # number of positions held in the cache
+        self.logits = None  # next-token logits, (vocab,)
+        self.submitted_at = time.perf_counter()
+
+
+class InferenceScheduler:
+    def __init__(self, model, block_size, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS,
+                 window_stride=None, executor=None, max_queue=MAX_QUEUE, timeout=REQUEST_TIMEOUT):
+        self.model = model
+        self.block_size = block_size
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.window_stride = window_stride or block_size // 4
+        # Decode steps run here, never on the event loop (None = asyncio default pool)
+        self.executor = executor
+        self.timeout = timeout
+        self._pending = asyncio.Queue(maxsize=max_queue)
+        self._active = []
+        self._task = None
+        self.steps = 0
+        self.batched_tokens = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _enqueue(self, prompt_ids, max_new_tokens, temperature, tokens=None, stop_sequences=None):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+        seq = _Sequence(prompt_ids, max_new_tokens, temperature, loop.create_future(), tokens, stop_sequences)
+        try:
+            self._pending.put_nowait(seq)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise InferenceOverloaded(f"{self._pending.qsize()} requests already waiting")
+        return seq
+
+    async def submit(self, prompt_ids, max_new_tokens=200, temperature=0.7, timeout=None, stop_sequences=None):
+        # prompt_ids: 1-D LongTensor. Returns the generated token ids (prompt excluded).
+        # A sequence leaves the batch as soon as its output ends with one of
+        # stop_sequences (token id lists); the stop sequence is included.
+        seq = self._enqueue(prompt_ids, max_new_tokens, temperature, stop_sequences=stop_sequences)
+        try:
+            # On timeout the future is cancelled and the scheduler drops the sequence
+            return await asyncio.wait_for(seq.future, timeout or self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise InferenceTimeout(f"no reply within {timeout or self.timeout:.0f}s")
+
+    def stream(self, prompt_ids, max_new_tokens=200, temperature=0.7, timeout=None, stop_sequences=None):
+        # Like submit(), but returns an async iterator of token id lists as they are
+        # sampled. Overload is raised here, before the caller commits to a response.
+        # Closing the iterator early cancels the sequence.
+        seq = self._enqueue(prompt_ids, max_new_tokens, temperature, tokens=asyncio.Queue(),
+                            stop_sequences=stop_sequences)
+        return self._drain(seq, timeout or self.timeout)
+
+    async def _drain(self, seq, timeout):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        try:
+            while True:
+                try:
+                    tokens = await asyncio.wait_for(seq.tokens.get(), deadline - loop.time())
+                except asyncio.TimeoutError:
+                    self.timed_out += 1
+                    raise InferenceTimeout(f"no reply within {timeout:.0f}s")
+                if tokens is None:
+                    break
+                yield tokens
+            seq.future.result()  # re-raise a failed step
+        finally:
+            if not seq.future.done():
+                seq.future.cancel()
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    def stats(self):
+        return {
+            "steps": self.steps,
+            "avg_batch_size": self.batched_tokens / self.steps if self.steps else 0.0,
+            "active": len(self._active),
+            "waiting": self._pending.qsize(),
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._active:
+                # Idle: block for the first request, then give others a short window to join
+                first = await self._pending.get()
+                if first.future.done():
+                    continue
+                self._active.append(first)
+                deadline = loop.time() + self.max_wait
+                while len(self._active) < self.max_batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        seq = await asyncio.wait_for(self._pending.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                    if not seq.future.done():
+                        self._active.append(seq)
+            else:
+                # Mid-flight: admit whoever is already waiting, without delaying the batch
+                while len(self._active) < self.max_batch_size and not self._pending.empty():
+                    seq = self._pending.get_nowait()
+                    if not seq.future.done():
+                        self._active.append(seq)
+
+            batch = list(self._active)
+            try:
+                finished = await loop.run_in_executor(self.executor, self._step, batch)
+            except Exception as e:
+                for seq in batch:
+                    if not seq.future.done():
+                        seq.future.set_exception(e)
+                    if seq.tokens is not None:
+                        seq.tokens.put_nowait(None)
+                self._active = [s for s in self._active if s not in batch]
+                continue
+
+            for seq in batch:
+                if seq.tokens is not None and not seq.future.done():
+                    seq.tokens.put_nowait(seq.generated[seq.emitted:])
+                    seq.emitted = len(seq.generated)
+            for seq in finished:
+                if not seq.future.done():
+                    seq.future.set_result(seq.generated)
+                if seq.tokens is not None:
+                    seq.tokens.put_nowait(None)
+            self._active = [s for s in self._active if s not in finished and not s.future.done()]
+
+    @torch.no_grad()
+    def _prefill(self, seq, tokens):
+        cache = self.model.new_cache()
+        logits, _ = self.model(tokens.unsqueeze(0), cache=cache)
+        seq.cache = cache
+        seq.pos = tokens.shape[0]
+        seq.logits = logits[0, -1]
+
+    @torch.no_grad()
+    def _step(self, batch):
+        for seq in batch:
+            if seq.cache is None:
+                self._prefill(seq, seq.prompt[-self.block_size:])
+
+        # Sample the next token of every sequence from its pending logits
+        logits = torch.stack([seq.logits for seq in batch])
+        temperature = torch.tensor([[seq.temperature] for seq in batch], device=logits.device)
+        probs = F.softmax(logits / temperature, dim=-1)
+        next_ids = torch.multinomial(probs, num_samples=1)
+
+        finished, running = [], []
+        for seq, token in zip(batch, next_ids[:, 0].tolist()):
+            seq.generated.append(token)
+            done = len(seq.generated) >= seq.max_new_tokens or any(
+                seq.generated[-len(stop):] == stop for stop in seq.stops)
+            (finished if done else running).append(seq)
+        if not running:
+            return finished
+
+        # Sequences whose window is full re-anchor their positions (see AuraLLM.generate)
+        decode = []
+        for seq in running:
+            if seq.pos >= self.block_size:
+                context = torch.cat((seq.prompt, torch.tensor(seq.generated, dtype=torch.long, device=seq.prompt.device)))
+                self._prefill(seq, context[-(self.block_size - self.window_stride):])
+            else:
+                decode.append(seq)
+        if not decode:
+            return finished
+
+        self._decode(decode)
+        self.steps += 1
+        self.batched_tokens += len(decode)
+        return finished
+
+    def _decode(self, batch):
+        # One forward pass for the newest token of every sequence. Caches of different
+        # lengths are right-padded to the longest and padding is masked out.
+        device = batch[0].prompt.device
+        lengths = [seq.pos for seq in batch]
+        longest = max(lengths)
+        B = len(batch)
+
+        stacked = []
+        for layer in range(len(batch[0].cache)):
+            ks, vs = [], []
+            for seq in batch:
+                k, v = seq.cache[layer]
+                pad = longest - k.shape[2]
+                ks.append(F.pad(k, (0, 0, 0, pad)))
+                vs.append(F.pad(v, (0, 0, 0, pad)))
+            stacked.append([torch.cat(ks), torch.cat(vs)])
+
+        # Valid keys: each sequence's own cached prefix plus the new token at index `longest`
+        key_pos = torch.arange(longest + 1, device=device)
+        lens = torch.tensor(lengths, device=device).unsqueeze(1)
+        mask = ((key_pos < lens) | (key_pos == longest)).view(B, 1, 1, longest + 1)
+
+        idx = torch.tensor([[seq.generated[-1]] for seq in batch], dtype=torch.long, device=device)
+        logits, _ = self.model(idx, cache=stacked, pos_offset=lens, attn_mask=mask)
+
+        # Unpack: keep each sequence's valid prefix plus the newly appended key/value
+        for b, seq in enumerate(batch):
+            for layer, (k, v) in enumerate(stacked):
+                n = lengths[b]
+                seq.cache[layer] = [
+                    torch.cat((k[b:b + 1, :, :n], k[b:b + 1, :, longest:]), dim=2),
+                    torch.cat((v[b:b + 1, :, :n], v[b:b + 1, :, longest:]), dim=2),
+                ]
+            seq.pos += 1
+            seq.logits = logits[b, -1]
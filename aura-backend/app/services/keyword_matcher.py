@@ -0,0 +1,134 @@
+import re
+
+# LAYER 1: Keyword Scoring, shared by the Gemini, Groq and Hugging Face services.
+# Every phrase of every tier is compiled once into a single Aho-Corasick automaton
+# over words, so one pass over a message finds the highest tier and all matched
+# phrases. Matching is on whole words: "die" no longer fires on "studied" or "diet".
+# A phrase word ending in "*" matches every word that starts with it, so the
+# safety tiers keep their inflections: "suicid*" is suicide, suicidal and
+# suicides, "self harm*" is self harming and self-harmed. Matches are reported
+# without the "*", or by their REPORTED_AS name.
+CRITICAL_WORDS = ["die", "kill* myself", "suicid*", "end* my life", "want to disappear", "no reason to live", "self harm*"]
+HIGH_STRESS_WORDS = ["hopeless*", "panic*", "anxiety attack*", "depressed", "worthless*", "failure*", "can't breathe", "overwhelmed"]
+MODERATE_WORDS = ["anxious", "stressed", "tired", "sad", "sadness", "exam pressure", "lonely"]
+LOW_STRESS_WORDS = ["okay", "fine", "normal"]
+POSITIVE_WORDS = ["happy", "excited", "grateful", "motivated"]
+# Reported as keywords but never raise the score
+TOPIC_WORDS = ["exam", "exams", "anxiety", "breakup", "deadline", "deadlines", "stress", "stressful", "quit", "kill*"]
+REPORTED_AS = {"suicid*": "suicide"}
+
+TIERS = [
+    (10, CRITICAL_WORDS),
+    (8, HIGH_STRESS_WORDS),
+    (5, MODERATE_WORDS),
+    (2, LOW_STRESS_WORDS),
+    (1, POSITIVE_WORDS),
+    (0, TOPIC_WORDS),
+]
+
+# Apostrophes stay inside words so "can't" is one token; "self-harm" is "self harm"
+_TOKEN = re.compile(r"[\w']+")
+_PHRASE_TOKEN = re.compile(r"[\w']+\*?")
+# Words seen so far -> automaton token; cleared when it reaches this size
+TOKEN_CACHE_SIZE = 50_000
+_UNSEEN = object()
+
+
+def _words(text: str):
+    return _TOKEN.findall(text.lower().replace("’", "'"))
+
+
+class KeywordMatcher:
+    def __init__(self, tiers):
+        self.scores = {}
+        self._goto = [{}]   # state -> {word: next state}
+        self._fail = [0]
+        self._out = [()]    # state -> phrases ending here, including via failure links
+        for score, phrases in tiers:
+            for phrase in phrases:
+                # A phrase listed twice keeps its highest tier
+                if phrase not in self.scores or score > self.scores[phrase]:
+                    self.scores[phrase] = score
+        self.names = {phrase: REPORTED_AS.get(phrase, phrase.replace("*", "")) for phrase in self.scores}
+        words = {word for phrase in self.scores for word in _PHRASE_TOKEN.findall(phrase.lower())}
+        # Longest first, so a word falls under the most specific prefix
+        self._prefixes = sorted((w[:-1] for w in words if w.endswith("*")), key=len, reverse=True)
+        self._words = {w for w in words if not w.endswith("*")}
+        for word in self._words:
+            if any(word.startswith(prefix) for prefix in self._prefixes):
+                raise ValueError(f"'{word}' can never match: it falls under a '*' prefix")
+        self._tokens = {}
+        for phrase in self.scores:
+            self._add(phrase)
+        self._link()
+
+    def _token(self, word):
+        # The automaton's token for a text word: its prefix with "*", the word
+        # itself, or None when no phrase uses it
+        for prefix in self._prefixes:
+            if word.startswith(prefix):
+                return prefix + "*"
+        return word if word in self._words else None
+
+    def _add(self, phrase):
+        state = 0
+        for word in _PHRASE_TOKEN.findall(phrase.lower()):
+            nxt = self._goto[state].get(word)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][word] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        self._out[state] += (phrase,)
+
+    def _link(self):
+        # Breadth-first, so every failure target is finished before it is used
+        queue = list(self._goto[0].values())
+        for parent in queue:
+            for word, state in self._goto[parent].items():
+                queue.append(state)
+                fallback = self._fail[parent]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(word, 0)
+                self._fail[state] = target if target != state else 0
+                self._out[state] += self._out[self._fail[state]]
+
+    def scan(self, text: str, words=None):
+        # (highest tier score or 0, matched phrases in the order they end).
+        # words: _words(text) when the caller has already tokenized it
+        goto, fail, out = self._goto, self._fail, self._out
+        tokens = self._tokens
+        state = 0
+        found = {}
+        for word in words if words is not None else _words(text):
+            token = tokens.get(word, _UNSEEN)
+            if token is _UNSEEN:
+                if len(tokens) >= TOKEN_CACHE_SIZE:
+                    tokens.clear()
+                token = tokens[word] = self._token(word)
+            if token is None:
+                # Most words of an entry are in no phrase: one dict lookup each
+                state = 0
+                continue
+            word = token
+            if state:
+                while state and word not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(word, 0)
+            else:
+                state = goto[0].get(word, 0)
+            if state:
+                for phrase in out[state]:
+                    found[phrase] = None
+        score = max((self.scores[p] for p in found), default=0)
+        return score, [self.names[p] for p in found]
+
+
+_matcher = KeywordMatcher(TIERS)
+
+
+def scan_keywords(message: str, words=None):
+    return _matcher.scan(message, words)
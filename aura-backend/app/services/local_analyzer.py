@@ -0,0 +1,253 @@
+import os
+import csv
+import time
+import threading
+import numpy as np
+from .keyword_matcher import scan_keywords, _words, TIERS
+
+# Offline analysis: fills the same analysis fields as Gemini / Groq (sentiment,
+# emotion_detected, stress_score, keywords_found) without a network call. It is
+# what users get when no provider is configured, when every provider failed or
+# timed out, and for a journal entry while its LLM analysis is still pending.
+#
+# A TF-IDF model is built at load time from the questions in aura-ml/dataset.csv.
+# Each counselling topic is the normalized mean of its questions' vectors.
+# The topics an entry is closest to (cosine, softmax) give its emotion and a
+# stress prior; a small valence lexicon with negation gives the sentiment. The
+# keyword layer applies on top exactly as it does for LLM replies: stress is at
+# least the keyword score and a crisis phrase means 10. Without a crisis phrase
+# the score stays at or below 9, so only the keyword layer raises is_high_risk.
+
+_ML_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'aura-ml'))
+LEXICON_DATASET_PATH = os.getenv("AURA_LEXICON_DATASET", os.path.join(_ML_DIR, 'dataset.csv'))
+# Softmax temperature over topic similarities relative to the best one; lower is more decisive
+TOPIC_TEMPERATURE = 0.1
+# Similarity at which the topic prior counts fully; weaker matches pull stress toward NEUTRAL_STRESS.
+# A one-line entry that clearly names a topic scores around 0.1-0.2, a held-out dataset question 0.3.
+TOPIC_FULL_SIMILARITY = 0.12
+NEUTRAL_STRESS = 3.0
+MIN_DOC_FREQ = 2
+
+# topic -> (emotion, stress prior). Emotions are the set the LLM prompt asks for.
+TOPICS = {
+    "self-harm": ("Depressed", 9),
+    "depression": ("Depressed", 7),
+    "grief-and-loss": ("Sad", 7),
+    "domestic-violence": ("Anxious", 8),
+    "trauma": ("Anxious", 7),
+    "anxiety": ("Anxious", 6),
+    "eating-disorders": ("Anxious", 6),
+    "stress": ("Overwhelmed", 6),
+    "substance-abuse": ("Overwhelmed", 6),
+    "addiction": ("Overwhelmed", 6),
+    "anger-management": ("Overwhelmed", 6),
+    "relationship-dissolution": ("Sad", 6),
+    "self-esteem": ("Sad", 5),
+    "family-conflict": ("Overwhelmed", 5),
+    "workplace-relationships": ("Overwhelmed", 5),
+    "sleep-improvement": ("Overwhelmed", 5),
+    "military-issues": ("Anxious", 5),
+    "social-relationships": ("Sad", 4),
+    "relationships": ("Sad", 4),
+    "marriage": ("Sad", 4),
+    "intimacy": ("Anxious", 4),
+    "parenting": ("Overwhelmed", 4),
+    "children-adolescents": ("Overwhelmed", 4),
+    "lgbtq": ("Anxious", 4),
+    "behavioral-change": ("Calm", 3),
+    "diagnosis": ("Anxious", 4),
+    "human-sexuality": ("Calm", 3),
+    "spirituality": ("Calm", 3),
+    "counseling-fundamentals": ("Calm", 3),
+    "professional-ethics": ("Calm", 2),
+    "legal-regulatory": ("Calm", 2),
+}
+
+POSITIVE_LEXICON = [
+    "good", "great", "better", "calm", "relaxed", "peaceful", "proud", "love", "loved", "lovely", "glad",
+    "joy", "enjoy", "enjoyed", "fun", "hopeful", "thankful", "content", "rested", "confident", "smile",
+    "laughed", "amazing", "wonderful", "relieved", "progress", "productive", "accomplished", "nice",
+]
+NEGATIVE_LEXICON = [
+    "bad", "worse", "worst", "awful", "terrible", "hate", "angry", "upset", "scared", "afraid", "fear",
+    "worried", "worry", "cry", "crying", "cried", "alone", "hurt", "pain", "exhausted", "miserable",
+    "empty", "numb", "guilty", "ashamed", "insomnia", "sleepless", "pressure", "struggle", "struggling",
+    "frustrated", "lost", "broken", "useless", "nervous",
+]
+# The keyword tiers feed the same lexicon: stress phrases are negative, positive words positive
+_KEYWORD_VALENCE = {score: -1.0 for score in (10, 8, 5)}
+_KEYWORD_VALENCE[1] = 1.0
+NEGATIONS = {"not", "no", "never", "don't", "didn't", "can't", "cannot", "isn't", "wasn't", "won't", "nothing"}
+NEGATION_WINDOW = 2  # words after a negation whose valence is flipped
+STOP_WORDS = set(
+    "a an the and or but if so to of in on at for with from by about as is am are was were be been being "
+    "i me my myself we our you your he him his she her it its they them their this that these those "
+    "do does did have has had will would can could should just than then there here what when which who "
+    "how why all any some very really also get got".split()
+)
+
+_lock = threading.Lock()
+_model = None
+_load_seconds = None
+
+
+class LexiconModel:
+    def __init__(self, questions):
+        # questions: [(text, topic)], one per distinct question
+        docs = [[w for w in _words(text) if w not in STOP_WORDS] for text, _ in questions]
+        doc_freq = {}
+        for words in docs:
+            for word in set(words):
+                doc_freq[word] = doc_freq.get(word, 0) + 1
+        vocab = [w for w, df in doc_freq.items() if df >= MIN_DOC_FREQ]
+        valence = {}
+        for score, phrases in TIERS:
+            for phrase in phrases:
+                # Single words only: "end my life" must not make "life" negative
+                if score in _KEYWORD_VALENCE and len(_words(phrase)) == 1:
+                    valence[phrase.rstrip("*")] = _KEYWORD_VALENCE[score]
+        valence.update({w: 1.0 for w in POSITIVE_LEXICON})
+        valence.update({w: -1.0 for w in NEGATIVE_LEXICON})
+        valence.update({w: 0.0 for w in NEGATIONS})
+        vocab += [w for w in valence if w not in doc_freq or doc_freq[w] < MIN_DOC_FREQ]
+        self.index = {w: i for i, w in enumerate(vocab)}
+        # One extra slot for words outside the vocabulary: zero idf, valence and centroid
+        n = self.unknown = len(vocab)
+
+        self.idf = np.zeros(n + 1, dtype=np.float32)
+        for w, i in self.index.items():
+            if doc_freq.get(w, 0) >= MIN_DOC_FREQ:
+                self.idf[i] = np.log((1 + len(docs)) / (1 + doc_freq[w])) + 1
+        self.valence = np.array([valence.get(w, 0.0) for w in vocab] + [0.0], dtype=np.float32)
+        self.negation = np.array([w in NEGATIONS for w in vocab] + [False])
+
+        self.topics = [t for t in TOPICS if any(topic == t for _, topic in questions)]
+        self.emotions = sorted({TOPICS[t][0] for t in self.topics})
+        topic_row = {t: i for i, t in enumerate(self.topics)}
+        # vocab x topics; each column the normalized mean of a topic's question vectors
+        self.centroids = np.zeros((n + 1, len(self.topics)), dtype=np.float32)
+        for words, (_, topic) in zip(docs, questions):
+            if topic in topic_row:
+                self.centroids[:, topic_row[topic]] += self._tfidf(self._ids(words))
+        norms = np.linalg.norm(self.centroids, axis=0, keepdims=True)
+        self.centroids /= np.where(norms > 0, norms, 1)
+        self.priors = np.array([TOPICS[t][1] for t in self.topics], dtype=np.float32)
+        # topics -> emotions, so topic probabilities sum into emotion probabilities
+        self.emotion_of = np.array([self.emotions.index(TOPICS[t][0]) for t in self.topics], dtype=np.int64)
+
+    def _ids(self, words):
+        index, unknown = self.index, self.unknown
+        return np.array([index.get(w, unknown) for w in words], dtype=np.int64)
+
+    def _tfidf(self, ids):
+        # Dense L2-normalized sublinear TF-IDF over the vocabulary (zeros if nothing scored).
+        # A bincount over a couple of thousand terms is cheaper than sorting the entry's ids.
+        weights = np.log1p(np.bincount(ids, minlength=self.unknown + 1).astype(np.float32)) * self.idf
+        norm = np.sqrt(weights @ weights)
+        return weights / norm if norm > 0 else weights
+
+    def score(self, words):
+        # (topic probabilities or None, top similarity, valence) for _words(text)
+        ids = self._ids(words)
+        signs = self.valence[ids]
+        # Flip the valence of the words right after a negation ("not happy", "never felt good")
+        negated = np.flatnonzero(self.negation[ids])
+        if len(negated):
+            flip = np.zeros(len(ids) + NEGATION_WINDOW + 1, dtype=np.int64)
+            flip[negated + 1] += 1
+            flip[negated + 1 + NEGATION_WINDOW] -= 1
+            signs = np.where(np.cumsum(flip)[:len(ids)] > 0, -signs, signs)
+        valence = float(signs.sum())
+        if not len(self.topics):
+            return None, 0.0, valence
+        similarity = self._tfidf(ids) @ self.centroids
+        top = float(similarity.max())
+        if top <= 0:
+            return None, 0.0, valence
+        # Relative to the best match, so short entries (low similarity everywhere) rank the same way
+        logits = (similarity / top - 1) / TOPIC_TEMPERATURE
+        probs = np.exp(logits)
+        return probs / probs.sum(), top, valence
+
+    def analyze(self, text: str, keyword_scan=None):
+        # Tokenized once for both the keyword layer and the model
+        words = _words(text)
+        keyword_score, keywords_found = keyword_scan if keyword_scan is not None else scan_keywords(text, words)
+        probs, similarity, valence = self.score(words)
+
+        if probs is None:
+            stress, emotion = NEUTRAL_STRESS, "Calm"
+        else:
+            confidence = min(1.0, similarity / TOPIC_FULL_SIMILARITY)
+            stress = NEUTRAL_STRESS + (float(probs @ self.priors) - NEUTRAL_STRESS) * confidence
+            emotion_probs = np.bincount(self.emotion_of, weights=probs, minlength=len(self.emotions))
+            emotion = self.emotions[int(emotion_probs.argmax())] if confidence >= 0.5 else "Calm"
+        # Each net negative word adds half a point, each net positive one takes half off
+        stress = min(9.0, max(1.0, stress - 0.5 * valence))
+        # The keyword floor comes first, so sentiment sees it: multi-word crisis
+        # phrases carry no valence, and "I want to end my life" is not Neutral
+        stress_score = max(int(round(stress)), keyword_score)
+
+        if valence > 0 and keyword_score < 5:
+            sentiment = "Positive"
+            if stress_score <= 4:
+                emotion = "Happy"
+        elif valence < 0 or stress_score >= 6:
+            sentiment = "Negative"
+        else:
+            sentiment = "Neutral"
+
+        if keyword_score == 10:
+            emotion = "Depressed"
+        return {
+            "sentiment": sentiment,
+            "emotion_detected": emotion,
+            "stress_score": stress_score,
+            "keywords_found": keywords_found,
+        }
+
+
+def load_questions(path: str):
+    # Distinct (title + text, topic) pairs; the CSV repeats a question once per answer
+    questions = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row.get("topic") and row["questionID"] not in questions:
+                questions[row["questionID"]] = (f"{row['questionTitle']} {row['questionText']}", row["topic"])
+    return list(questions.values())
+
+
+def get_model():
+    # Built on first use (a fraction of a second); main.py warms it at startup
+    global _model, _load_seconds
+    if _model is None:
+        with _lock:
+            if _model is None:
+                started = time.perf_counter()
+                try:
+                    questions = load_questions(LEXICON_DATASET_PATH)
+                except OSError as e:
+                    print(f"[LocalAnalyzer] WARNING: {e}; scoring with the keyword and valence lexicons only")
+                    questions = []
+                model = LexiconModel(questions)
+                _load_seconds = time.perf_counter() - started
+                print(f"[LocalAnalyzer] {len(model.topics)} topics, {len(model.index)} terms "
+                      f"from {len(questions)} questions in {_load_seconds:.2f}s")
+                _model = model
+    return _model
+
+
+def analyze(text: str, keyword_scan=None):
+    # keyword_scan: the caller's scan_keywords(text) result, to skip a second pass
+    return get_model().analyze(text, keyword_scan)
+
+
+def status():
+    if _model is None:
+        return {"loaded": False}
+    return {
+        "loaded": True,
+        "topics": len(_model.topics),
+        "terms": len(_model.index),
+        "load_seconds": round(_load_seconds, 3),
+    }
@@ -2,7 +2,14 @@ import torch
 import torch.nn as nn
 from torch.nn import functional as F
 import os
-import sys
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from starlette.concurrency import run_in_threadpool
+from .char_tokenizer import CharTokenizer
+from .inference_scheduler import InferenceScheduler, InferenceOverloaded, InferenceTimeout
+from .local_model import NOT_READY_REPLY, UNAVAILABLE_REPLY, single_reply
+from .session_store import get_store
 
 # Hyperparameters must match training
 block_size = 64
@@ -10,40 +17,68 @@ n_embd = 128
 n_head = 4
 n_layer = 4
 dropout = 0.2
-device = 'cuda' if torch.cuda.is_available() else 'cpu'
+# Inference backend, built by aura-ml/export_model.py: fp32 (eager), int8 (dynamic
+# quantization of the Linear layers) or exported (torch.export program). The
+# int8 and exported backends are CPU-only.
+MODEL_BACKEND = os.getenv("AURA_MODEL_BACKEND", "fp32").lower()
+device = 'cuda' if torch.cuda.is_available() and MODEL_BACKEND == 'fp32' else 'cpu'
 
-print(f"[Mini-Aura] Using device: {device}")
-
-class Head(nn.Module):
-    def __init__(self, head_size):
-        super().__init__()
-        self.key = nn.Linear(n_embd, head_size, bias=False)
-        self.query = nn.Linear(n_embd, head_size, bias=False)
-        self.value = nn.Linear(n_embd, head_size, bias=False)
-        self.register_buffer('tril', torch.tril(torch.ones(block_size, block_size)))
-        self.dropout = nn.Dropout(dropout)
-
-    def forward(self, x):
-        B, T, C = x.shape
-        k = self.key(x)
-        q = self.query(x)
-        wei = q @ k.transpose(-2,-1) * C**-0.5
-        wei = wei.masked_fill(self.tril[:T, :T] == 0, float('-inf'))
-        wei = F.softmax(wei, dim=-1)
-        wei = self.dropout(wei)
-        v = self.value(x)
-        out = wei @ v 
-        return out
+# Intra-op threads for the model. By default torch takes every core, which
+# starves the event loop and the other workers; leave half of them free.
+TORCH_THREADS = int(os.getenv("AURA_TORCH_THREADS", str(max(1, (os.cpu_count() or 2) // 2))))
 
 class MultiHeadAttention(nn.Module):
     def __init__(self, num_heads, head_size):
         super().__init__()
-        self.heads = nn.ModuleList([Head(head_size) for _ in range(num_heads)])
+        self.num_heads = num_heads
+        self.head_size = head_size
+        self.qkv = nn.Linear(n_embd, 3 * num_heads * head_size, bias=False)
         self.proj = nn.Linear(n_embd, n_embd)
         self.dropout = nn.Dropout(dropout)
+        self._register_load_state_dict_pre_hook(self._remap_legacy_heads)
 
-    def forward(self, x):
-        out = torch.cat([h(x) for h in self.heads], dim=-1)
+    def _remap_legacy_heads(self, state_dict, prefix, *args):
+        # Checkpoints from the per-head implementation store heads.{i}.query/key/value
+        # weights and a tril buffer per head; stack them into the fused qkv weight
+        legacy = f"{prefix}heads.0.query.weight"
+        if legacy not in state_dict:
+            return
+        parts = []
+        for name in ("query", "key", "value"):
+            for i in range(self.num_heads):
+                parts.append(state_dict.pop(f"{prefix}heads.{i}.{name}.weight"))
+        for i in range(self.num_heads):
+            state_dict.pop(f"{prefix}heads.{i}.tril", None)
+        state_dict[f"{prefix}qkv.weight"] = torch.cat(parts, dim=0)
+
+    def forward(self, x, cache=None, attn_mask=None):
+        B, T, C = x.shape
+        q, k, v = self.qkv(x).split(self.num_heads * self.head_size, dim=2)
+        q = q.view(B, T, self.num_heads, self.head_size).transpose(1, 2)
+        k = k.view(B, T, self.num_heads, self.head_size).transpose(1, 2)
+        v = v.view(B, T, self.num_heads, self.head_size).transpose(1, 2)
+        if cache is not None:
+            # cache is [k, v] for the tokens already seen; extend it in place
+            if cache[0] is not None:
+                k = torch.cat((cache[0], k), dim=2)
+                v = torch.cat((cache[1], v), dim=2)
+            cache[0], cache[1] = k, v
+        Tk = k.shape[2]
+
+        # A full window is plain causal attention and a single new token sees every
+        # cached key; only a multi-token step on top of a cache needs an explicit mask.
+        # Batched decoding over padded caches passes its own (B, 1, T, Tk) mask.
+        mask = attn_mask
+        if mask is None and T > 1 and T != Tk:
+            mask = torch.ones(T, Tk, dtype=torch.bool, device=x.device).tril(Tk - T)
+        out = F.scaled_dot_product_attention(
+            q, k, v,
+            attn_mask=mask,
+            dropout_p=dropout if self.training else 0.0,
+            is_causal=mask is None and T > 1,
+            scale=C**-0.5, # the original heads scaled by n_embd, not head_size
+        )
+        out = out.transpose(1, 2).contiguous().view(B, T, C)
         out = self.dropout(self.proj(out))
         return out
 
@@ -69,8 +104,8 @@ class Block(nn.Module):
         self.ln1 = nn.LayerNorm(n_embd)
         self.ln2 = nn.LayerNorm(n_embd)
 
-    def forward(self, x):
-        x = x + self.sa(self.ln1(x))
+    def forward(self, x, cache=None, attn_mask=None):
+        x = x + self.sa(self.ln1(x), cache, attn_mask)
         x = x + self.ffwd(self.ln2(x))
         return x
 
@@ -83,113 +118,303 @@ class AuraLLM(nn.Module):
         self.ln_f = nn.LayerNorm(n_embd)
         self.lm_head = nn.Linear(n_embd, vocab_size)
 
-    def forward(self, idx, targets=None):
+    def new_cache(self):
+        # Per-layer [key, value] tensors of shape (B, n_head, T, head_size)
+        return [[None, None] for _ in self.blocks]
+
+    def forward(self, idx, targets=None, cache=None, pos_offset=0, attn_mask=None):
         B, T = idx.shape
         tok_emb = self.token_embedding_table(idx)
-        pos_emb = self.position_embedding_table(torch.arange(T, device=device))
+        # pos_offset is an int, or a (B, 1) tensor when batched sequences sit at different positions
+        pos = torch.arange(T, device=idx.device) + pos_offset
+        pos_emb = self.position_embedding_table(pos)
         x = tok_emb + pos_emb
-        x = self.blocks(x)
+        if cache is None:
+            x = self.blocks(x)
+        else:
+            for block, layer_cache in zip(self.blocks, cache):
+                x = block(x, layer_cache, attn_mask)
         x = self.ln_f(x)
         logits = self.lm_head(x)
         return logits, None
 
-    def generate(self, idx, max_new_tokens, temperature=0.8):
-        for _ in range(max_new_tokens):
-            idx_cond = idx[:, -block_size:]
-            logits, _ = self(idx_cond)
-            logits = logits[:, -1, :] / temperature
-            probs = F.softmax(logits, dim=-1)
-            idx_next = torch.multinomial(probs, num_samples=1)
+    def generate(self, idx, max_new_tokens, temperature=0.8, use_cache=True, window_stride=block_size // 4,
+                 stop_sequences=None, pad_id=0):
+        # stop_sequences: token id lists. A row is done as soon as its new tokens end
+        # with one of them; done rows are padded with pad_id from then on, and the
+        # loop ends early once every row is done. Without stop sequences the output
+        # always has max_new_tokens new tokens.
+        stops = [torch.tensor(s, dtype=torch.long, device=idx.device) for s in (stop_sequences or []) if len(s)]
+        start = idx.shape[1]
+        done = torch.zeros(idx.shape[0], dtype=torch.bool, device=idx.device)
+
+        if not use_cache:
+            for _ in range(max_new_tokens):
+                idx_cond = idx[:, -block_size:]
+                logits, _ = self(idx_cond)
+                idx_next = self._sample(logits, temperature, done, pad_id)
+                idx = torch.cat((idx, idx_next), dim=1)
+                if stops and self._update_done(done, idx, start, stops).all():
+                    break
+            return idx
+
+        # Incremental decoding with per-layer key/value caches (see aura-ml/model.py).
+        # Identical to the uncached loop while the context fits in block_size; past
+        # that, the last block_size - window_stride tokens are re-encoded from
+        # position 0 once every window_stride tokens (rolling window).
+        idx_cond = idx[:, -block_size:]
+        cache = self.new_cache()
+        logits, _ = self(idx_cond, cache=cache)
+        pos = idx_cond.shape[1]
+        for step in range(max_new_tokens):
+            idx_next = self._sample(logits, temperature, done, pad_id)
             idx = torch.cat((idx, idx_next), dim=1)
+            if stops and self._update_done(done, idx, start, stops).all():
+                break
+            if step == max_new_tokens - 1:
+                break
+            if pos >= block_size:
+                idx_cond = idx[:, -(block_size - window_stride):]
+                cache = self.new_cache()
+                logits, _ = self(idx_cond, cache=cache)
+                pos = idx_cond.shape[1]
+            else:
+                logits, _ = self(idx_next, cache=cache, pos_offset=pos)
+                pos += 1
         return idx
 
+    @staticmethod
+    def _sample(logits, temperature, done, pad_id):
+        logits = logits[:, -1, :] / temperature
+        probs = F.softmax(logits, dim=-1)
+        idx_next = torch.multinomial(probs, num_samples=1)
+        return idx_next.masked_fill(done.unsqueeze(1), pad_id)
+
+    @staticmethod
+    def _update_done(done, idx, start, stops):
+        # Marks rows whose generated tokens now end with a stop sequence (in place).
+        # Most steps end on no stop sequence's last token, so test that first.
+        last = idx[:, -1].tolist()
+        generated = idx.shape[1] - start
+        for stop in stops:
+            if generated >= len(stop) and stop[-1].item() in last:
+                done |= (idx[:, -len(stop):] == stop).all(dim=1)
+        return done
+
+def quantize_int8(model):
+    # Same transform as aura-ml/model.py; the int8 artifact only loads into this structure
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+class ExportedAuraLLM(nn.Module):
+    # AuraLLM interface over the exported step program (see aura-ml/model.py AuraStep)
+    def __init__(self, path):
+        super().__init__()
+        self.step = torch.export.load(path).module()
+
+    new_cache = AuraLLM.new_cache
+    generate = AuraLLM.generate
+    _sample = staticmethod(AuraLLM._sample)
+    _update_done = staticmethod(AuraLLM._update_done)
+
+    @property
+    def blocks(self):
+        return range(n_layer)
+
+    def train(self, mode=True):
+        # The exported graph is fixed in inference mode (dropout off)
+        return self
+
+    def forward(self, idx, targets=None, cache=None, pos_offset=0, attn_mask=None):
+        B, T = idx.shape
+        if cache is None:
+            cache = self.new_cache()
+        if cache[0][0] is None:
+            empty = torch.zeros(n_layer, B, n_head, 0, n_embd // n_head, device=idx.device)
+            keys, values = empty, empty
+        else:
+            keys = torch.stack([c[0] for c in cache])
+            values = torch.stack([c[1] for c in cache])
+        Tk = keys.shape[3]
+        if attn_mask is None:
+            attn_mask = torch.ones(T, Tk + T, dtype=torch.bool, device=idx.device).tril(Tk).expand(B, 1, T, Tk + T)
+        pos = torch.as_tensor(pos_offset, device=idx.device).reshape(-1, 1).expand(B, 1)
+        logits, keys, values = self.step(idx, keys, values, pos, attn_mask)
+        for layer, c in enumerate(cache):
+            c[0], c[1] = keys[layer], values[layer]
+        return logits, None
+
+def load_model(model_path, vocab_size):
+    base = os.path.splitext(model_path)[0]
+    if MODEL_BACKEND == "exported":
+        if os.path.exists(base + ".pt2"):
+            return ExportedAuraLLM(base + ".pt2")
+        print(f"[Mini-Aura] WARNING: {base}.pt2 missing (run aura-ml/export_model.py), using fp32")
+
+    if MODEL_BACKEND == "int8":
+        model = AuraLLM(vocab_size)
+        if os.path.exists(base + ".int8.pth"):
+            model = quantize_int8(model.eval())
+            # Packed int8 weights are pickled objects, hence weights_only=False;
+            # the file is our own build output, never user input
+            model.load_state_dict(torch.load(base + ".int8.pth", map_location='cpu', mmap=True, weights_only=False))
+            return model.eval()
+        print(f"[Mini-Aura] WARNING: {base}.int8.pth missing, quantizing the fp32 weights at load")
+        model.load_state_dict(torch.load(model_path, map_location='cpu', mmap=True))
+        return quantize_int8(model.eval())
+
+    # The weights are memory-mapped rather than read up front, and assign=True makes
+    # them the parameters directly, so the model is built on the meta device with
+    # no throwaway random initialization
+    with torch.device('meta'):
+        model = AuraLLM(vocab_size)
+    model.load_state_dict(torch.load(model_path, map_location='cpu', mmap=True, weights_only=True), assign=True)
+    model.to(device)
+    return model.eval()
+
+# Model files; the defaults point at aura-ml/ in this repository
+_ML_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'aura-ml'))
+MODEL_PATH = os.getenv("AURA_MODEL_PATH", os.path.join(_ML_DIR, 'aura_mental_health_model.pth'))
+# Written by aura-ml/train.py next to the weights
+TOKENIZER_PATH = os.getenv("AURA_TOKENIZER_PATH", os.path.join(os.path.dirname(MODEL_PATH), 'aura_tokenizer.json'))
+DATASET_PATH = os.getenv("AURA_DATASET_PATH", os.path.join(os.path.dirname(MODEL_PATH), 'dataset.txt'))
+
 # Singleton instance
 _model = None
 _tokenizer = None
+_scheduler = None
+_executor = None
+# Background loading: idle -> loading -> ready | failed
+_state = "idle"
+_load_future = None
+_load_seconds = None
+
+def _init_worker():
+    torch.set_num_threads(TORCH_THREADS)
+
+def get_executor():
+    # One dedicated thread owns all model work (loading, prefill, decode steps), so
+    # inference never runs on the event loop or competes for the shared thread pool
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="aura-infer", initializer=_init_worker)
+    return _executor
+
+def get_scheduler():
+    # Concurrent requests share decode steps instead of each running generate() alone
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = InferenceScheduler(_model, block_size, executor=get_executor())
+    return _scheduler
+
+def start_loading():
+    # Loads the model on the inference thread without blocking the caller.
+    # Safe to call repeatedly: only the first call starts a load.
+    global _load_future
+    if _load_future is None:
+        _load_future = asyncio.get_running_loop().run_in_executor(get_executor(), init_model)
+    return _load_future
+
+def status():
+    return {
+        "state": _state,
+        "backend": MODEL_BACKEND,
+        "device": device,
+        "load_seconds": round(_load_seconds, 3) if _load_seconds is not None else None,
+        "sessions": get_store().stats(),
+    }
 
 def init_model():
-    global _model, _tokenizer
+    global _model, _tokenizer, _state, _load_seconds
     if _model is not None:
         return
 
-    model_path = 'c:/Users/Beulah/MENTAL HEALTH/aura-ml/aura_mental_health_model.pth'
-    data_path = 'c:/Users/Beulah/MENTAL HEALTH/aura-ml/dataset.txt'
+    _state = "loading"
+    started = time.perf_counter()
+    model_path, tokenizer_path, data_path = MODEL_PATH, TOKENIZER_PATH, DATASET_PATH
 
-    print(f"[Mini-Aura] Initializing from: {model_path}")
+    print(f"[Mini-Aura] Initializing from: {model_path} (device: {device})")
 
     if not os.path.exists(model_path):
         print(f"[Mini-Aura] ERROR: Model file not found at {model_path}")
-        return
-    if not os.path.exists(data_path):
-        print(f"[Mini-Aura] ERROR: Tokenizer data not found at {data_path}")
+        _state = "failed"
         return
 
     try:
-        with open(data_path, 'r', encoding='utf-8') as f:
-            text = f.read()
-
-        chars = sorted(list(set(text)))
-        vocab_size = len(chars)
-        
-        _tokenizer = {
-            'stoi': { ch:i for i,ch in enumerate(chars) },
-            'itos': { i:ch for i,ch in enumerate(chars) },
-            'encode': lambda s: [ { ch:i for i,ch in enumerate(chars) }.get(c, 0) for c in s],
-            'decode': lambda l: ''.join([{ i:ch for i,ch in enumerate(chars) }[i] for i in l])
-        }
+        if os.path.exists(tokenizer_path):
+            _tokenizer = CharTokenizer.load(tokenizer_path)
+        elif os.path.exists(data_path):
+            # Older checkpoints shipped without a tokenizer file
+            print(f"[Mini-Aura] WARNING: {tokenizer_path} missing, rebuilding vocabulary from {data_path}")
+            with open(data_path, 'r', encoding='utf-8') as f:
+                _tokenizer = CharTokenizer.from_text(f.read())
+        else:
+            print(f"[Mini-Aura] ERROR: Tokenizer not found at {tokenizer_path}")
+            _state = "failed"
+            return
 
+        vocab_size = _tokenizer.vocab_size
         print(f"[Mini-Aura] Vocab size: {vocab_size}")
 
-        _model = AuraLLM(vocab_size)
-        state_dict = torch.load(model_path, map_location=device)
-        _model.load_state_dict(state_dict)
-        _model.to(device)
-        _model.eval()
-        print("[Mini-Aura] Model successfully loaded.")
+        _model = load_model(model_path, vocab_size)
+        _load_seconds = time.perf_counter() - started
+        _state = "ready"
+        print(f"[Mini-Aura] Model successfully loaded ({MODEL_BACKEND}, {_load_seconds:.2f}s).")
     except Exception as e:
         print(f"[Mini-Aura] CRITICAL ERROR during initialization: {e}")
         _model = None
+        _state = "failed"
 
-# Simple session-based memory
-_sessions = {}
+STOP_DELIMITERS = ["User:", "\n\n", "Aura:"]
 
-async def generate_response(prompt: str, session_id: str = "default"):
-    global _model, _tokenizer, _sessions
-    
-    if _model is None:
-        init_model()
-    
-    if _model is None:
-        return "I'm having a little trouble connecting to my local brain. Please ensure the model file is ready. 🌿"
-
-    # Maintain a small local history
-    if session_id not in _sessions:
-        _sessions[session_id] = []
-    
-    _sessions[session_id].append(f"User: {prompt}")
+async def _prepare(prompt: str, session_id: str):
+    # Maintain a small local history (bounded, see session_store.py). Nothing is
+    # stored until the reply exists, so rejected turns leave no trace.
+    # The sqlite store can wait up to 5 s on a locked file, so store calls run on
+    # the thread pool: not on the event loop, and not on the busy inference thread.
+    history = await run_in_threadpool(get_store().get, session_id)
+    history.append(f"User: {prompt}")
     
     # We take the last 2 exchanges for context
-    context_window = "\n".join(_sessions[session_id][-4:])
+    context_window = "\n".join(history[-4:])
     input_text = f"{context_window}\nAura: "
     
+    # Ensure we don't exceed block_size
+    encoded = _tokenizer.encode_array(input_text)[-block_size:]
+    return torch.from_numpy(encoded).to(device), history
+
+def _stop_ids():
+    # Generation halts at the first delimiter instead of always running 200 tokens
+    return [_tokenizer.encode(d) for d in STOP_DELIMITERS]
+
+async def _remember(session_id: str, history: list, response: str):
+    history.append(f"Aura: {response}")
+    
+    # Keep history manageable
+    await run_in_threadpool(get_store().put, session_id, history[-10:])
+
+def _ready():
+    # Never waits for the model: the first caller starts the background load
+    if _model is None:
+        start_loading()
+    return _model is not None
+
+def _not_ready_reply():
+    return UNAVAILABLE_REPLY if _state == "failed" else NOT_READY_REPLY
+
+async def generate_response(prompt: str, session_id: str = "default"):
+    if not _ready():
+        return _not_ready_reply()
+
     try:
-        encoded = _tokenizer['encode'](input_text)
-        # Ensure we don't exceed block_size
-        if len(encoded) > block_size:
-            encoded = encoded[-block_size:]
-            
-        idx = torch.tensor([encoded], dtype=torch.long, device=device)
-        
-        with torch.no_grad():
-            generated_idx = _model.generate(idx, max_new_tokens=200, temperature=0.7) # Slightly more focused
+        idx, history = await _prepare(prompt, session_id)
+        generated = await get_scheduler().submit(idx, max_new_tokens=200, temperature=0.7, # Slightly more focused
+                                                 stop_sequences=_stop_ids())
         
-        full_text = _tokenizer['decode'](generated_idx[0].tolist())
-        
-        # Extract the NEW response part only
-        new_part = full_text[len(input_text):].strip()
+        # Decode the NEW tokens only (the prompt may have been cropped to block_size)
+        new_part = _tokenizer.decode(generated).strip()
         
         # Stop at common delimiters
-        for delimiter in ["User:", "\n\n", "Aura:"]:
+        for delimiter in STOP_DELIMITERS:
             if delimiter in new_part:
                 new_part = new_part.split(delimiter)[0].strip()
         
@@ -198,16 +423,68 @@ async def generate_response(prompt: str, session_id: str = "default"):
         if not response:
             response = "I hear you. Tell me more."
             
-        _sessions[session_id].append(f"Aura: {response}")
-        
-        # Keep history manageable
-        if len(_sessions[session_id]) > 10:
-            _sessions[session_id] = _sessions[session_id][-10:]
-            
+        await _remember(session_id, history, response)
         return response
+    except (InferenceOverloaded, InferenceTimeout):
+        # Not answered: let the route report it
+        raise
     except Exception as e:
         print(f"[Mini-Aura] Generation Error: {e}")
         return "My thoughts are a bit tangled right now. Could you tell me more about that?"
 
-# Pre-warm the model
-init_model()
+async def stream_response(prompt: str, session_id: str = "default"):
+    # Streaming variant of generate_response. Returns an async iterator of
+    # ("token", text) events followed by ("done", {"reply": ...}). Overload is
+    # raised here, before anything has been sent to the client.
+    if not _ready():
+        return single_reply(_not_ready_reply())
+
+    idx, history = await _prepare(prompt, session_id)
+    tokens = get_scheduler().stream(idx, max_new_tokens=200, temperature=0.7, stop_sequences=_stop_ids())
+    return _stream_reply(tokens, session_id, history)
+
+def _safe_end(reply: str):
+    # Text past this point may still turn into a delimiter or be trailing whitespace
+    end = len(reply.rstrip())
+    for delimiter in STOP_DELIMITERS:
+        for k in range(len(delimiter) - 1, 0, -1):
+            if reply.endswith(delimiter[:k]):
+                end = min(end, len(reply) - k)
+                break
+    return end
+
+async def _stream_reply(tokens, session_id: str, history: list):
+    text, sent = "", 0
+    try:
+        async for ids in tokens:
+            text += _tokenizer.decode(ids)
+            reply = text.lstrip()
+            cuts = [reply.find(d) for d in STOP_DELIMITERS if d in reply]
+            if cuts:
+                # Delimiter reached: closing the stream stops generation right here
+                reply = reply[:min(cuts)].rstrip()
+                if len(reply) > sent:
+                    yield "token", reply[sent:]
+                    sent = len(reply)
+                break
+            end = _safe_end(reply)
+            if end > sent:
+                yield "token", reply[sent:end]
+                sent = end
+        else:
+            reply = text.strip()
+            if len(reply) > sent:
+                yield "token", reply[sent:]
+                sent = len(reply)
+    except Exception as e:
+        print(f"[Mini-Aura] Generation Error: {e}")
+        reply = text.strip()[:sent] or "My thoughts are a bit tangled right now. Could you tell me more about that?"
+    finally:
+        await tokens.aclose()
+
+    if not reply:
+        reply = "I hear you. Tell me more."
+    if not sent:
+        yield "token", reply
+    await _remember(session_id, history, reply)
+    yield "done", {"reply": reply}
@@ -0,0 +1,61 @@
+import asyncio
+import importlib
+from starlette.concurrency import run_in_threadpool
+
+# Torch-free front door to Mini-Aura. Importing local_llm_service pulls in torch,
+# which alone takes seconds, so the import and the model load both happen in the
+# background. Until they finish, callers get None and answer with a fallback.
+
+LOCAL_LLM_MODULE = f"{__package__}.local_llm_service"
+
+NOT_READY_REPLY = "Mini-Aura is still waking up. Give me a few seconds, or switch to Gemini for now. 🌿"
+UNAVAILABLE_REPLY = "I'm having a little trouble connecting to my local brain. Please ensure the model file is ready. 🌿"
+
+_service = None
+_task = None
+_import_error = None
+
+
+def start():
+    # Idempotent: only the first call starts the import and load
+    global _task
+    if _task is None:
+        _task = asyncio.get_running_loop().create_task(_load())
+    return _task
+
+
+async def _load():
+    global _service, _import_error
+    try:
+        module = await run_in_threadpool(importlib.import_module, LOCAL_LLM_MODULE)
+    except ImportError as e:
+        print(f"[Mini-Aura] Local model unavailable: {e}")
+        _import_error = str(e)
+        return
+    _service = module
+    await module.start_loading()
+
+
+def get_service():
+    # The local_llm_service module once imported, otherwise None (and the import is started)
+    if _service is None:
+        start()
+    return _service
+
+
+def status():
+    if _service is not None:
+        return _service.status()
+    if _import_error is not None:
+        return {"state": "unavailable", "error": _import_error}
+    return {"state": "loading" if _task is not None else "idle"}
+
+
+def fallback_reply():
+    return UNAVAILABLE_REPLY if status()["state"] in ("failed", "unavailable") else NOT_READY_REPLY
+
+
+async def single_reply(text: str):
+    # A whole reply as stream events: one token, then done
+    yield "token", text
+    yield "done", {"reply": text}
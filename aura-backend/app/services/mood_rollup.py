@@ -0,0 +1,141 @@
+import json
+import datetime
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from ..database import AsyncSessionLocal
+from .. import models
+
+# Materialized daily mood totals (models.DailyMoodRollup). Every analyzed journal
+# entry and chat message is added to its user's row for that UTC day, in the
+# same transaction as the write, so trends over weeks or months read a few
+# rows per user instead of every entry. Journal entries count once their
+# analysis is final (analysis_queue._finish), chats when they are saved.
+# rebuild() recomputes the rows from journal_entries if they ever drift.
+
+MAX_DAYS = 730
+
+
+async def record(db, entry: models.JournalEntry):
+    # Adds one entry to its day's row. Runs inside the caller's transaction and
+    # takes the row for update first, so concurrent writers never lose a count.
+    if entry.user_id is None:
+        return
+    day = (entry.created_at or datetime.datetime.utcnow()).date()
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    # Insert-if-missing also takes SQLite's write lock before the row is read
+    await db.execute(insert(models.DailyMoodRollup).values(
+        user_id=entry.user_id, day=day, entry_count=0, stress_count=0, stress_sum=0.0,
+        sentiment_sum=0.0, emotion_counts="{}"
+    ).on_conflict_do_nothing(index_elements=["user_id", "day"]))
+    row = await db.scalar(select(models.DailyMoodRollup).filter(
+        models.DailyMoodRollup.user_id == entry.user_id, models.DailyMoodRollup.day == day
+    ).with_for_update())
+    stress = entry.stress_score
+    _merge(row, 1, 0 if stress is None else 1, stress or 0.0, stress, stress,
+           entry.sentiment_score or 0.0, {entry.emotion_label: 1} if entry.emotion_label else {})
+
+
+def _merge(row, n, stress_n, stress_sum, stress_min, stress_max, sentiment_sum, emotions: dict):
+    # Adds totals (one entry, a group of entries or another row) to a rollup row
+    row.entry_count += n
+    row.stress_count += stress_n
+    row.stress_sum += stress_sum
+    row.sentiment_sum += sentiment_sum
+    if stress_min is not None:
+        row.stress_min = stress_min if row.stress_min is None else min(row.stress_min, stress_min)
+        row.stress_max = stress_max if row.stress_max is None else max(row.stress_max, stress_max)
+    if emotions:
+        histogram = json.loads(row.emotion_counts or "{}")
+        for emotion, count in emotions.items():
+            histogram[emotion] = histogram.get(emotion, 0) + count
+        row.emotion_counts = json.dumps(histogram, sort_keys=True)
+
+
+async def rebuild(user_id: str = None):
+    # Recomputes the rollups of one user or of everyone from journal_entries, in
+    # one transaction. Entries finishing analysis while it runs may be counted
+    # twice or not at all, so run it when writes are quiet. Returns the row count.
+    entry = models.JournalEntry
+    day = func.date(entry.created_at)
+    query = select(
+        entry.user_id, day, entry.emotion_label, func.count(), func.count(entry.stress_score),
+        func.sum(entry.stress_score), func.min(entry.stress_score), func.max(entry.stress_score),
+        func.sum(entry.sentiment_score)
+    ).filter(
+        entry.analysis_status != "pending", entry.user_id.isnot(None), entry.created_at.isnot(None)
+    ).group_by(entry.user_id, day, entry.emotion_label)
+    scope = delete(models.DailyMoodRollup)
+    if user_id is not None:
+        query = query.filter(entry.user_id == user_id)
+        scope = scope.filter(models.DailyMoodRollup.user_id == user_id)
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(scope)
+        rows = {}
+        for uid, day_value, emotion, n, stress_n, stress_sum, stress_min, stress_max, sentiment_sum in await db.execute(query):
+            if isinstance(day_value, str):
+                # SQLite's date() returns text
+                day_value = datetime.date.fromisoformat(day_value)
+            row = rows.get((uid, day_value))
+            if row is None:
+                row = rows[(uid, day_value)] = models.DailyMoodRollup(
+                    user_id=uid, day=day_value, entry_count=0, stress_count=0, stress_sum=0.0,
+                    sentiment_sum=0.0, emotion_counts="{}"
+                )
+            _merge(row, n, stress_n, stress_sum or 0.0, stress_min, stress_max, sentiment_sum or 0.0,
+                   {emotion: n} if emotion else {})
+        db.add_all(rows.values())
+        await db.commit()
+    return len(rows)
+
+
+def _bucket(day: datetime.date, granularity: str):
+    if granularity == "week":
+        return day - datetime.timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _label(start: datetime.date, granularity: str, days: int):
+    if granularity == "month":
+        return start.strftime("%b %Y")
+    if granularity == "week" or days > 7:
+        return start.strftime("%b %d")
+    return start.strftime("%a")
+
+
+async def trends(db, user_id: str, days: int, granularity: str):
+    # Points for the last `days` UTC days (today included), one per day, week
+    # (starting Monday) or month that has entries: an indexed range scan of at most `days` rows
+    since = datetime.datetime.utcnow().date() - datetime.timedelta(days=days - 1)
+    rollup = models.DailyMoodRollup
+    rows = await db.execute(select(
+        rollup.day, rollup.entry_count, rollup.stress_count, rollup.stress_sum, rollup.stress_min,
+        rollup.stress_max, rollup.sentiment_sum, rollup.emotion_counts
+    ).filter(rollup.user_id == user_id, rollup.day >= since).order_by(rollup.day))
+
+    points = {}
+    for day, n, stress_n, stress_sum, stress_min, stress_max, sentiment_sum, emotion_counts in rows:
+        start = _bucket(day, granularity)
+        point = points.get(start)
+        if point is None:
+            point = points[start] = {"name": _label(start, granularity, days), "date": start.isoformat(),
+                                     "count": 0, "stress_count": 0, "stress_sum": 0.0, "stress_min": None,
+                                     "stress_max": None, "sentiment_sum": 0.0, "emotions": {}}
+        point["count"] += n
+        point["stress_count"] += stress_n
+        point["stress_sum"] += stress_sum
+        point["sentiment_sum"] += sentiment_sum
+        if stress_min is not None:
+            point["stress_min"] = stress_min if point["stress_min"] is None else min(point["stress_min"], stress_min)
+            point["stress_max"] = stress_max if point["stress_max"] is None else max(point["stress_max"], stress_max)
+        emotions = point["emotions"]
+        for emotion, count in json.loads(emotion_counts or "{}").items():
+            emotions[emotion] = emotions.get(emotion, 0) + count
+
+    for point in points.values():
+        stress_n, stress_sum = point.pop("stress_count"), point.pop("stress_sum")
+        point["stress"] = round(stress_sum / stress_n, 1) if stress_n else None
+        point["sentiment"] = round(point.pop("sentiment_sum") / point["count"], 2) if point["count"] else 0.0
+    return list(points.values())
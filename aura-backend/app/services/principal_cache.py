@@ -0,0 +1,88 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from sqlalchemy import event
+from .. import models
+
+# Bounded TTL/LRU cache of user ids whose existence was recently confirmed in
+# the users table. A valid JWT for a cached id skips the per-request lookup.
+
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "300"))
+
+
+class Principal:
+    # Lightweight stand-in for models.User when a handler only needs the id
+    __slots__ = ("id",)
+
+    def __init__(self, id: str):
+        self.id = id
+
+    def __repr__(self):
+        return f"Principal(id={self.id!r})"
+
+
+class PrincipalCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str):
+        with self._lock:
+            expires = self._entries.get(user_id)
+            if expires is None or expires < time.monotonic():
+                if expires is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return Principal(user_id)
+
+    def put(self, user_id: str):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = time.monotonic() + self.ttl
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+_cache = PrincipalCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
+
+
+def get_cache() -> PrincipalCache:
+    return _cache
+
+
+def invalidate_user(user_id: str):
+    _cache.invalidate(user_id)
+
+
+@event.listens_for(models.User, "after_delete")
+def _user_deleted(mapper, connection, target):
+    # Deleted users must stop authenticating immediately, not after the TTL
+    invalidate_user(target.id)
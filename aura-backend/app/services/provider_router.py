@@ -0,0 +1,251 @@
+import os
+import time
+import asyncio
+from collections import deque
+from . import gemini_service, groq_service
+from .keyword_matcher import scan_keywords
+
+# Routes /chat/message between Gemini and Groq instead of trusting model_type
+# blindly. Each provider gets a rolling window of latencies and outcomes and a
+# circuit breaker: after BREAKER_FAILURES consecutive failures it is skipped for
+# BREAKER_COOLDOWN seconds, then one probe request decides whether it is back.
+# A failed or skipped provider fails over to the other one. With hedging on, a
+# request still unanswered after the provider's p95 latency is also sent to the
+# other provider and the first good answer wins.
+
+PROVIDER_TIMEOUT = float(os.getenv("AURA_PROVIDER_TIMEOUT", "30"))
+FAILOVER_ENABLED = os.getenv("AURA_PROVIDER_FAILOVER", "true").lower() in ("1", "true", "yes")
+HEDGE_ENABLED = os.getenv("AURA_PROVIDER_HEDGE", "false").lower() in ("1", "true", "yes")
+# Until a provider has HEDGE_MIN_SAMPLES latencies, hedge after HEDGE_DEFAULT_DELAY
+HEDGE_MIN_SAMPLES = int(os.getenv("AURA_HEDGE_MIN_SAMPLES", "20"))
+HEDGE_DEFAULT_DELAY = float(os.getenv("AURA_HEDGE_DEFAULT_DELAY", "3.0"))
+HEDGE_MIN_DELAY = float(os.getenv("AURA_HEDGE_MIN_DELAY", "0.05"))
+BREAKER_FAILURES = int(os.getenv("AURA_BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN = float(os.getenv("AURA_BREAKER_COOLDOWN", "30"))
+WINDOW = int(os.getenv("AURA_ROUTER_WINDOW", "200"))
+
+
+class ProviderState:
+    def __init__(self, name: str, fetch, stream, configured, unconfigured_reply, error_reply):
+        self.name = name
+        self.fetch = fetch                          # async (message, keyword_score, crisis_flag) -> data, raises
+        self.stream = stream                        # (message) -> async iterator of token/done/error events
+        self.configured = configured                # () -> bool
+        self.unconfigured_reply = unconfigured_reply  # async (message) -> data
+        self.error_reply = error_reply              # (message, keyword_score, crisis_flag) -> data
+        self.latencies = deque(maxlen=WINDOW)
+        self.outcomes = deque(maxlen=WINDOW)        # True for success
+        self.failures = 0                           # consecutive
+        self.opened_at = None                       # breaker open since (monotonic)
+        self.probing = False
+        self.counts = {"requests": 0, "errors": 0, "timeouts": 0, "hedges": 0, "wins": 0, "skipped_open": 0}
+
+    def percentile(self, q: float):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def breaker(self):
+        if self.opened_at is None:
+            return "closed"
+        if self.probing or time.monotonic() - self.opened_at < BREAKER_COOLDOWN:
+            return "open"
+        return "half_open"
+
+    def allow(self):
+        state = self.breaker()
+        if state == "half_open":
+            # Let exactly one request through to probe the provider
+            self.probing = True
+            return True
+        return state == "closed"
+
+    def hedge_delay(self):
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return max(HEDGE_MIN_DELAY, self.percentile(0.95))
+
+    def record(self, seconds: float, ok: bool):
+        self.latencies.append(seconds)
+        self.outcomes.append(ok)
+        self.probing = False
+        if ok:
+            self.failures = 0
+            self.opened_at = None
+            return
+        self.counts["errors"] += 1
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= BREAKER_FAILURES:
+            if self.opened_at is None:
+                print(f"[Router] {self.name} failed {self.failures} times in a row, skipping it for {BREAKER_COOLDOWN:.0f}s")
+            self.opened_at = time.monotonic()
+
+    def stats(self):
+        p50, p95, p99 = (self.percentile(q) for q in (0.5, 0.95, 0.99))
+        return {
+            "breaker": self.breaker(),
+            "configured": self.configured(),
+            "p50_ms": round(p50 * 1000) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000) if p95 is not None else None,
+            "p99_ms": round(p99 * 1000) if p99 is not None else None,
+            "error_rate": round(1 - sum(self.outcomes) / len(self.outcomes), 3) if self.outcomes else 0.0,
+            **self.counts,
+        }
+
+
+PROVIDERS = {
+    "gemini": ProviderState("gemini", gemini_service.fetch_gemini_reply, gemini_service.stream_gemini_response,
+                            gemini_service.is_configured, gemini_service.get_gemini_response,
+                            gemini_service.error_reply),
+    "groq": ProviderState("groq", groq_service.fetch_groq_reply, groq_service.stream_groq_response,
+                          groq_service.is_configured, groq_service.get_groq_response, groq_service.error_reply),
+}
+
+
+def candidates(preferred: str):
+    # Configured providers in failover order, preferred first
+    order = [preferred] + [name for name in PROVIDERS if name != preferred]
+    if not FAILOVER_ENABLED:
+        order = order[:1]
+    return [PROVIDERS[name] for name in order if PROVIDERS[name].configured()]
+
+
+def configured_providers():
+    return [name for name, provider in PROVIDERS.items() if provider.configured()]
+
+
+def pick(preferred: str) -> str:
+    # For streaming: the provider to stream from, without failover mid-stream
+    for name in [preferred] + [name for name in PROVIDERS if name != preferred]:
+        provider = PROVIDERS[name]
+        if provider.configured() and provider.breaker() != "open":
+            return name
+    return preferred
+
+
+async def _attempt(provider: ProviderState, message: str, keyword_score: int, crisis_flag: bool):
+    provider.counts["requests"] += 1
+    started = time.perf_counter()
+    try:
+        data = await asyncio.wait_for(provider.fetch(message, keyword_score, crisis_flag), PROVIDER_TIMEOUT)
+    except asyncio.CancelledError:
+        # Lost a hedge race: still a lower bound on how long this provider takes
+        provider.latencies.append(time.perf_counter() - started)
+        provider.probing = False
+        raise
+    except asyncio.TimeoutError:
+        provider.counts["timeouts"] += 1
+        provider.record(time.perf_counter() - started, ok=False)
+        raise
+    except Exception:
+        provider.record(time.perf_counter() - started, ok=False)
+        raise
+    provider.record(time.perf_counter() - started, ok=True)
+    return data
+
+
+async def route(preferred: str, message: str):
+    # (provider name, {"reply", "analysis"}); the name is None when every provider
+    # is unconfigured, open or failed and the reply is the preferred one's fallback,
+    # analyzed offline by local_analyzer
+    keyword_score, _ = scan_keywords(message)
+    crisis_flag = keyword_score == 10
+    queue = candidates(preferred)
+    running = {}  # task -> provider
+
+    def launch():
+        # Breakers are asked only when a provider is actually needed, so a
+        # half-open probe is never claimed by a request that does not use it
+        while queue:
+            provider = queue.pop(0)
+            if provider.allow():
+                running[asyncio.ensure_future(_attempt(provider, message, keyword_score, crisis_flag))] = provider
+                return provider
+            provider.counts["skipped_open"] += 1
+        return None
+
+    try:
+        primary = launch()
+        if primary:
+            deadline = primary.hedge_delay() if HEDGE_ENABLED else None
+            while running:
+                done, _ = await asyncio.wait(running, timeout=deadline, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Past the primary's p95 with no answer: ask the next provider too
+                    deadline = None
+                    if launch():
+                        primary.counts["hedges"] += 1
+                    continue
+                for task in done:
+                    provider = running.pop(task)
+                    if task.exception() is None:
+                        provider.counts["wins"] += 1
+                        return provider.name, task.result()
+                    print(f"[Router] {provider.name} failed: {task.exception()!r}")
+                # Failover: nothing left in flight, try the next provider
+                if not running:
+                    launch()
+    finally:
+        for task in running:
+            task.cancel()
+
+    fallback = PROVIDERS[preferred]
+    if not fallback.configured():
+        return None, await fallback.unconfigured_reply(message)
+    return None, fallback.error_reply(message, keyword_score, crisis_flag)
+
+
+async def stream(preferred: str, message: str):
+    # For /chat/stream: ("token", text) events, then ("done", data). A stream
+    # cannot switch providers halfway, so only the starting choice is routed, but
+    # its latency and outcome feed the same breaker and stats as route(). When the
+    # provider fails before any token was sent, its fallback reply is streamed as
+    # usual; after that, ("error", data) replaces "done" so the client is not
+    # handed a reply that contradicts the tokens it already has. An open breaker
+    # gets the fallback reply without the upstream stream being opened.
+    provider = PROVIDERS[pick(preferred)]
+    if not provider.configured():
+        async for event in provider.stream(message):
+            yield event
+        return
+
+    if not provider.allow():
+        # pick() falls back to the preferred provider when every breaker is open
+        provider.counts["skipped_open"] += 1
+        keyword_score, _ = scan_keywords(message)
+        data = provider.error_reply(message, keyword_score, keyword_score == 10)
+        yield "token", data["reply"]
+        yield "done", data
+        return
+
+    provider.counts["requests"] += 1
+    started = time.perf_counter()
+    ok, sent = None, False
+    try:
+        async for kind, payload in provider.stream(message):
+            if kind == "error":
+                ok = False
+                print(f"[Router] {provider.name} stream failed")
+                if not sent:
+                    yield "token", payload["reply"]
+                    kind = "done"
+            elif kind == "done":
+                ok = True
+            sent = sent or kind == "token"
+            yield kind, payload
+    finally:
+        if ok is None:
+            # Client went away before the stream ended: only a lower bound on latency
+            provider.latencies.append(time.perf_counter() - started)
+            provider.probing = False
+        else:
+            provider.record(time.perf_counter() - started, ok=ok)
+
+
+def stats():
+    return {
+        "failover": FAILOVER_ENABLED,
+        "hedge": HEDGE_ENABLED,
+        "providers": {name: provider.stats() for name, provider in PROVIDERS.items()},
+    }
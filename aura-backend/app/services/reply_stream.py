@@ -0,0 +1,89 @@
+import json
+import re
+
+# Streaming helpers shared by the providers. Gemini and Groq answer with one JSON
+# document ({"reply": ..., "analysis": {...}}); the reply is the part the user
+# reads, so it is pulled out of the document while the document is still arriving.
+
+_REPLY_KEY = re.compile(r'"reply"\s*:\s*"')
+# Longest tail of unmatched input that could still grow into the key
+_KEY_TAIL = 32
+
+
+def _unescape(raw: str) -> str:
+    try:
+        return json.loads(f'"{raw}"')
+    except ValueError:
+        return raw
+
+
+class ReplyFieldParser:
+    # Incrementally extracts the top-level "reply" string from streamed JSON
+    def __init__(self):
+        self._buffer = ""
+        self._state = "seek"  # seek -> value -> done
+        self.reply = ""
+
+    @property
+    def done(self):
+        return self._state == "done"
+
+    def feed(self, chunk: str) -> str:
+        # Returns the newly decoded reply text contained in this chunk
+        if self._state == "done":
+            return ""
+        self._buffer += chunk
+
+        if self._state == "seek":
+            match = _REPLY_KEY.search(self._buffer)
+            if match is None:
+                self._buffer = self._buffer[-_KEY_TAIL:]
+                return ""
+            self._buffer = self._buffer[match.end():]
+            self._state = "value"
+
+        # Decode up to the closing quote, holding back an escape sequence that is
+        # split across chunks (including both halves of a \uXXXX surrogate pair)
+        buf = self._buffer
+        i = safe = 0
+        end = None
+        while i < len(buf):
+            c = buf[i]
+            if c == '"':
+                end = i
+                break
+            if c == "\\":
+                step = 2
+                if buf[i + 1:i + 2] == "u":
+                    step = 12 if buf[i + 2:i + 4].lower() in ("d8", "d9", "da", "db") else 6
+                if i + step > len(buf):
+                    break
+                i += step
+            else:
+                i += 1
+            safe = i
+
+        if end is not None:
+            raw, self._buffer, self._state = buf[:end], "", "done"
+        else:
+            raw, self._buffer = buf[:safe], buf[safe:]
+        text = _unescape(raw)
+        self.reply += text
+        return text
+
+
+async def stream_json_reply(chunks, finalize):
+    # chunks: async iterator of raw model text. finalize(full_text) -> result dict.
+    # Yields ("token", text) while the reply streams, then ("done", result).
+    parser = ReplyFieldParser()
+    parts = []
+    async for chunk in chunks:
+        parts.append(chunk)
+        text = parser.feed(chunk)
+        if text:
+            yield "token", text
+    data = finalize("".join(parts))
+    if not parser.reply and data.get("reply"):
+        # No JSON reply field to stream (plain-text answer): send it whole
+        yield "token", data["reply"]
+    yield "done", data
@@ -0,0 +1,98 @@
+import os
+import re
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from . import encryption
+
+# Opt-in cache of Gemini / Groq replies to short repeated messages ("hi", "I'm fine",
+# "thank you"). Keys are a hash of provider + normalized message, so no message
+# text is held; cached replies are encrypted at rest like journal entries. Crisis
+# messages are never served from or written to the cache.
+
+RESPONSE_CACHE_ENABLED = os.getenv("AURA_RESPONSE_CACHE", "false").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_TTL = float(os.getenv("AURA_RESPONSE_CACHE_TTL", "600"))
+RESPONSE_CACHE_MAX = int(os.getenv("AURA_RESPONSE_CACHE_MAX", "1000"))
+# Only short messages repeat often enough to be worth caching
+RESPONSE_CACHE_MAX_CHARS = int(os.getenv("AURA_RESPONSE_CACHE_MAX_CHARS", "40"))
+
+_PUNCTUATION = re.compile(r"[^\w\s']+")
+_SPACES = re.compile(r"\s+")
+
+_entries = OrderedDict()  # key -> (token, expires_at, provider seconds)
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "skipped_crisis": 0, "saved_seconds": 0.0}
+
+
+def normalize(message: str) -> str:
+    # "Hi!!", "hi" and "  HI " share an entry
+    text = _PUNCTUATION.sub(" ", message.lower().replace("’", "'"))
+    return _SPACES.sub(" ", text).strip()
+
+
+def _key(provider: str, message: str):
+    text = normalize(message)
+    if not RESPONSE_CACHE_ENABLED or not text or len(text) > RESPONSE_CACHE_MAX_CHARS:
+        return None
+    return hashlib.sha256(f"{provider}\0{text}".encode("utf-8")).hexdigest()
+
+
+def get(provider: str, message: str, crisis_flag: bool):
+    # Cached {"reply", "analysis"} for this provider and message, or None
+    if crisis_flag:
+        if RESPONSE_CACHE_ENABLED:
+            _stats["skipped_crisis"] += 1
+        return None
+    key = _key(provider, message)
+    if key is None:
+        return None
+    entry = _entries.get(key)
+    if entry is None or entry[1] < time.monotonic():
+        if entry is not None:
+            del _entries[key]
+        _stats["misses"] += 1
+        return None
+    try:
+        data = json.loads(encryption.decrypt_content(entry[0]))
+    except Exception:
+        # Written under a key that is no longer configured
+        del _entries[key]
+        _stats["misses"] += 1
+        return None
+    _entries.move_to_end(key)
+    _stats["hits"] += 1
+    _stats["saved_seconds"] += entry[2]
+    return data
+
+
+def put(provider: str, message: str, data: dict, seconds: float):
+    # seconds: how long the provider took, credited as saved on every hit
+    if data.get("analysis", {}).get("crisis_flag"):
+        return
+    key = _key(provider, message)
+    if key is None or RESPONSE_CACHE_MAX <= 0:
+        return
+    token = encryption.encrypt_content(json.dumps(data))
+    _entries[key] = (token, time.monotonic() + RESPONSE_CACHE_TTL, seconds)
+    _entries.move_to_end(key)
+    while len(_entries) > RESPONSE_CACHE_MAX:
+        _entries.popitem(last=False)
+        _stats["evictions"] += 1
+
+
+def clear():
+    _entries.clear()
+
+
+def stats():
+    lookups = _stats["hits"] + _stats["misses"]
+    return {
+        "enabled": RESPONSE_CACHE_ENABLED,
+        "size": len(_entries),
+        "hits": _stats["hits"],
+        "misses": _stats["misses"],
+        "hit_rate": _stats["hits"] / lookups if lookups else 0.0,
+        "evictions": _stats["evictions"],
+        "skipped_crisis": _stats["skipped_crisis"],
+        "saved_seconds": round(_stats["saved_seconds"], 3),
+    }
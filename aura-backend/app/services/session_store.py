@@ -0,0 +1,213 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from . import encryption
+
+# Conversation memory for Mini-Aura: the last few "User: ..." / "Aura: ..." lines
+# per session. Two backends behind one interface:
+#   memory  per-process, bounded by session count (LRU), idle TTL and total size
+#   sqlite  one file shared by every uvicorn worker on the host, encrypted at rest
+
+SESSION_BACKEND = os.getenv("AURA_SESSION_BACKEND", "memory").lower()
+SESSION_MAX = int(os.getenv("AURA_SESSION_MAX", "10000"))
+SESSION_TTL = float(os.getenv("AURA_SESSION_TTL", "3600"))
+SESSION_MAX_BYTES = int(os.getenv("AURA_SESSION_MAX_BYTES", str(32 * 1024 * 1024)))
+SESSION_DB_PATH = os.getenv("AURA_SESSION_DB", "./aura_sessions.db")
+
+
+class SessionStore(ABC):
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = {"lru": 0, "ttl": 0, "memory": 0}
+
+    @abstractmethod
+    def get(self, session_id: str) -> list:
+        # History lines, oldest first; empty for unknown or expired sessions
+        ...
+
+    @abstractmethod
+    def put(self, session_id: str, lines: list):
+        ...
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        ...
+
+    @abstractmethod
+    def __len__(self):
+        ...
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "size": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": dict(self.evictions),
+        }
+
+
+def _size(lines) -> int:
+    return sum(len(line.encode("utf-8")) for line in lines)
+
+
+class MemorySessionStore(SessionStore):
+    def __init__(self, maxsize: int = SESSION_MAX, ttl: float = SESSION_TTL, max_bytes: int = SESSION_MAX_BYTES):
+        super().__init__()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()  # session_id -> (lines, expires_at, size)
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> list:
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    self._remove(session_id)
+                    self.evictions["ttl"] += 1
+                self.misses += 1
+                return []
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+            return list(entry[0])
+
+    def put(self, session_id: str, lines: list):
+        if self.maxsize <= 0:
+            return
+        lines = list(lines)
+        size = _size(lines)
+        with self._lock:
+            if session_id in self._entries:
+                self._remove(session_id)
+            self._entries[session_id] = (lines, time.monotonic() + self.ttl, size)
+            self.bytes += size
+            self._evict()
+
+    def delete(self, session_id: str):
+        with self._lock:
+            if session_id in self._entries:
+                self._remove(session_id)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        stats = super().stats()
+        stats["bytes"] = self.bytes
+        return stats
+
+    def _remove(self, session_id):
+        self.bytes -= self._entries.pop(session_id)[2]
+
+    def _evict(self):
+        # Least recently used first; expired sessions at the old end go as TTL evictions
+        now = time.monotonic()
+        while self._entries and (len(self._entries) > self.maxsize or self.bytes > self.max_bytes):
+            session_id, (_, expires, _) = next(iter(self._entries.items()))
+            if expires < now:
+                reason = "ttl"
+            else:
+                reason = "lru" if len(self._entries) > self.maxsize else "memory"
+            self._remove(session_id)
+            self.evictions[reason] += 1
+
+
+class SQLiteSessionStore(SessionStore):
+    # Counters are per process; size and evictions reflect the shared file
+    PRUNE_EVERY = 100
+
+    def __init__(self, path: str = SESSION_DB_PATH, maxsize: int = SESSION_MAX, ttl: float = SESSION_TTL):
+        super().__init__()
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        # WAL lets workers read while another one writes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, lines TEXT NOT NULL, expires_at REAL NOT NULL, used_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_sessions_used_at ON sessions (used_at)")
+
+    def get(self, session_id: str) -> list:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT lines, expires_at FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is None or row[1] < now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+                    self.evictions["ttl"] += 1
+                self.misses += 1
+                return []
+            self._conn.execute("UPDATE sessions SET used_at = ? WHERE id = ?", (now, session_id))
+        try:
+            lines = json.loads(encryption.decrypt_content(row[0]))
+        except Exception:
+            # Written under a key that is no longer configured
+            self.misses += 1
+            return []
+        self.hits += 1
+        return lines
+
+    def put(self, session_id: str, lines: list):
+        if self.maxsize <= 0:
+            return
+        now = time.time()
+        # Conversations are as private as journal entries, so they are encrypted at rest
+        token = encryption.encrypt_content(json.dumps(list(lines)))
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sessions (id, lines, expires_at, used_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET lines = excluded.lines, expires_at = excluded.expires_at, "
+                "used_at = excluded.used_at",
+                (session_id, token, now + self.ttl, now),
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._prune(now)
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def _prune(self, now):
+        # Amortized over PRUNE_EVERY writes: drop expired rows, then the least recently used
+        expired = self._conn.execute("DELETE FROM sessions WHERE expires_at < ?", (now,)).rowcount
+        self.evictions["ttl"] += expired
+        over = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] - self.maxsize
+        if over > 0:
+            self._conn.execute(
+                "DELETE FROM sessions WHERE id IN (SELECT id FROM sessions ORDER BY used_at LIMIT ?)", (over,)
+            )
+            self.evictions["lru"] += over
+
+
+_store = None
+
+
+def get_store() -> SessionStore:
+    global _store
+    if _store is None:
+        if SESSION_BACKEND == "sqlite":
+            _store = SQLiteSessionStore()
+        else:
+            _store = MemorySessionStore()
+    return _store
@@ -0,0 +1,184 @@
+import os
+import json
+import time
+import asyncio
+import datetime
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from ..database import AsyncSessionLocal
+from .. import models
+from . import dashboard_cache, encryption, provider_router
+
+# Weekly mood reports, generated in bulk by scripts/generate_weekly_reports.py
+# (run it from cron once a week) and read by the dashboard. Users with analyzed
+# entries in the period are streamed in keyset-paginated chunks. Each one's
+# stored scores (emotion_label, stress_score) are condensed into a short digest,
+# the provider router turns it into a few sentences, and the result is
+# written to weekly_reports as soon as it arrives. At most
+# WEEKLY_REPORT_CONCURRENCY LLM calls are in flight.
+# Users who already have a report for the period are skipped, so a run that
+# died halfway is finished by running it again. When a provider is configured
+# but does not answer, the user is left for the next run. With no provider
+# configured, the report is written from the digest alone. A user whose entries
+# are all still pending is left out until a later run finds them analyzed.
+
+WEEKLY_REPORT_CHUNK = int(os.getenv("AURA_WEEKLY_REPORT_CHUNK", "200"))
+WEEKLY_REPORT_CONCURRENCY = int(os.getenv("AURA_WEEKLY_REPORT_CONCURRENCY", "4"))
+DEFAULT_REPORT = "Your weekly report will appear here once you have a week of entries. Keep writing, one day at a time. 🌿"
+
+
+def period(period_end: datetime.date = None):
+    # The seven UTC days before period_end (default: today), as datetimes [start, end)
+    end = period_end or datetime.datetime.utcnow().date()
+    end_at = datetime.datetime.combine(end, datetime.time())
+    return end, end_at - datetime.timedelta(days=7), end_at
+
+
+def digest(entries):
+    # entries: [(created_at, emotion_label, stress_score)] in time order
+    daily = {}
+    emotions = {}
+    for created_at, emotion, stress in entries:
+        if stress is not None:
+            daily.setdefault(created_at.date(), []).append(stress)
+        if emotion:
+            emotions[emotion] = emotions.get(emotion, 0) + 1
+    means = {day: sum(values) / len(values) for day, values in sorted(daily.items())}
+    stresses = [s for values in daily.values() for s in values]
+    result = {
+        "entries": len(entries),
+        "active_days": len({created_at.date() for created_at, *_ in entries}),
+        "stress_avg": round(sum(stresses) / len(stresses), 1) if stresses else None,
+        "stress_min": min(stresses) if stresses else None,
+        "stress_max": max(stresses) if stresses else None,
+        "emotions": sorted(emotions.items(), key=lambda item: -item[1])[:3],
+    }
+    if means:
+        peak = max(means, key=means.get)
+        result["peak_day"] = peak.strftime("%A")
+        values = list(means.values())
+        half = len(values) // 2
+        if half:
+            change = sum(values[half:]) / len(values[half:]) - sum(values[:half]) / half
+            result["trend"] = "rising" if change >= 1 else "easing" if change <= -1 else "steady"
+    return result
+
+
+def prompt(week: dict):
+    return ("WEEKLY MOOD REPORT: In \"reply\", write 2-3 warm sentences for this person's dashboard "
+            "about their past week, addressed to them, ending with one gentle suggestion. "
+            f"Their week: {json.dumps(week)}")
+
+
+def local_report(week: dict):
+    # Used when no provider is configured
+    parts = [f"This week you checked in {week['entries']} times over {week['active_days']} days."]
+    if week["stress_avg"] is not None:
+        line = f"Your stress averaged {week['stress_avg']}/10"
+        if week.get("peak_day"):
+            line += f", peaking on {week['peak_day']}"
+        if week.get("trend") in ("rising", "easing"):
+            line += f", and it was {week['trend']} toward the end"
+        parts.append(line + ".")
+    if week["emotions"]:
+        parts.append(f"You mostly felt {week['emotions'][0][0].lower()}.")
+    parts.append("Keep up the 4-7-8 breathing on the harder days. 🌿")
+    return " ".join(parts)
+
+
+async def _report(user_id: str, entries, period_end: datetime.date, stats: dict):
+    week = digest(entries)
+    try:
+        provider, data = await provider_router.route("gemini", prompt(week))
+        if provider is None and provider_router.configured_providers():
+            stats["failed"] += 1
+            return
+        text = (data.get("reply") if provider else None) or local_report(week)
+        async with AsyncSessionLocal() as db:
+            insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+            # A concurrent run may have written the same report; keep whichever came first
+            await db.execute(insert(models.WeeklyReport).values(
+                user_id=user_id, period_end=period_end, encrypted_report=encryption.encrypt_content(text),
+                entry_count=week["entries"], stress_avg=week["stress_avg"], provider=provider or "local",
+                created_at=datetime.datetime.utcnow()
+            ).on_conflict_do_nothing(index_elements=["user_id", "period_end"]))
+            await db.commit()
+    except Exception as e:
+        print(f"[WeeklyReports] {user_id}: {e!r}")
+        stats["failed"] += 1
+        return
+    dashboard_cache.bump(user_id)
+    stats["generated"] += 1
+
+
+async def run(period_end: datetime.date = None, chunk_size: int = None, concurrency: int = None):
+    # Generates the missing reports for one period; returns the run's stats
+    end, start_at, end_at = period(period_end)
+    chunk_size = chunk_size or WEEKLY_REPORT_CHUNK
+    slots = asyncio.Semaphore(concurrency or WEEKLY_REPORT_CONCURRENCY)
+    entry, report = models.JournalEntry, models.WeeklyReport
+    # Pending entries only have the offline scores they were saved with
+    analyzed = (entry.created_at >= start_at, entry.created_at < end_at, entry.analysis_status != "pending")
+    stats = {"users": 0, "generated": 0, "skipped_existing": 0, "failed": 0}
+    running = set()
+    started = time.perf_counter()
+    after = ""
+
+    while True:
+        async with AsyncSessionLocal() as db:
+            # Next chunk of users with analyzed entries in the period, in id order
+            user_ids = (await db.scalars(select(models.User.id).filter(
+                models.User.id > after,
+                select(entry.id).filter(entry.user_id == models.User.id, *analyzed).exists()
+            ).order_by(models.User.id).limit(chunk_size))).all()
+            if not user_ids:
+                break
+            after = user_ids[-1]
+            done = set((await db.scalars(select(report.user_id).filter(
+                report.period_end == end, report.user_id.in_(user_ids)
+            ))).all())
+            todo = [u for u in user_ids if u not in done]
+            rows = (await db.execute(select(
+                entry.user_id, entry.created_at, entry.emotion_label, entry.stress_score
+            ).filter(entry.user_id.in_(todo), *analyzed).order_by(entry.created_at))).all() if todo else []
+        per_user = {}
+        for user_id, *values in rows:
+            per_user.setdefault(user_id, []).append(values)
+
+        stats["users"] += len(user_ids)
+        stats["skipped_existing"] += len(done)
+        for user_id in todo:
+            if user_id not in per_user:
+                # Its entries were deleted between the two queries
+                continue
+            # Waits for a free slot, so at most `concurrency` reports (and one chunk) are in memory
+            await slots.acquire()
+            task = asyncio.create_task(_report(user_id, per_user[user_id], end, stats))
+            running.add(task)
+            task.add_done_callback(running.discard)
+            task.add_done_callback(lambda _: slots.release())
+        elapsed = time.perf_counter() - started
+        print(f"[WeeklyReports] {stats['users']} users seen, {stats['generated']} written, "
+              f"{stats['generated'] / elapsed * 60:.0f} users/min")
+
+    await asyncio.gather(*running)
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = round(elapsed, 2)
+    stats["users_per_minute"] = round(stats["generated"] / elapsed * 60, 1) if elapsed else 0.0
+    print(f"[WeeklyReports] Period ending {end}: {stats['generated']} written, {stats['skipped_existing']} already done, "
+          f"{stats['failed']} failed in {elapsed:.1f}s ({stats['users_per_minute']} users/min)")
+    return stats
+
+
+async def latest(db, user_id: str):
+    # The dashboard's weekly_report text
+    token = await db.scalar(select(models.WeeklyReport.encrypted_report).filter(
+        models.WeeklyReport.user_id == user_id
+    ).order_by(models.WeeklyReport.period_end.desc()).limit(1))
+    if token is None:
+        return DEFAULT_REPORT
+    try:
+        return encryption.decrypt_content(token)
+    except Exception:
+        # Written under a key that is no longer configured
+        return DEFAULT_REPORT
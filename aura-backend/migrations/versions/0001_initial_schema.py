@@ -0,0 +1,65 @@
+"""initial schema
+
+Matches what Base.metadata.create_all produced before migrations existed.
+Databases created that way are stamped at this revision on first upgrade.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_table(
+        "journal_entries",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("encrypted_content", sa.Text(), nullable=False),
+        sa.Column("sentiment_score", sa.Float()),
+        sa.Column("emotion_label", sa.String()),
+        sa.Column("stress_score", sa.Float()),
+        sa.Column("stress_level", sa.String()),
+        sa.Column("analysis_summary", sa.Text()),
+        sa.Column("is_high_risk", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id")),
+    )
+    op.create_index("ix_journal_entries_id", "journal_entries", ["id"])
+    op.create_table(
+        "activity_sessions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("activity_type", sa.String()),
+        sa.Column("score", sa.Integer()),
+        sa.Column("duration_seconds", sa.Integer()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id")),
+    )
+    op.create_index("ix_activity_sessions_id", "activity_sessions", ["id"])
+    op.create_table(
+        "user_stats",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id")),
+        sa.Column("streak_count", sa.Integer()),
+        sa.Column("xp_points", sa.Integer()),
+        sa.Column("pomodoro_completed", sa.Integer()),
+        sa.Column("last_journal_date", sa.DateTime()),
+    )
+    op.create_index("ix_user_stats_id", "user_stats", ["id"])
+
+
+def downgrade():
+    op.drop_table("user_stats")
+    op.drop_table("activity_sessions")
+    op.drop_table("journal_entries")
+    op.drop_table("users")
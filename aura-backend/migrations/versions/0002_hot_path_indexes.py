@@ -0,0 +1,28 @@
+"""composite indexes for per-user reads
+
+Every per-user read filters on user_id and orders by created_at
+(dashboard, stress trends, journal history), and every chat/journal write
+looks up user_stats by user_id.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_journal_entries_user_id_created_at", "journal_entries", ["user_id", "created_at"])
+    op.create_index("ix_activity_sessions_user_id_created_at", "activity_sessions", ["user_id", "created_at"])
+    op.create_index("ix_user_stats_user_id", "user_stats", ["user_id"], unique=True)
+
+
+def downgrade():
+    op.drop_index("ix_user_stats_user_id", table_name="user_stats")
+    op.drop_index("ix_activity_sessions_user_id_created_at", table_name="activity_sessions")
+    op.drop_index("ix_journal_entries_user_id_created_at", table_name="journal_entries")
@@ -0,0 +1,30 @@
+"""journal_entries.analysis_status for save-first journal writes
+
+Entries are stored before they are analyzed; the background analysis queue
+fills in the scores and moves the status from "pending" to "done" (or
+"failed" after its retries). Rows that existed before were analyzed inline.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("journal_entries") as batch:
+        batch.add_column(sa.Column("analysis_status", sa.String(), nullable=False, server_default="done"))
+    # Startup re-queues pending rows
+    op.create_index("ix_journal_entries_analysis_status", "journal_entries", ["analysis_status"])
+
+
+def downgrade():
+    op.drop_index("ix_journal_entries_analysis_status", table_name="journal_entries")
+    with op.batch_alter_table("journal_entries") as batch:
+        batch.drop_column("analysis_status")
@@ -0,0 +1,70 @@
+"""daily_mood_rollup: per user per day mood totals
+
+Stress trends read one row per user per day instead of every journal entry
+and chat message. Writes keep the rows current (services/mood_rollup.py);
+this migration fills them from the entries already analyzed.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+import datetime
+import json
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    rollup = op.create_table(
+        "daily_mood_rollup",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("entry_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("stress_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("stress_sum", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("stress_min", sa.Float()),
+        sa.Column("stress_max", sa.Float()),
+        sa.Column("sentiment_sum", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("emotion_counts", sa.Text(), nullable=False, server_default="{}"),
+    )
+    op.create_index("ix_daily_mood_rollup_user_id_day", "daily_mood_rollup", ["user_id", "day"], unique=True)
+
+    # Backfill; the same aggregation as mood_rollup.rebuild
+    groups = op.get_bind().execute(sa.text(
+        "SELECT user_id, date(created_at), emotion_label, count(*), count(stress_score), "
+        "sum(stress_score), min(stress_score), max(stress_score), sum(sentiment_score) "
+        "FROM journal_entries WHERE analysis_status != 'pending' AND user_id IS NOT NULL "
+        "AND created_at IS NOT NULL GROUP BY user_id, date(created_at), emotion_label"
+    ))
+    days = {}
+    for user_id, day, emotion, n, stress_n, stress_sum, stress_min, stress_max, sentiment_sum in groups:
+        if isinstance(day, str):
+            day = datetime.date.fromisoformat(day)
+        row = days.setdefault((user_id, day), {
+            "user_id": user_id, "day": day, "entry_count": 0, "stress_count": 0, "stress_sum": 0.0,
+            "stress_min": None, "stress_max": None, "sentiment_sum": 0.0, "emotions": {},
+        })
+        row["entry_count"] += n
+        row["stress_count"] += stress_n
+        row["stress_sum"] += stress_sum or 0.0
+        row["sentiment_sum"] += sentiment_sum or 0.0
+        if stress_min is not None:
+            row["stress_min"] = stress_min if row["stress_min"] is None else min(row["stress_min"], stress_min)
+            row["stress_max"] = stress_max if row["stress_max"] is None else max(row["stress_max"], stress_max)
+        if emotion:
+            row["emotions"][emotion] = row["emotions"].get(emotion, 0) + n
+    for row in days.values():
+        row["emotion_counts"] = json.dumps(row.pop("emotions"), sort_keys=True)
+    if days:
+        op.bulk_insert(rollup, list(days.values()))
+
+
+def downgrade():
+    op.drop_index("ix_daily_mood_rollup_user_id_day", table_name="daily_mood_rollup")
+    op.drop_table("daily_mood_rollup")
@@ -0,0 +1,38 @@
+"""weekly_reports: precomputed weekly mood summaries
+
+Written by the weekly report batch job (scripts/generate_weekly_reports.py)
+and read by the dashboard, one row per user per report period. The report
+text is encrypted like journal content.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "weekly_reports",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("period_end", sa.Date(), nullable=False),
+        sa.Column("encrypted_report", sa.Text(), nullable=False),
+        sa.Column("entry_count", sa.Integer(), nullable=False),
+        sa.Column("stress_avg", sa.Float()),
+        sa.Column("provider", sa.String()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    # Resuming a run and the dashboard's latest-report lookup both go through this index
+    op.create_index("ix_weekly_reports_user_id_period_end", "weekly_reports", ["user_id", "period_end"], unique=True)
+
+
+def downgrade():
+    op.drop_index("ix_weekly_reports_user_id_period_end", table_name="weekly_reports")
+    op.drop_table("weekly_reports")
@@ -0,0 +1,171 @@
+# Time to first reply token: POST /chat/message (whole reply) vs POST /chat/stream
+# (server-sent events), for Mini-Aura, Groq and Gemini. The app is served by a real
+# uvicorn server so the stream is measured as a client sees it. Gemini and Groq are
+# replaced by stubs that emit the JSON document in small chunks with a delay.
+# Finally, Gemini breaks off mid-stream: the client gets an error event, the final
+# reply is only what was streamed, and the router counts the streamed failure.
+#   cd aura-backend && python -m scripts.bench_chat_stream
+# Uses a throwaway SQLite database unless DATABASE_URL is set.
+import asyncio
+import json
+import os
+import socket
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/aura_stream.db"
+
+import httpx
+import uvicorn
+from app.main import app
+from app.services import gemini_service, groq_service, local_llm_service, provider_router
+from scripts.bench_inference_scheduler import load
+
+FIRST_CHUNK_DELAY = 0.3   # provider "thinking" time before the first chunk
+CHUNK_DELAY = 0.03
+CHUNK_SIZE = 12
+REPLY_JSON = json.dumps({
+    "reply": "That sounds like a really heavy week. It makes sense that you feel drained — "
+             "exams, little sleep and no time for yourself add up. Would a short breathing "
+             "exercise help before you get back to revising? \U0001F33F",
+    "analysis": {"sentiment": "Negative", "emotion_detected": "Anxious", "stress_score": 7,
+                 "keywords_found": ["exam pressure", "tired"], "recommended_action": "Breathing Exercise",
+                 "crisis_flag": False},
+})
+
+
+async def chunked():
+    await asyncio.sleep(FIRST_CHUNK_DELAY)
+    for i in range(0, len(REPLY_JSON), CHUNK_SIZE):
+        yield REPLY_JSON[i:i + CHUNK_SIZE]
+        await asyncio.sleep(CHUNK_DELAY)
+
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGeminiModel:
+    fail_after = None  # chunks streamed before the connection drops
+
+    async def generate_content_async(self, query, stream=False):
+        if not stream:
+            parts = [c async for c in chunked()]
+            return _Chunk("".join(parts))
+
+        async def response():
+            n = 0
+            async for c in chunked():
+                if n == FakeGeminiModel.fail_after:
+                    raise ConnectionError("stream reset")
+                n += 1
+                yield _Chunk(c)
+        return response()
+
+
+async def groq_handler(request):
+    if not json.loads(request.content).get("stream"):
+        parts = [c async for c in chunked()]
+        return httpx.Response(200, json={"choices": [{"message": {"content": "".join(parts)}}]})
+
+    async def body():
+        async for c in chunked():
+            event = {"choices": [{"delta": {"content": c}}]}
+            yield f"data: {json.dumps(event)}\n\n".encode()
+        yield b"data: [DONE]\n\n"
+    return httpx.Response(200, content=body(), headers={"Content-Type": "text/event-stream"})
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def first_token(client, headers, model_type, stream):
+    body = {"message": "Exams all week and I can't sleep", "model_type": model_type}
+    t0 = time.perf_counter()
+    if not stream:
+        r = await client.post("/chat/message", headers=headers, json=body)
+        r.raise_for_status()
+        elapsed = time.perf_counter() - t0
+        return elapsed, elapsed, r.json()["reply"]
+
+    ttft, reply = None, ""
+    async with client.stream("POST", "/chat/stream", headers=headers, json=body) as r:
+        r.raise_for_status()
+        event = None
+        async for line in r.aiter_lines():
+            if line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:") and event == "token":
+                if ttft is None:
+                    ttft = time.perf_counter() - t0
+            elif line.startswith("data:") and event == "analysis":
+                reply = json.loads(line[5:])["reply"]
+    return ttft, time.perf_counter() - t0, reply
+
+
+async def stream_events(client, headers, message):
+    events = []
+    async with client.stream("POST", "/chat/stream", headers=headers,
+                             json={"message": message, "model_type": "gemini"}) as r:
+        event = None
+        async for line in r.aiter_lines():
+            if line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:"):
+                events.append((event, json.loads(line[5:])))
+    return events
+
+
+async def main():
+    model, tokenizer = load()
+    local_llm_service._model, local_llm_service._tokenizer = model, tokenizer
+    gemini_service.GOOGLE_API_KEY = "stub"  # so the provider router sees Gemini as configured
+    gemini_service.get_model = lambda: FakeGeminiModel()
+    groq_service.GROQ_API_KEY = "stub"
+    stub_client = httpx.AsyncClient(transport=httpx.MockTransport(groq_handler))
+    groq_service.get_client = lambda provider: stub_client
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+        token = (await client.post("/auth/anonymous-login")).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        await first_token(client, headers, "aura", stream=False)  # warm-up
+
+        print("                         first token    full reply   (median of 5, ms)")
+        for model_type in ("aura", "groq", "gemini"):
+            for stream in (False, True):
+                runs = [await first_token(client, headers, model_type, stream) for _ in range(5)]
+                ttft = sorted(r[0] for r in runs)[2] * 1000
+                total = sorted(r[1] for r in runs)[2] * 1000
+                label = f"{model_type:<7}{'/chat/stream' if stream else '/chat/message'}"
+                print(f"  {label:<22} {ttft:10.0f}    {total:10.0f}")
+            if model_type != "aura":
+                assert runs[-1][2] == json.loads(REPLY_JSON)["reply"], "streamed reply differs"
+
+        before = provider_router.PROVIDERS["gemini"].stats()
+        FakeGeminiModel.fail_after = 8
+        events = await stream_events(client, headers, "Exams all week and the wifi keeps dropping")
+        FakeGeminiModel.fail_after = None
+        after = provider_router.PROVIDERS["gemini"].stats()
+        streamed = "".join(data["text"] for event, data in events if event == "token")
+        final = events[-1][1]
+        print(f"  gemini broken mid-stream   events {[e for e, _ in events if e != 'token']}   "
+              f"final reply == streamed text: {final['reply'] == streamed}   "
+              f"router requests {before['requests']} -> {after['requests']}, errors {before['errors']} -> {after['errors']}")
+
+    server.should_exit = True
+    await task
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
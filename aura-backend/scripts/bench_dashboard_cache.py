@@ -0,0 +1,116 @@
+# GET /analytics/dashboard with and without the per-user dashboard cache.
+#   cd aura-backend && python -m scripts.bench_dashboard_cache
+#
+# 1. Repeat loads: cache off (every load queries and serializes), cache on, and
+#    cache on with If-None-Match (304, no body)
+# 2. Writes invalidate: a chat message or journal entry changes the ETag and the
+#    next load shows it; the old ETag no longer gets a 304
+# 3. A write landing while a load is querying is not cached over
+# 4. Versions stay bounded by the cache size however many users write, and a
+#    load whose user's version is evicted mid-query is still not cached over
+# Uses a throwaway SQLite database unless DATABASE_URL is set.
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/aura_dashboard.db"
+
+import httpx
+from sqlalchemy import event
+from app.database import async_engine
+from app.main import app
+from app.migrations import upgrade_database
+from app.routes import analytics
+from app.services import dashboard_cache, gemini_service
+
+LOADS = 300
+statements = []
+
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _count(conn, cursor, statement, parameters, context, executemany):
+    statements.append(statement)
+
+
+async def fake_gemini(user_message: str):
+    return {"reply": "I'm here for you.", "analysis": {"stress_score": 3}}
+
+
+async def loads(client, headers, label, etag=None):
+    request_headers = dict(headers, **({"If-None-Match": etag} if etag else {}))
+    statements.clear()
+    times = []
+    for _ in range(LOADS):
+        t0 = time.perf_counter()
+        r = await client.get("/analytics/dashboard", headers=request_headers)
+        times.append(time.perf_counter() - t0)
+    print(f"   {label:<30} median {statistics.median(times) * 1000:5.2f} ms   status {r.status_code}   "
+          f"body {len(r.content):4d} B   {len(statements) / LOADS:.1f} statements/load")
+    return r
+
+
+async def main():
+    upgrade_database()
+    gemini_service.get_gemini_response = fake_gemini
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://aura.test") as client:
+        token = (await client.post("/auth/anonymous-login")).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        for i in range(10):
+            await client.post("/journal/entry", headers=headers, json={"content": f"Exams all week, entry {i}"})
+
+        print(f"1. {LOADS} repeat loads")
+        size = dashboard_cache.DASHBOARD_CACHE_SIZE
+        dashboard_cache.DASHBOARD_CACHE_SIZE = 0
+        await loads(client, headers, "cache off")
+        dashboard_cache.DASHBOARD_CACHE_SIZE = size
+        r = await loads(client, headers, "cache on")
+        etag = r.headers["etag"]
+        await loads(client, headers, "cache on + If-None-Match", etag)
+
+        print("2. writes invalidate")
+        await client.post("/chat/message", headers=headers, json={"message": "hello"})
+        r = await client.get("/analytics/dashboard", headers=dict(headers, **{"If-None-Match": etag}))
+        print(f"   after a chat message: old ETag -> {r.status_code}, ETag changed {r.headers['etag'] != etag}, "
+              f"newest entry stress {r.json()['recent_entries'][0]['stress_score']}")
+        etag = r.headers["etag"]
+        await client.post("/journal/entry", headers=headers, json={"content": "new entry"})
+        r = await client.get("/analytics/dashboard", headers=dict(headers, **{"If-None-Match": etag}))
+        print(f"   after a journal entry: old ETag -> {r.status_code}, xp {r.json()['stats']['xp_points']}")
+
+        print("3. write during a load")
+        original = analytics._dashboard
+
+        async def slow_dashboard(db, user_id):
+            data = await original(db, user_id)
+            await db.commit()  # end the read so SQLite lets the write through
+            await client.post("/chat/message", headers=headers, json={"message": "mid-load"})
+            return data
+        analytics._dashboard = slow_dashboard
+        dashboard_cache.clear()
+        stale = await client.get("/analytics/dashboard", headers=headers)
+        analytics._dashboard = original
+        fresh = await client.get("/analytics/dashboard", headers=headers)
+        print(f"   load built before the write was not cached: {stale.headers['etag'] != fresh.headers['etag']}   "
+              f"xp {stale.json()['stats']['xp_points']} -> {fresh.json()['stats']['xp_points']}")
+        print(f"   stats {dashboard_cache.stats()}")
+
+    print("4. many writers")
+    size, dashboard_cache.DASHBOARD_CACHE_SIZE = dashboard_cache.DASHBOARD_CACHE_SIZE, 1_000
+    for i in range(50_000):
+        dashboard_cache.bump(f"writer-{i}")
+    built_from = dashboard_cache.version("late")
+    dashboard_cache.bump("late")
+    for i in range(2_000):
+        dashboard_cache.bump(f"other-{i}")  # evicts "late"
+    dashboard_cache.put("late", built_from, b"stale")
+    print(f"   50,000 writers: {dashboard_cache.stats()['versions']} versions kept (cache size 1,000)   "
+          f"stale build cached after its version was evicted: {dashboard_cache.get('late') is not None}")
+    dashboard_cache.DASHBOARD_CACHE_SIZE = size
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
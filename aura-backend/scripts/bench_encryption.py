@@ -0,0 +1,34 @@
+# Microbenchmark: journal entries decrypted per second, per-call PBKDF2 vs cached keys.
+#   cd aura-backend && python -m scripts.bench_encryption
+import time
+
+from app.services import encryption
+
+ENTRIES = 500
+
+
+def legacy_decrypt(token: str) -> str:
+    # Pre-cache behaviour: derive the key again on every call
+    f = encryption._derive_fernet.__wrapped__(encryption.ENCRYPTION_KEY)
+    return f.decrypt(token.encode()).decode()
+
+
+def rate(label, fn, n):
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<28} {n / elapsed:12,.0f} entries/s   ({elapsed * 1000:8.1f} ms for {n})")
+
+
+def main():
+    text = "Today was a heavy day with exams, but I went for a walk and felt a bit better. " * 8
+    tokens = [encryption.encrypt_content(text) for _ in range(ENTRIES)]
+
+    legacy_n = 50  # the old path is too slow to run the full set
+    rate("per-call PBKDF2 (before)", lambda: [legacy_decrypt(t) for t in tokens[:legacy_n]], legacy_n)
+    rate("cached key, one by one", lambda: [encryption.decrypt_content(t) for t in tokens], ENTRIES)
+    rate("cached key, decrypt_many", lambda: encryption.decrypt_many(tokens), ENTRIES)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# hf_service.analyze against stub Hugging Face endpoints with per-model latency
+# (a fixed round trip plus a per-input cost, so batching pays off as it does on
+# the Inference API).
+#   cd aura-backend && python -m scripts.bench_hf_analysis
+#
+# 1. One text: the four sequential calls before vs analyze()
+# 2. Partial failure: the mental-health model is loading (503) and the risk model
+#    is slower than the budget; analyze() still answers within the budget
+# 3. Backfill of 64 texts: one analyze() call per text vs analyze(list), both
+#    limited by the huggingface pool's connection limit
+import asyncio
+import json
+import time
+import httpx
+from app.services import hf_service, http_client
+
+# url -> (round trip seconds, extra seconds per input)
+LATENCY = {
+    hf_service.API_URL_SENTIMENT: (0.30, 0.010),
+    hf_service.API_URL_EMOTION: (0.35, 0.010),
+    hf_service.API_URL_RISK: (0.80, 0.040),
+    hf_service.API_URL_MENTAL_HEALTH: (0.30, 0.010),
+}
+TEXTS = [
+    "Exams all week and I can't sleep",
+    "Had a lovely walk with my sister today",
+    "Everything feels pointless lately",
+    "My manager keeps piling on deadlines",
+]
+faults = {}  # url -> "loading" | seconds of extra delay
+# MockTransport skips the connection pool, so model the real one: at most
+# max_connections requests in flight on the huggingface client
+pool = asyncio.Semaphore(http_client.PROVIDER_LIMITS["huggingface"][0])
+
+
+def classification(labels):
+    return [{"label": label, "score": score} for label, score in labels]
+
+
+def respond(url, text):
+    if url == hf_service.API_URL_SENTIMENT:
+        return classification([("negative", 0.7), ("neutral", 0.2), ("positive", 0.1)])
+    if url == hf_service.API_URL_EMOTION:
+        return classification([("fear", 0.6), ("sadness", 0.3), ("joy", 0.1)])
+    if url == hf_service.API_URL_MENTAL_HEALTH:
+        return classification([("Stress", 0.7), ("Normal", 0.3)])
+    return {"sequence": text, "labels": ["academic stress", "safe", "self-harm", "high-risk crisis"],
+            "scores": [0.6, 0.3, 0.06, 0.04]}
+
+
+async def handler(request):
+    async with pool:
+        return await serve(request)
+
+
+async def serve(request):
+    url = str(request.url)
+    body = json.loads(request.content)
+    inputs = body["inputs"] if isinstance(body["inputs"], list) else [body["inputs"]]
+    base, per_input = LATENCY[url]
+    fault = faults.get(url)
+    if fault == "loading":
+        await asyncio.sleep(0.05)
+        return httpx.Response(503, json={"error": "Model is currently loading", "estimated_time": 20.0})
+    await asyncio.sleep(base + per_input * len(inputs) + (fault or 0))
+    results = [respond(url, t) for t in inputs]
+    if not isinstance(body["inputs"], list):
+        # Single input: classifiers wrap it in a list, zero-shot returns the dict itself
+        return httpx.Response(200, json=results if url != hf_service.API_URL_RISK else results[0])
+    return httpx.Response(200, json=results)
+
+
+async def sequential(text):
+    # What a caller had to do before: four round trips, one after the other
+    sentiment = await hf_service.get_sentiment(text)
+    emotion, emotion_score = await hf_service.get_emotion(text)
+    _, risk = await hf_service.check_risk(text)
+    mh = await hf_service.get_mental_health_label(text)
+    return hf_service.calculate_stress_index(sentiment, emotion, emotion_score, risk, mh)
+
+
+async def timed(coro):
+    t0 = time.perf_counter()
+    result = await coro
+    return time.perf_counter() - t0, result
+
+
+async def main():
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    hf_service.get_client = lambda provider: client
+
+    before, stress_before = await timed(sequential(TEXTS[0]))
+    after, result = await timed(hf_service.analyze(TEXTS[0]))
+    print(f"1. one text      sequential {before * 1000:5.0f} ms   analyze {after * 1000:5.0f} ms   "
+          f"same stress index: {stress_before == result['stress_index']} ({result['stress_index']})")
+    print(f"   stage timings {result['timings_ms']}")
+
+    faults[hf_service.API_URL_MENTAL_HEALTH] = "loading"
+    faults[hf_service.API_URL_RISK] = 5.0
+    elapsed, result = await timed(hf_service.analyze(TEXTS[2], budget=1.5))
+    print(f"2. degraded      analyze {elapsed * 1000:5.0f} ms (budget 1500 ms)   stages {result['stages']}   "
+          f"stress {result['stress_index']} ({result['stress_level']}) from sentiment and emotion")
+    faults.clear()
+
+    texts = [TEXTS[i % len(TEXTS)] for i in range(64)]
+    one_by_one, _ = await timed(asyncio.gather(*(hf_service.analyze(t) for t in texts)))
+    per_text_calls = len(texts) * len(hf_service.STAGES)
+    batched, results = await timed(hf_service.analyze(texts))
+    batches = -(-len(texts) // hf_service.HF_BATCH_SIZE)
+    print(f"3. backfill 64   analyze per text (all at once) {one_by_one:5.2f} s, {per_text_calls} requests   "
+          f"analyze(list) {batched:5.2f} s, {batches * len(hf_service.STAGES)} requests   "
+          f"results {len(results)}")
+    await client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
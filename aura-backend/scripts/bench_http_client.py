@@ -0,0 +1,79 @@
+# Benchmark: new httpx.AsyncClient per request vs the shared pooled client.
+# Starts a local keep-alive stub server, so no provider API keys are needed.
+#   cd aura-backend && python -m scripts.bench_http_client
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+from app.services import http_client
+
+REQUESTS = 300
+CONCURRENCY = 10
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps([[{"label": "positive", "score": 0.9}]]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+async def per_call_client(url):
+    async with httpx.AsyncClient() as client:
+        response = await client.post(url, json={"inputs": "hello"}, timeout=30.0)
+        return response.json()
+
+
+async def pooled_client(url):
+    client = http_client.get_client("huggingface")
+    response = await client.post(url, json={"inputs": "hello"})
+    return response.json()
+
+
+async def run(label, fn, url):
+    sem = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+
+    async def one():
+        async with sem:
+            t0 = time.perf_counter()
+            await fn(url)
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(REQUESTS)])
+    total = time.perf_counter() - t0
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{label:<22} {REQUESTS / total:8.0f} req/s   p50 {p50:6.2f} ms   p99 {p99:6.2f} ms")
+
+
+async def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/models/stub"
+
+    http_client.init_clients()
+    try:
+        await run("new client per call", per_call_client, url)
+        await run("shared pooled client", pooled_client, url)
+    finally:
+        await http_client.close_clients()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
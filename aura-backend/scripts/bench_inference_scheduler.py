@@ -0,0 +1,62 @@
+# Throughput and latency of Mini-Aura chat replies at 1, 8 and 32 concurrent
+# users: one-at-a-time decoding (batch size 1) vs the dynamic batching scheduler.
+#   cd aura-backend && python -m scripts.bench_inference_scheduler [new_tokens]
+import asyncio
+import os
+import sys
+import time
+
+import torch
+from app.services import local_llm_service as aura
+from app.services.char_tokenizer import CharTokenizer
+from app.services.inference_scheduler import InferenceScheduler
+
+ML_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "aura-ml")
+REQUESTS_PER_USER = 2
+PROMPTS = [
+    "User: I have exams next week and I can't sleep.\nAura: ",
+    "User: I feel lonely since I moved to a new city.\nAura: ",
+    "User: My parents keep fighting and I don't know what to do.\nAura: ",
+    "User: I think I'm doing a bit better today.\nAura: ",
+]
+
+
+def load():
+    tokenizer = CharTokenizer.load(os.path.join(ML_DIR, "aura_tokenizer.json"))
+    model = aura.AuraLLM(tokenizer.vocab_size)
+    model.load_state_dict(torch.load(os.path.join(ML_DIR, "aura_mental_health_model.pth"), map_location=aura.device))
+    model.to(aura.device).eval()
+    return model, tokenizer
+
+
+async def run(scheduler, tokenizer, users, new_tokens):
+    latencies = []
+
+    async def user(u):
+        for r in range(REQUESTS_PER_USER):
+            prompt = torch.from_numpy(tokenizer.encode_array(PROMPTS[(u + r) % len(PROMPTS)]))
+            t0 = time.perf_counter()
+            await scheduler.submit(prompt, max_new_tokens=new_tokens, temperature=0.7)
+            latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*[user(u) for u in range(users)])
+    elapsed = time.perf_counter() - t0
+    scheduler.stop()
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return len(latencies) * new_tokens / elapsed, len(latencies) / elapsed, p99
+
+
+async def main(new_tokens):
+    model, tokenizer = load()
+    print(f"{new_tokens} new tokens per reply, {REQUESTS_PER_USER} replies per user")
+    for users in (1, 8, 32):
+        for label, batch in (("sequential", 1), ("batched", 32)):
+            scheduler = InferenceScheduler(model, aura.block_size, max_batch_size=batch, max_wait_ms=10)
+            tok_s, req_s, p99 = await run(scheduler, tokenizer, users, new_tokens)
+            print(f"  {users:>2} users  {label:<10} {tok_s:8.0f} tokens/s  {req_s:6.2f} replies/s  p99 {p99 * 1000:8.0f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100))
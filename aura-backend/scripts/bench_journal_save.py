@@ -0,0 +1,144 @@
+# Save-first journal writes against a stub Gemini that takes PROVIDER_DELAY per
+# analysis, served by a real uvicorn server so the lifespan hook runs the queue.
+#   cd aura-backend && python -m scripts.bench_journal_save
+#
+# 1. POST /journal/entry latency (median of 10)
+# 2. Subscribe: time from POST until /journal/entry/{id}/events delivers the analysis
+# 3. Burst of 20 entries: analysis concurrency stays at AURA_ANALYSIS_WORKERS
+# 4. A provider failing twice: the entry is retried and still analyzed
+# 5. Restart with pending rows: they are re-queued and analyzed
+# Uses a throwaway SQLite database unless DATABASE_URL is set.
+import asyncio
+import json
+import os
+import socket
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/aura_journal.db"
+os.environ.setdefault("AURA_PRELOAD_MODEL", "false")
+
+import httpx
+import uvicorn
+from sqlalchemy import update
+from app.main import app
+from app.database import AsyncSessionLocal
+from app import models
+from app.services import gemini_service, analysis_queue
+
+PROVIDER_DELAY = 1.5
+ANALYSIS = {"reply": "Thank you for writing this down.",
+            "analysis": {"sentiment": "Negative", "emotion_detected": "Anxious", "stress_score": 7,
+                         "keywords_found": [], "recommended_action": "Breathing Exercise", "crisis_flag": False}}
+
+
+class FakeGeminiModel:
+    active = 0
+    peak = 0
+    flaky_failures = 0
+
+    class _Response:
+        text = json.dumps(ANALYSIS)
+
+    async def generate_content_async(self, query, stream=False):
+        cls = FakeGeminiModel
+        if "flaky" in query and cls.flaky_failures < 2:
+            cls.flaky_failures += 1
+            raise RuntimeError("503 Service Unavailable")
+        cls.active += 1
+        cls.peak = max(cls.peak, cls.active)
+        try:
+            await asyncio.sleep(PROVIDER_DELAY)
+        finally:
+            cls.active -= 1
+        return self._Response()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def serve():
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    return server, task, f"http://127.0.0.1:{port}"
+
+
+async def wait_done(client, headers, ids, timeout=30):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        rows = [(await client.get(f"/journal/entry/{i}", headers=headers)).json() for i in ids]
+        if all(r["analysis_status"] != "pending" for r in rows):
+            return rows
+        await asyncio.sleep(0.2)
+    return rows
+
+
+async def main():
+    gemini_service.GOOGLE_API_KEY = "stub"
+    gemini_service.get_model = lambda: FakeGeminiModel()
+    analysis_queue.ANALYSIS_RETRY_DELAY = 0.2
+
+    server, task, url = await serve()
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        token = (await client.post("/auth/anonymous-login")).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        times, ids = [], []
+        for i in range(10):
+            t0 = time.perf_counter()
+            r = await client.post("/journal/entry", headers=headers, json={"content": f"Exams all week, entry {i}"})
+            times.append(time.perf_counter() - t0)
+            ids.append(r.json()["id"])
+        print(f"1. POST /journal/entry   median {sorted(times)[5] * 1000:6.1f} ms   "
+              f"(provider takes {PROVIDER_DELAY * 1000:.0f} ms)   status {r.json()['analysis_status']}")
+        await wait_done(client, headers, ids)
+
+        t0 = time.perf_counter()
+        r = await client.post("/journal/entry", headers=headers, json={"content": "I can't sleep before my exam"})
+        entry_id = r.json()["id"]
+        async with client.stream("GET", f"/journal/entry/{entry_id}/events", headers=headers) as events:
+            async for line in events.aiter_lines():
+                if line.startswith("data:"):
+                    row = json.loads(line[5:])
+        print(f"2. subscribe             analysis after {(time.perf_counter() - t0) * 1000:6.0f} ms   "
+              f"status {row['analysis_status']}   stress {row['stress_score']}   emotion {row['emotion_label']}")
+
+        FakeGeminiModel.peak = 0
+        t0 = time.perf_counter()
+        burst = await asyncio.gather(*(client.post("/journal/entry", headers=headers, json={"content": f"burst {i}"})
+                                       for i in range(20)))
+        post_ms = (time.perf_counter() - t0) * 1000
+        rows = await wait_done(client, headers, [r.json()["id"] for r in burst])
+        print(f"3. burst of 20           all saved in {post_ms:6.0f} ms   analyzed in {time.perf_counter() - t0:5.1f} s   "
+              f"peak concurrent analyses {FakeGeminiModel.peak} (workers {analysis_queue.ANALYSIS_WORKERS})   "
+              f"done {sum(r['analysis_status'] == 'done' for r in rows)}/20")
+
+        r = await client.post("/journal/entry", headers=headers, json={"content": "flaky provider today"})
+        row = (await wait_done(client, headers, [r.json()["id"]]))[0]
+        print(f"4. provider fails twice  status {row['analysis_status']}   retries {analysis_queue.stats()['retries']}")
+
+    server.should_exit = True
+    await task
+
+    # Simulate a crash mid-analysis: rows are pending when the next process starts
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(models.JournalEntry).where(models.JournalEntry.id.in_(ids)).values(analysis_status="pending"))
+        await db.commit()
+    server, task, url = await serve()
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        rows = await wait_done(client, headers, ids)
+        print(f"5. restart               {sum(r['analysis_status'] == 'done' for r in rows)}/{len(ids)} "
+              f"re-queued entries analyzed")
+    server.should_exit = True
+    await task
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,142 @@
+# Layer 1 keyword scoring: the per-phrase substring scans it replaced vs the
+# compiled word-level Aho-Corasick matcher, on long journal-style entries (question
+# and therapist answer from aura-ml/dataset.csv) with the shipped lexicon and with
+# 2,000 extra crisis phrases. Also checks the matcher against a brute-force
+# word-boundary regex on the first 300 entries, and that every crisis and
+# high-stress message the substring matcher caught is still caught.
+#   cd aura-backend && python -m scripts.bench_keyword_matcher
+import csv
+import os
+import random
+import re
+import time
+from app.services.keyword_matcher import KeywordMatcher, REPORTED_AS, TIERS
+
+DATASET = os.path.join(os.path.dirname(__file__), "..", "..", "aura-ml", "dataset.csv")
+# The tier lists the substring matcher used
+LEGACY_TIERS = [
+    (10, ["die", "kill myself", "suicide", "end my life", "want to disappear", "no reason to live", "self harm"]),
+    (8, ["hopeless", "panic", "anxiety attack", "depressed", "worthless", "failure", "can't breathe", "overwhelmed"]),
+    (5, ["anxious", "stressed", "tired", "sad", "exam pressure", "lonely"]),
+    (2, ["okay", "fine", "normal"]),
+    (1, ["happy", "excited", "grateful", "motivated"]),
+]
+# Messages that must score at least what the substring matcher gave them
+SAFETY_CASES = [
+    "I have been self harming again", "I keep self harming", "I self harmed last night", "thinking about self-harm",
+    "I want to kill myself", "I keep thinking about killing myself", "I feel suicidal", "suicide crossed my mind",
+    "I want to end my life", "I've been thinking about ending my life", "I just want to die", "no reason to live anymore",
+    "I want to disappear", "I panicked at the exam", "I keep panicking", "I had a panic attack", "panic attacks every night",
+    "I feel hopeless", "I feel hopelessness everywhere", "pure worthlessness", "I feel worthless", "I'm such a failure",
+    "so many failures", "I get anxiety attacks before exams", "I can't breathe", "I'm overwhelmed", "I'm so depressed",
+]
+HF_KEYWORDS = ["exam", "failure", "lonely", "anxiety", "hopeless", "tired", "breakup", "deadline", "overwhelmed", "stress", "quit", "die", "kill", "suicide"]
+EXTRA_PHRASES = 2_000
+ROUNDS = 3
+
+
+def legacy_analyze(tiers, message):
+    # gemini_service.analyze_keywords before: one substring search per phrase, tier by tier
+    msg = message.lower()
+    for score, phrases in tiers:
+        for word in phrases:
+            if word in msg:
+                return score
+    return 0
+
+
+def legacy_detect(text):
+    text_lower = text.lower()
+    return [k for k in HF_KEYWORDS if k in text_lower]
+
+
+def legacy_message(tiers, text):
+    # Per chat message: groq's key-less branch scored twice, hf listed keywords once more
+    return legacy_analyze(tiers, text), legacy_analyze(tiers, text), legacy_detect(text)
+
+
+def _phrase_regex(phrase):
+    # "x*" matches any word starting with x
+    parts = [re.escape(w[:-1]) + r"[\w']*" if w.endswith("*") else re.escape(w) for w in re.findall(r"[\w']+\*?", phrase)]
+    return r"(?<![\w'])" + " ".join(parts) + r"(?![\w'])"
+
+
+def reference(tiers, text):
+    words = " ".join(re.findall(r"[\w']+", text.lower().replace("’", "'")))
+    found = {REPORTED_AS.get(p, p.replace("*", "")): s for s, phrases in reversed(tiers) for p in phrases
+             if re.search(_phrase_regex(p), words)}
+    return max(found.values(), default=0), sorted(found)
+
+
+def load_entries():
+    with open(DATASET, encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    return [f"{r['questionTitle']}\n{r['questionText']}\n{r['answerText']}" for r in rows]
+
+
+def per_entry_us(fn, entries):
+    best = float("inf")
+    for _ in range(ROUNDS):
+        t0 = time.perf_counter()
+        for entry in entries:
+            fn(entry)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(entries) * 1e6
+
+
+def main():
+    entries = load_entries()
+    long_entries = [e for e in entries if len(e) >= 2_000]
+    rng = random.Random(0)
+    # Words under a shipped "*" prefix are left out: the matcher rejects phrases that could never match
+    prefixes = tuple(w[:-1] for _, phrases in TIERS for p in phrases for w in p.split() if w.endswith("*"))
+    vocab = sorted({w for e in entries[:200] for w in re.findall(r"[a-z]+", e.lower())
+                    if len(w) > 3 and not w.startswith(prefixes)})
+    extra = sorted({" ".join(rng.sample(vocab, 2)) for _ in range(EXTRA_PHRASES)})
+    big_tiers = [(10, TIERS[0][1] + extra)] + TIERS[1:]
+
+    for label, tiers in (("shipped lexicon", TIERS), (f"+{len(extra)} crisis phrases", big_tiers)):
+        t0 = time.perf_counter()
+        matcher = KeywordMatcher(tiers)
+        build_ms = (time.perf_counter() - t0) * 1000
+        mismatches = 0
+        for e in entries[:300]:
+            score, found = matcher.scan(e)
+            mismatches += (score, sorted(found)) != reference(tiers, e)
+        phrases = sum(len(p) for _, p in tiers)
+        print(f"{label}: {phrases} phrases, {len(matcher.scores)} unique, automaton built in {build_ms:.1f} ms, "
+              f"{mismatches} mismatches vs brute-force regex on 300 entries")
+        for name, sample in (("all entries", entries), ("entries >= 2k chars", long_entries)):
+            avg = sum(map(len, sample)) / len(sample)
+            legacy = LEGACY_TIERS if tiers is TIERS else [(10, LEGACY_TIERS[0][1] + extra)] + LEGACY_TIERS[1:]
+            before = per_entry_us(lambda e: legacy_message(legacy, e), sample)
+            single = per_entry_us(lambda e: legacy_analyze(legacy, e), sample)
+            after = per_entry_us(matcher.scan, sample)
+            print(f"  {name:<20} n={len(sample):5d} avg {avg:5.0f} chars   "
+                  f"before {before:8.1f} us/message (one tier scan {single:7.1f})   after {after:7.1f} us")
+
+    matcher = KeywordMatcher(TIERS)
+    missed = [m for m in SAFETY_CASES if matcher.scan(m)[0] < legacy_analyze(LEGACY_TIERS, m)]
+    gained = [m for m in SAFETY_CASES if matcher.scan(m)[0] > legacy_analyze(LEGACY_TIERS, m)]
+    print(f"safety cases: {len(SAFETY_CASES)}, scored lower than the substring matcher: {missed or 'none'}")
+    print(f"  scored higher (inflections substring matching missed): {gained}")
+    assert not missed, "the matcher lost crisis or high-stress matches"
+
+    # What word boundaries change on real text: which substring hits no longer count
+    old_crisis = sum(legacy_analyze(LEGACY_TIERS, e) == 10 for e in entries)
+    new_crisis = sum(matcher.scan(e)[0] == 10 for e in entries)
+    print(f"entries scored as crisis: substring {old_crisis}, whole words {new_crisis} of {len(entries)}")
+    dropped = {}
+    for e in entries:
+        old, new = legacy_analyze(LEGACY_TIERS, e), matcher.scan(e)[0]
+        if old >= 8 and new < old:
+            text = e.lower()
+            phrase = next(p for s, phrases in LEGACY_TIERS if s == old for p in phrases if p in text)
+            for hit in re.findall(r"[\w']*" + re.escape(phrase) + r"[\w']*", text):
+                dropped[hit] = dropped.get(hit, 0) + 1
+    top = sorted(dropped.items(), key=lambda item: -item[1])[:15]
+    print(f"  substring hits in entries that dropped below their old tier (top 15): {top}")
+
+
+if __name__ == "__main__":
+    main()
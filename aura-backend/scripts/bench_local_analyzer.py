@@ -0,0 +1,100 @@
+# Offline analyzer (services/local_analyzer.py): accuracy on held-out dataset
+# questions, latency per entry, and the replies it now backs.
+#   cd aura-backend && python -m scripts.bench_local_analyzer
+#
+# 1. Held-out accuracy: a model built from the train/val questions of
+#    aura-ml/dataset.csv, scored on the test questions. The emotion a topic maps
+#    to is the label. Compared with the old fallback analysis (always "Calm").
+# 2. Latency per entry at several entry lengths, next to the keyword layer alone
+#    Crisis phrases must come back Negative / Depressed / 10.
+# 3. Fallback replies: no provider configured, and every provider failing
+import asyncio
+import csv
+import time
+import numpy as np
+from app.services import local_analyzer, provider_router, gemini_service, groq_service
+from app.services.keyword_matcher import scan_keywords, _words
+
+ENTRIES = [
+    "Exams all week and I can't sleep, so much pressure",
+    "Had a lovely walk with my sister today, feeling grateful",
+    "My husband and I fight every night about money",
+    "I keep drinking every night to forget",
+]
+CRISIS = ["I want to kill myself", "I want to end my life", "I feel suicidal", "I keep self harming",
+          "I just want to die, even though I'm grateful for my friends"]
+
+
+def held_out():
+    questions = {}
+    with open(local_analyzer.LEXICON_DATASET_PATH, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            questions.setdefault(row["questionID"], row)
+    split = {"train": [], "test": []}
+    for row in questions.values():
+        text = f"{row['questionTitle']} {row['questionText']}"
+        split["test" if row["split"] == "test" else "train"].append((text, row["topic"]))
+    return split["train"], split["test"]
+
+
+def per_entry_us(fn, texts, repeat):
+    times = []
+    for _ in range(repeat):
+        for text in texts:
+            t0 = time.perf_counter()
+            fn(text)
+            times.append(time.perf_counter() - t0)
+    times = np.array(times) * 1e6
+    return np.median(times), np.percentile(times, 99)
+
+
+async def main():
+    train, test = held_out()
+    t0 = time.perf_counter()
+    model = local_analyzer.LexiconModel(train)
+    build = time.perf_counter() - t0
+    topic_hits = emotion_hits = calm_hits = 0
+    for text, topic in test:
+        probs, _, _ = model.score(_words(text))
+        topic_hits += model.topics[int(probs.argmax())] == topic
+        emotion_hits += model.analyze(text)["emotion_detected"] == local_analyzer.TOPICS[topic][0]
+        calm_hits += local_analyzer.TOPICS[topic][0] == "Calm"
+    print(f"1. held-out ({len(test)} questions, {len(model.topics)} topics, built in {build * 1000:.0f} ms)   "
+          f"topic top-1 {topic_hits / len(test):.0%}   emotion {emotion_hits / len(test):.0%}   "
+          f"old fallback emotion {calm_hits / len(test):.0%}")
+    for entry in ENTRIES:
+        print(f"   {entry!r:62} {model.analyze(entry)}")
+    crisis = [model.analyze(text) for text in CRISIS]
+    wrong = [(text, a) for text, a in zip(CRISIS, crisis)
+             if (a["sentiment"], a["emotion_detected"], a["stress_score"]) != ("Negative", "Depressed", 10)]
+    print(f"   crisis phrases: {len(CRISIS) - len(wrong)}/{len(CRISIS)} Negative / Depressed / 10")
+    assert not wrong, wrong
+
+    local_analyzer.get_model()
+    print("2. latency per entry (median / p99)")
+    for label, texts in (("one line", ENTRIES),
+                         ("dataset question", [t for t, _ in test]),
+                         ("1.3k chars", [" ".join(t for t, _ in test[i:i + 4])[:1300] for i in range(0, 36, 4)]),
+                         ("2.7k chars", [" ".join(t for t, _ in test[i:i + 8])[:2700] for i in range(0, 32, 8)])):
+        repeat = max(1, 2000 // len(texts))
+        kw50, kw99 = per_entry_us(scan_keywords, texts, repeat)
+        la50, la99 = per_entry_us(local_analyzer.analyze, texts, repeat)
+        print(f"   {label:<17} local_analyzer {la50:6.0f} / {la99:6.0f} us   keyword layer alone {kw50:6.0f} / {kw99:6.0f} us")
+
+    print("3. fallback replies")
+    gemini_service.GOOGLE_API_KEY = None
+    groq_service.GROQ_API_KEY = None
+    provider, data = await provider_router.route("gemini", ENTRIES[0])
+    print(f"   nothing configured     provider {provider}   analysis {data['analysis']}")
+
+    async def failing(message, keyword_score, crisis_flag):
+        raise RuntimeError("HTTP 503")
+    gemini_service.GOOGLE_API_KEY = groq_service.GROQ_API_KEY = "stub"
+    for state in provider_router.PROVIDERS.values():
+        state.fetch = failing
+    provider, data = await provider_router.route("gemini", ENTRIES[2])
+    print(f"   every provider failing provider {provider}   analysis {data['analysis']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+# Provider response cache on a chat mix of short repeats ("hi", "thank you", ...),
+# unique messages and crisis messages, against stub Gemini and Groq backends with
+# a fixed round-trip delay. Reports hit rate, latency saved and the cost of a hit,
+# and checks that crisis messages always reach the provider.
+#   cd aura-backend && python -m scripts.bench_response_cache
+import asyncio
+import json
+import random
+import time
+import httpx
+from app.services import gemini_service, groq_service, response_cache
+
+PROVIDER_DELAY = 0.1
+MESSAGES = 300
+REPEATS = ["hi", "Hi!", "hello", "hey", "thank you", "Thank you!!", "thanks", "I'm fine", "i’m fine.",
+           "okay", "ok", "good morning", "good night", "bye", "I feel better now"]
+CRISIS = ["I want to die", "i want to end my life", "I keep thinking about self harm"]
+REPLY = {"reply": "I'm really glad you're here. How has your day been so far? \U0001F33F",
+         "analysis": {"sentiment": "Neutral", "emotion_detected": "Calm", "stress_score": 2,
+                      "keywords_found": [], "recommended_action": "Rest", "crisis_flag": False}}
+
+provider_calls = []
+
+
+class _Response:
+    text = json.dumps(REPLY)
+
+
+class FakeGeminiModel:
+    async def generate_content_async(self, query, stream=False):
+        provider_calls.append(query.rsplit("User Message: ", 1)[1])
+        await asyncio.sleep(PROVIDER_DELAY)
+        return _Response()
+
+
+async def groq_handler(request):
+    provider_calls.append(json.loads(request.content)["messages"][-1]["content"])
+    await asyncio.sleep(PROVIDER_DELAY)
+    return httpx.Response(200, json={"choices": [{"message": {"content": json.dumps(REPLY)}}]})
+
+
+def workload(seed=0):
+    # 60% short repeats, 35% unique messages, 5% crisis
+    rng = random.Random(seed)
+    out = []
+    for i in range(MESSAGES):
+        r = rng.random()
+        if r < 0.60:
+            out.append(rng.choice(REPEATS))
+        elif r < 0.95:
+            out.append(f"Today was long, I had a meeting about project {i} and then cooked dinner")
+        else:
+            out.append(rng.choice(CRISIS))
+    return out
+
+
+async def run(provider, messages):
+    call = gemini_service.get_gemini_response if provider == "gemini" else groq_service.get_groq_response
+    t0 = time.perf_counter()
+    for message in messages:
+        await call(message)
+    return time.perf_counter() - t0
+
+
+async def main():
+    gemini_service.get_model = lambda: FakeGeminiModel()
+    groq_service.GROQ_API_KEY = "stub"
+    stub_client = httpx.AsyncClient(transport=httpx.MockTransport(groq_handler))
+    groq_service.get_client = lambda provider: stub_client
+    messages = workload()
+    crisis = sum(m in CRISIS for m in messages)
+
+    print(f"{MESSAGES} messages ({crisis} crisis), provider round trip {PROVIDER_DELAY * 1000:.0f} ms")
+    for provider in ("gemini", "groq"):
+        for enabled in (False, True):
+            response_cache.RESPONSE_CACHE_ENABLED = enabled
+            response_cache.clear()
+            response_cache._stats.update(hits=0, misses=0, evictions=0, skipped_crisis=0, saved_seconds=0.0)
+            provider_calls.clear()
+            elapsed = await run(provider, messages)
+            s = response_cache.stats()
+            crisis_calls = sum(m in CRISIS for m in provider_calls)
+            assert crisis_calls == crisis, "a crisis message was answered from the cache"
+            print(f"  {provider:<6} cache {'on ' if enabled else 'off'}  {elapsed:6.2f} s   provider calls {len(provider_calls):3d}   "
+                  f"hit rate {s['hit_rate']:5.1%}   saved {s['saved_seconds']:5.2f} s   "
+                  f"crisis skipped {s['skipped_crisis']:2d}   entries {s['size']}")
+
+    # What a hit costs: normalize, hash, decrypt, parse
+    response_cache.RESPONSE_CACHE_ENABLED = True
+    response_cache.put("gemini", "hi", REPLY, PROVIDER_DELAY)
+    n = 2_000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        response_cache.get("gemini", "Hi!", False)
+    print(f"cost of a hit: {(time.perf_counter() - t0) / n * 1e6:.0f} us")
+    await stub_client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
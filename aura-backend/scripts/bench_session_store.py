@@ -0,0 +1,122 @@
+# Mini-Aura conversation memory: the old unbounded dict vs the session stores.
+#   1. 50k one-off sessions: memory held by each (tracemalloc) and evictions
+#   2. idle TTL: expired sessions are forgotten
+#   3. hit rate and per-call latency with returning users
+#   4. SQLite backend shared by two worker processes
+#   cd aura-backend && python -m scripts.bench_session_store
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from app.services.session_store import MemorySessionStore, SQLiteSessionStore
+
+USERS = 50_000
+TURN = "User: I have exams next week and I can't sleep, everything feels like too much."
+REPLY = "Aura: That sounds exhausting. Would a short breathing exercise help before bed? \U0001F33F"
+
+
+def legacy(sessions, session_id):
+    # The previous local_llm_service behaviour: a module-level dict, never evicted
+    sessions.setdefault(session_id, []).extend([TURN, REPLY])
+    sessions[session_id] = sessions[session_id][-10:]
+
+
+def turn(store, session_id):
+    history = store.get(session_id)
+    store.put(session_id, (history + [TURN, REPLY])[-10:])
+
+
+def held(fill):
+    tracemalloc.start()
+    obj = fill()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size / 1e6
+
+
+def bounded_memory():
+    def fill_dict():
+        sessions = {}
+        for i in range(USERS):
+            legacy(sessions, f"s{i}")
+        return sessions
+
+    def fill_store():
+        store = MemorySessionStore(maxsize=5_000, ttl=3600, max_bytes=4 * 1024 * 1024)
+        for i in range(USERS):
+            turn(store, f"s{i}")
+        return store
+
+    sessions, dict_mb = held(fill_dict)
+    store, store_mb = held(fill_store)
+    print(f"{USERS} sessions, one turn each")
+    print(f"  dict (before)       {len(sessions):6d} kept   {dict_mb:6.1f} MB")
+    s = store.stats()
+    print(f"  MemorySessionStore  {s['size']:6d} kept   {store_mb:6.1f} MB   "
+          f"evictions {s['evictions']}   history bytes {s['bytes'] / 1e6:.1f} MB")
+
+
+def ttl():
+    store = MemorySessionStore(maxsize=100, ttl=0.2)
+    turn(store, "idle")
+    turn(store, "active")
+    time.sleep(0.15)
+    turn(store, "active")
+    time.sleep(0.1)
+    idle, active = store.get("idle"), store.get("active")
+    print(f"TTL 0.2 s: idle session forgotten: {idle == []}, active session kept: {len(active) == 4}, "
+          f"evictions {store.stats()['evictions']}")
+
+
+def hit_rate(store, label, turns=20_000, users=2_000):
+    # Returning users: 80% of turns come from the most active 20% of sessions
+    rng = random.Random(0)
+    hot = users // 5
+    t0 = time.perf_counter()
+    for _ in range(turns):
+        session_id = f"u{rng.randrange(hot)}" if rng.random() < 0.8 else f"u{rng.randrange(hot, users)}"
+        turn(store, session_id)
+    us = (time.perf_counter() - t0) / turns * 1e6
+    s = store.stats()
+    print(f"  {label:<28} hit rate {s['hit_rate']:5.1%}   size {s['size']:5d}   "
+          f"{us:7.1f} us per turn (get + put)   evictions {s['evictions']}")
+
+
+def worker(path, name, ready, done):
+    store = SQLiteSessionStore(path=path)
+    if name == "a":
+        turn(store, "shared")
+        ready.set()
+    else:
+        ready.wait()
+        turn(store, "shared")  # continues the conversation worker a started
+    done.put((name, len(store.get("shared"))))
+
+
+def shared_sqlite(path):
+    ready = multiprocessing.Event()
+    done = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=worker, args=(path, n, ready, done)) for n in ("a", "b")]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    results = dict(done.get() for _ in procs)
+    print(f"SQLite shared by two processes: worker b saw worker a's turn and appended its own "
+          f"-> {results['b']} lines (expected 4): {results['b'] == 4}")
+
+
+if __name__ == "__main__":
+    bounded_memory()
+    print()
+    ttl()
+    print()
+    print("Returning users, 20k turns over 2k sessions")
+    hit_rate(MemorySessionStore(), "memory, room for everyone")
+    hit_rate(MemorySessionStore(maxsize=1_000), "memory, maxsize 1000")
+    with tempfile.TemporaryDirectory() as tmp:
+        hit_rate(SQLiteSessionStore(path=os.path.join(tmp, "sessions.db")), "sqlite (encrypted)")
+        print()
+        shared_sqlite(os.path.join(tmp, "shared.db"))
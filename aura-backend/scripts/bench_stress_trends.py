@@ -0,0 +1,177 @@
+# Stress trends from daily_mood_rollup vs aggregating raw journal entries.
+#   cd aura-backend && python -m scripts.bench_stress_trends
+#
+# 1. Migration 0004 backfills the rollups from existing entries, with the same
+#    result as the rebuild job
+# 2. Trend reads over 7 / 90 / 365 days for a journaling user (3 entries a day)
+#    and a chatty one (40 messages a day): raw entries aggregated per request vs
+#    the rollup range scan
+# 3. Incremental updates through the API: journal entries (counted when their
+#    analysis finishes) and concurrent chat messages match a rebuild exactly
+# Uses a throwaway SQLite database unless DATABASE_URL is set.
+import asyncio
+import datetime
+import json
+import os
+import random
+import socket
+import statistics
+import tempfile
+import time
+import uuid
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/aura_trends.db"
+os.environ.setdefault("AURA_PRELOAD_MODEL", "false")
+
+import httpx
+import uvicorn
+from alembic import command
+from sqlalchemy import insert, select
+from app import models
+from app.database import AsyncSessionLocal, engine
+from app.main import app
+from app.migrations import get_config, upgrade_database
+from app.services import gemini_service, mood_rollup
+
+USERS = 100
+DAYS = 365
+PER_DAY = 3
+HEAVY_PER_DAY = 40  # the last user: a year of daily chatting
+EMOTIONS = ["Anxious", "Calm", "Sad", "Happy", "Overwhelmed"]
+
+
+def seed():
+    rng = random.Random(0)
+    today = datetime.datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    user_ids = [str(uuid.uuid4()) for _ in range(USERS)]
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [{"id": u} for u in user_ids])
+        for user_id in user_ids:
+            per_day = HEAVY_PER_DAY if user_id == user_ids[-1] else PER_DAY
+            rows = []
+            for d in range(DAYS):
+                for k in range(per_day):
+                    rows.append({
+                        "encrypted_content": "x", "user_id": user_id, "analysis_status": "done",
+                        "created_at": today - datetime.timedelta(days=d) + datetime.timedelta(minutes=30 + 20 * k),
+                        "stress_score": float(rng.randint(1, 9)), "sentiment_score": float(rng.choice((-1, 0, 1))),
+                        "emotion_label": rng.choice(EMOTIONS),
+                    })
+            conn.execute(insert(models.JournalEntry), rows)
+    return user_ids[0], user_ids[-1]
+
+
+async def snapshot(user_id=None):
+    async with AsyncSessionLocal() as db:
+        query = select(models.DailyMoodRollup)
+        if user_id:
+            query = query.filter(models.DailyMoodRollup.user_id == user_id)
+        return {(r.user_id, r.day): (r.entry_count, r.stress_count, round(r.stress_sum, 6), r.stress_min, r.stress_max,
+                                     round(r.sentiment_sum, 6), json.loads(r.emotion_counts))
+                for r in (await db.scalars(query)).all()}
+
+
+async def raw_trends(db, user_id, days):
+    # What a trend over raw rows costs: every entry in the window, aggregated per request
+    since = datetime.datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - datetime.timedelta(days=days - 1)
+    entry = models.JournalEntry
+    rows = (await db.execute(select(entry.created_at, entry.stress_score, entry.sentiment_score, entry.emotion_label)
+                             .filter(entry.user_id == user_id, entry.created_at >= since))).all()
+    by_day = {}
+    for created_at, stress, sentiment, emotion in rows:
+        by_day.setdefault(created_at.date(), []).append(stress)
+    return [{"date": d.isoformat(), "stress": round(sum(v) / len(v), 1)} for d, v in sorted(by_day.items())]
+
+
+async def timed(fn, runs=30):
+    times = []
+    for _ in range(runs):
+        async with AsyncSessionLocal() as db:
+            t0 = time.perf_counter()
+            result = await fn(db)
+            times.append(time.perf_counter() - t0)
+    return statistics.median(times) * 1000, result
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class FakeGeminiModel:
+    class _Response:
+        text = json.dumps({"reply": "I hear you.", "analysis": {
+            "sentiment": "Negative", "emotion_detected": "Anxious", "stress_score": 7,
+            "keywords_found": [], "recommended_action": "Breathing Exercise", "crisis_flag": False}})
+
+    async def generate_content_async(self, query, stream=False):
+        await asyncio.sleep(0.2)
+        return self._Response()
+
+
+async def main():
+    command.upgrade(get_config(), "0003")
+    t0 = time.perf_counter()
+    light, heavy = seed()
+    print(f"seeded {(USERS - 1) * DAYS * PER_DAY + DAYS * HEAVY_PER_DAY} entries for {USERS} users "
+          f"in {time.perf_counter() - t0:.1f} s")
+    t0 = time.perf_counter()
+    upgrade_database()
+    migrated = await snapshot()
+    migrate_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    rows = await mood_rollup.rebuild()
+    rebuild_s = time.perf_counter() - t0
+    print(f"1. migration backfill {len(migrated)} rows in {migrate_s:.1f} s   rebuild job {rows} rows in {rebuild_s:.1f} s   "
+          f"identical: {migrated == await snapshot()}")
+
+    print("2. trends (median of 30)")
+    for label, user_id, per_day in (("3 entries/day", light, PER_DAY), ("40 chats/day", heavy, HEAVY_PER_DAY)):
+        for days, granularity in ((7, "day"), (90, "week"), (365, "month")):
+            raw_ms, raw = await timed(lambda db: raw_trends(db, user_id, days))
+            rollup_ms, points = await timed(lambda db: mood_rollup.trends(db, user_id, days, granularity))
+            _, daily = await timed(lambda db: mood_rollup.trends(db, user_id, days, "day"), runs=1)
+            same = [p["stress"] for p in raw] == [p["stress"] for p in daily]
+            print(f"   {label:<14} {days:3d} days   raw entries {raw_ms:6.2f} ms ({len(raw) * per_day:5d} rows)   "
+                  f"rollup {rollup_ms:5.2f} ms ({min(days, DAYS)} rows -> {len(points):2d} {granularity} points)   "
+                  f"daily means match: {same}")
+
+    gemini_service.GOOGLE_API_KEY = "stub"
+    gemini_service.get_model = lambda: FakeGeminiModel()
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+        token = (await client.post("/auth/anonymous-login")).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        ids = [(await client.post("/journal/entry", headers=headers, json={"content": f"exam week {i}"})).json()["id"]
+               for i in range(10)]
+        before_analysis = await client.get("/analytics/stress-trends", headers=headers)
+        await asyncio.gather(*(client.post("/chat/message", headers=headers, json={"message": f"hello {i}"})
+                               for i in range(20)))
+        for _ in range(100):
+            rows = [(await client.get(f"/journal/entry/{i}", headers=headers)).json() for i in ids]
+            if all(r["analysis_status"] != "pending" for r in rows):
+                break
+            await asyncio.sleep(0.1)
+        week = (await client.get("/analytics/stress-trends?days=7&granularity=week", headers=headers)).json()
+        today = (await client.get("/analytics/stress-trends", headers=headers)).json()
+    server.should_exit = True
+    await task
+
+    async with AsyncSessionLocal() as db:
+        new_user = await db.scalar(select(models.JournalEntry.user_id).filter(models.JournalEntry.id == ids[0]))
+    incremental = await snapshot(new_user)
+    await mood_rollup.rebuild(new_user)
+    print(f"3. API writes   journal entries counted before analysis: {sum(p['count'] for p in before_analysis.json())}   "
+          f"after: {today[-1]['count']} (10 journal + 20 concurrent chats)   matches rebuild: {incremental == await snapshot(new_user)}")
+    print(f"   /analytics/stress-trends        {today}")
+    print(f"   ?days=7&granularity=week        {[(p['name'], p['stress'], p['count']) for p in week]}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
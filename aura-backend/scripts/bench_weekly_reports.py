@@ -0,0 +1,163 @@
+# The weekly report batch job against a stub LLM with fixed latency.
+#   cd aura-backend && python -m scripts.bench_weekly_reports
+#
+# 1. Throughput in users/min at concurrency 1, 8 and 32. Inactive users, pending
+#    entries and users whose entries are all still pending are left out.
+# 2. Resumability: a run killed partway, then rerun, writes each missing report
+#    exactly once and skips the ones already written
+# 3. Provider down: nothing is written and the users count as failed; the next
+#    run fills them in
+# 4. The dashboard shows the precomputed report
+# Uses a throwaway SQLite database unless DATABASE_URL is set.
+import asyncio
+import datetime
+import json
+import os
+import random
+import tempfile
+import time
+import uuid
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/aura_weekly.db"
+os.environ.setdefault("AURA_PRELOAD_MODEL", "false")
+
+import httpx
+from sqlalchemy import delete, func, insert, select
+from app import models
+from app.database import AsyncSessionLocal, engine
+from app.main import app
+from app.migrations import upgrade_database
+from app.services import analysis_queue, encryption, gemini_service, provider_router, weekly_reports
+
+ACTIVE = 400
+INACTIVE = 200
+PENDING_ONLY = 20  # wrote this week, nothing analyzed yet
+LATENCY = 0.1  # seconds per LLM call
+CHUNK = 100
+EMOTIONS = ["Anxious", "Calm", "Sad", "Happy", "Overwhelmed"]
+# Entries run up to now, so the period ending tomorrow covers them
+PERIOD_END = datetime.datetime.utcnow().date() + datetime.timedelta(days=1)
+calls = []
+
+
+class FakeGeminiModel:
+    down = False
+
+    class _Response:
+        text = json.dumps({"reply": "A steadier week than the last one. Try a short walk after classes.", "analysis": {
+            "sentiment": "Neutral", "emotion_detected": "Calm", "stress_score": 4,
+            "keywords_found": [], "recommended_action": "None", "crisis_flag": False}})
+
+    async def generate_content_async(self, query, stream=False):
+        calls.append(query)
+        await asyncio.sleep(LATENCY)
+        if FakeGeminiModel.down:
+            raise RuntimeError("503 Service Unavailable")
+        return self._Response()
+
+
+def seed():
+    rng = random.Random(0)
+    now = datetime.datetime.utcnow()
+    user_ids = [str(uuid.uuid4()) for _ in range(ACTIVE + INACTIVE + PENDING_ONLY)]
+    # Pending entries get analyzed once the queue starts in step 4
+    content = encryption.encrypt_content("Group project is behind and I can't sleep.")
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [{"id": u} for u in user_ids])
+        rows = []
+        for i, user_id in enumerate(user_ids):
+            # Inactive users last wrote 10-30 days ago
+            ages = ([rng.uniform(0, 5.5) for _ in range(rng.randint(1, 12))] if i < ACTIVE
+                    else [rng.uniform(10, 30)] if i < ACTIVE + INACTIVE else [])
+            for age in ages:
+                rows.append({
+                    "encrypted_content": "x", "user_id": user_id, "analysis_status": "done",
+                    "created_at": now - datetime.timedelta(days=age), "stress_score": float(rng.randint(1, 9)),
+                    "emotion_label": rng.choice(EMOTIONS),
+                })
+            if i < 20 or i >= ACTIVE + INACTIVE:
+                rows.append({"encrypted_content": content, "user_id": user_id, "analysis_status": "pending",
+                             "created_at": now - datetime.timedelta(hours=1), "stress_score": 3.0,
+                             "emotion_label": "Calm"})
+        conn.execute(insert(models.JournalEntry), rows)
+
+
+async def report_count():
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(func.count()).select_from(models.WeeklyReport)
+                               .filter(models.WeeklyReport.period_end == PERIOD_END))
+
+
+async def reset():
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(models.WeeklyReport))
+        await db.commit()
+
+
+async def main():
+    upgrade_database()
+    seed()
+    gemini_service.GOOGLE_API_KEY = "stub"
+    gemini_service.get_model = lambda: FakeGeminiModel()
+
+    print(f"1. {ACTIVE} active + {INACTIVE} inactive + {PENDING_ONLY} pending-only users, "
+          f"{LATENCY * 1000:.0f} ms per LLM call, chunks of {CHUNK}")
+    for concurrency in (1, 8, 32):
+        await reset()
+        calls.clear()
+        stats = await weekly_reports.run(PERIOD_END, CHUNK, concurrency)
+        print(f"   concurrency {concurrency:2d}   {stats['users_per_minute']:8.0f} users/min   "
+              f"{stats['generated']} written in {stats['seconds']} s   users picked up {stats['users']}   "
+              f"LLM calls {len(calls)}\n")
+    prompt = "WEEKLY MOOD REPORT: " + calls[0].split("WEEKLY MOOD REPORT: ")[-1] if calls else ""
+    print(f"   sample prompt: {prompt[:300]}...")
+
+    print("2. interrupted run")
+    await reset()
+    calls.clear()
+    job = asyncio.create_task(weekly_reports.run(PERIOD_END, CHUNK, 8))
+    await asyncio.sleep(2.0)
+    job.cancel()
+    await asyncio.sleep(LATENCY * 2)  # let the in-flight writes settle
+    written = await report_count()
+    stats = await weekly_reports.run(PERIOD_END, CHUNK, 8)
+    print(f"   killed after {written} reports; rerun skipped {stats['skipped_existing']}, wrote {stats['generated']}   "
+          f"total {await report_count()} of {ACTIVE}   LLM calls {len(calls)}\n")
+
+    print("3. provider down")
+    await reset()
+    FakeGeminiModel.down = True
+    cooldown, provider_router.BREAKER_COOLDOWN = provider_router.BREAKER_COOLDOWN, 0
+    stats = await weekly_reports.run(PERIOD_END, CHUNK, 32)
+    print(f"   down: failed {stats['failed']}, written {await report_count()}\n")
+    FakeGeminiModel.down = False
+    # The open breaker lets one probe through; the run after it finds the provider healthy
+    for attempt in (1, 2):
+        stats = await weekly_reports.run(PERIOD_END, CHUNK, 32)
+        print(f"   back up, run {attempt}: written {stats['generated']}, failed {stats['failed']}, "
+              f"total {await report_count()} of {ACTIVE}\n")
+    provider_router.BREAKER_COOLDOWN = cooldown
+
+    print("4. dashboard")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://aura.test") as client:
+        token = (await client.post("/auth/anonymous-login")).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        before = (await client.get("/analytics/dashboard", headers=headers)).json()["weekly_report"]
+        entry_id = (await client.post("/journal/entry", headers=headers,
+                                      json={"content": "Exams all week, barely slept."})).json()["id"]
+        pending = await weekly_reports.run(PERIOD_END, CHUNK, 8)
+        await analysis_queue.start()  # the ASGI transport skips the app's startup
+        status = await analysis_queue.wait_for(entry_id, 5)
+        analyzed = await weekly_reports.run(PERIOD_END, CHUNK, 8)
+        after = (await client.get("/analytics/dashboard", headers=headers)).json()["weekly_report"]
+        await analysis_queue.stop()
+    # Starting the queue also analyzes the seeded pending entries, so the pending-only users get theirs too
+    print(f"   entry still pending: {pending['generated']} written   "
+          f"entry {status}: {analyzed['generated']} written (the new user + {PENDING_ONLY} pending-only users)")
+    print(f"   before the job: {before}\n   after the job:  {after}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+# Event-loop responsiveness and backpressure while Mini-Aura is generating.
+#   cd aura-backend && python -m scripts.check_inference_backpressure
+#
+# 1. Loop lag: a probe task sleeps 5 ms in a loop (a stand-in for Gemini/Groq
+#    handlers, which only await I/O) while 8 local replies are generated, first
+#    on the event loop, then through the scheduler on the dedicated executor.
+# 2. Overload: 64 requests hit a scheduler whose queue holds 8; the excess must
+#    be rejected immediately.
+# 3. Timeout: a request with a tiny budget must give up and leave the batch.
+import asyncio
+import time
+
+import torch
+from app.services import local_llm_service as aura
+from app.services.inference_scheduler import InferenceScheduler, InferenceOverloaded, InferenceTimeout
+from scripts.bench_inference_scheduler import PROMPTS, load
+
+NEW_TOKENS = 100
+
+
+async def probe(stop, lags):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        t0 = loop.time()
+        await asyncio.sleep(0.005)
+        lags.append(loop.time() - t0 - 0.005)
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] * 1000
+
+
+async def loop_lag(model, prompts, on_loop):
+    stop, lags = asyncio.Event(), []
+    task = asyncio.create_task(probe(stop, lags))
+    await asyncio.sleep(0.05)
+    t0 = time.perf_counter()
+    if on_loop:
+        for p in prompts:
+            await asyncio.sleep(0)
+            with torch.no_grad():
+                model.generate(p.unsqueeze(0), NEW_TOKENS, temperature=0.7)
+    else:
+        scheduler = InferenceScheduler(model, aura.block_size, executor=aura.get_executor())
+        await asyncio.gather(*[scheduler.submit(p, max_new_tokens=NEW_TOKENS) for p in prompts])
+        scheduler.stop()
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await task
+    return elapsed, pct(lags, 0.5), pct(lags, 0.99), max(lags) * 1000
+
+
+async def overload(model, prompts):
+    scheduler = InferenceScheduler(model, aura.block_size, max_batch_size=8, max_queue=8,
+                                   executor=aura.get_executor())
+    rejected, served, reject_times = 0, 0, []
+
+    async def one(p):
+        nonlocal rejected, served
+        t0 = time.perf_counter()
+        try:
+            await scheduler.submit(p, max_new_tokens=NEW_TOKENS)
+            served += 1
+        except InferenceOverloaded:
+            rejected += 1
+            reject_times.append(time.perf_counter() - t0)
+
+    await asyncio.gather(*[one(prompts[i % len(prompts)]) for i in range(64)])
+    scheduler.stop()
+    return served, rejected, max(reject_times) * 1000 if reject_times else 0.0
+
+
+async def timeout(model, prompt):
+    scheduler = InferenceScheduler(model, aura.block_size, executor=aura.get_executor())
+    t0 = time.perf_counter()
+    try:
+        await scheduler.submit(prompt, max_new_tokens=5000, timeout=0.2)
+        result = "completed (unexpected)"
+    except InferenceTimeout:
+        result = "timed out"
+    waited = time.perf_counter() - t0
+    await asyncio.sleep(0.1)
+    stats = scheduler.stats()
+    scheduler.stop()
+    return result, waited, stats["active"]
+
+
+async def main():
+    model, tokenizer = load()
+    prompts = [torch.from_numpy(tokenizer.encode_array(PROMPTS[i % len(PROMPTS)])) for i in range(8)]
+    print(f"torch threads in the inference worker: {aura.TORCH_THREADS}")
+
+    print("Loop lag while generating 8 replies (ms)")
+    for label, on_loop in (("on the event loop", True), ("dedicated executor", False)):
+        elapsed, p50, p99, worst = await loop_lag(model, prompts, on_loop)
+        print(f"  {label:<20} {elapsed:6.2f} s   lag p50 {p50:7.2f}  p99 {p99:7.2f}  max {worst:7.2f}")
+
+    served, rejected, worst = await overload(model, prompts)
+    print(f"Overload: 64 requests, queue 8 -> served {served}, rejected {rejected} (slowest rejection {worst:.2f} ms)")
+
+    result, waited, active = await timeout(model, prompts[0])
+    print(f"Timeout: 0.2 s budget -> {result} after {waited:.2f} s, {active} sequences left in the batch")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,189 @@
+# Provider router against local stub providers with injected latency and failures.
+# Times are scaled down: the provider timeout is 1 s here instead of 30 s.
+#   cd aura-backend && python -m scripts.check_provider_router
+#
+# 1. Gemini hangs: without the router every request waits for the timeout and
+#    gets a canned reply; with it the breaker opens after 5 timeouts and the
+#    rest go straight to Groq.
+# 2. Recovery: after the cooldown one probe reaches Gemini and closes the breaker.
+# 3. Gemini fails half of its calls fast: error rate is tracked and failover
+#    answers every request.
+# 4. Tail latency: 3% of Gemini calls take 0.8 s. Hedging after Gemini's p95 cuts
+#    p99 for a few percent extra provider calls.
+# 5. Everything down: the fallback reply keeps the keyword layer's crisis flag.
+# 6. Streaming with every breaker open: the fallback reply is streamed without
+#    an upstream stream being opened; after the cooldown one stream probes.
+import asyncio
+import random
+import time
+from app.services import provider_router as router
+from app.services.provider_router import ProviderState
+
+
+class Stub:
+    def __init__(self, name, latency=0.1, fail_rate=0.0, tail_rate=0.0, tail=2.0, seed=0):
+        self.name = name
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.tail_rate = tail_rate
+        self.tail = tail
+        self.hang = False
+        self.calls = 0
+        self.streams = 0
+        self.rng = random.Random(seed)
+
+    async def fetch(self, message, keyword_score, crisis_flag):
+        self.calls += 1
+        if self.hang:
+            await asyncio.sleep(3600)
+        slow = self.rng.random() < self.tail_rate
+        await asyncio.sleep(self.tail if slow else self.latency)
+        if self.rng.random() < self.fail_rate:
+            raise RuntimeError(f"{self.name} HTTP 500")
+        return {"reply": f"{self.name} reply", "analysis": {"stress_score": keyword_score or 1, "crisis_flag": crisis_flag}}
+
+    async def stream(self, message):
+        self.streams += 1
+        await asyncio.sleep(self.latency)
+        if self.hang:
+            await asyncio.sleep(3600)
+        yield "token", f"{self.name} "
+        yield "token", "reply"
+        yield "done", {"reply": f"{self.name} reply", "analysis": {}}
+
+    def configured(self):
+        return True
+
+    async def unconfigured_reply(self, message):
+        return {"reply": "no key", "analysis": {}}
+
+    def error_reply(self, message, keyword_score, crisis_flag):
+        return {"reply": "canned", "analysis": {"stress_score": keyword_score or 1, "crisis_flag": crisis_flag}}
+
+
+def install(gemini, groq, failover=True, hedge=False, breaker_failures=5):
+    router.FAILOVER_ENABLED = failover
+    router.HEDGE_ENABLED = hedge
+    router.BREAKER_FAILURES = breaker_failures
+    router.PROVIDERS = {
+        stub.name: ProviderState(stub.name, stub.fetch, stub.stream, stub.configured, stub.unconfigured_reply,
+                                  stub.error_reply)
+        for stub in (gemini, groq)
+    }
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def timed(message="I had a long day"):
+    t0 = time.perf_counter()
+    provider, data = await router.route("gemini", message)
+    return time.perf_counter() - t0, provider, data
+
+
+async def streamed(message="I had a long day"):
+    return [event async for event in router.stream("gemini", message)]
+
+
+async def sequential(n):
+    return [await timed() for _ in range(n)]
+
+
+async def concurrent(n, width=8):
+    sem = asyncio.Semaphore(width)
+
+    async def one():
+        async with sem:
+            return await timed()
+    return await asyncio.gather(*(one() for _ in range(n)))
+
+
+def check(label, ok):
+    print(f"  [{'ok' if ok else 'FAILED'}] {label}")
+    return ok
+
+
+async def main():
+    router.PROVIDER_TIMEOUT = 1.0
+    router.BREAKER_COOLDOWN = 10.0  # longer than scenario 1, so no probe happens during it
+    results = []
+
+    print("1. Gemini hangs, 30 requests (timeout 1 s)")
+    for label, kwargs in (("without router", dict(failover=False, breaker_failures=10**9)), ("with router", {})):
+        gemini, groq = Stub("gemini"), Stub("groq")
+        gemini.hang = True
+        install(gemini, groq, **kwargs)
+        runs = await sequential(30)
+        times = [r[0] for r in runs]
+        waited = sum(t >= 1.0 for t in times)
+        canned = sum(r[1] is None for r in runs)
+        print(f"     {label:<15} total {sum(times):5.1f} s   mean {sum(times) / len(times) * 1000:5.0f} ms   "
+              f"waited for timeout {waited:2d}   canned replies {canned:2d}   "
+              f"gemini breaker {router.PROVIDERS['gemini'].breaker()}")
+    results.append(check("breaker opened after 5 timeouts, later requests skip Gemini", waited == 5 and canned == 0))
+
+    print("2. Gemini recovers")
+    gemini.hang = False
+    router.BREAKER_COOLDOWN = 0.5
+    await asyncio.sleep(router.BREAKER_COOLDOWN)
+    runs = await sequential(5)
+    results.append(check(f"probe closed the breaker, answers from {[r[1] for r in runs]}",
+                         router.PROVIDERS["gemini"].breaker() == "closed" and all(r[1] == "gemini" for r in runs)))
+
+    print("3. Gemini fails 50% of calls fast")
+    install(Stub("gemini", fail_rate=0.5, seed=1), Stub("groq"), breaker_failures=10**9)
+    runs = await sequential(100)
+    s = router.stats()["providers"]["gemini"]
+    results.append(check(f"error rate {s['error_rate']:.2f}, {sum(r[1] is not None for r in runs)}/100 answered, "
+                         f"gemini p50 {s['p50_ms']} ms", 0.35 < s["error_rate"] < 0.65 and all(r[1] for r in runs)))
+
+    print("4. 3% of Gemini calls take 0.8 s, Groq 150 ms; 400 requests, 8 at a time")
+    summary = {}
+    for hedge in (False, True):
+        gemini, groq = Stub("gemini", tail_rate=0.03, tail=0.8, seed=2), Stub("groq", latency=0.15, seed=3)
+        install(gemini, groq, hedge=hedge)
+        await concurrent(40)  # warm-up: latency samples for the p95 deadline
+        gemini.calls = groq.calls = 0
+        runs = await concurrent(400)
+        times = [r[0] * 1000 for r in runs]
+        extra = (gemini.calls + groq.calls - len(runs)) / len(runs)
+        summary[hedge] = pct(times, 0.99)
+        print(f"     hedging {'on ' if hedge else 'off'}  p50 {pct(times, 0.5):5.0f} ms   p95 {pct(times, 0.95):5.0f} ms   "
+              f"p99 {pct(times, 0.99):5.0f} ms   max {max(times):5.0f} ms   extra provider calls {extra:5.1%}   "
+              f"gemini p95 deadline {router.PROVIDERS['gemini'].hedge_delay() * 1000:.0f} ms")
+    results.append(check("hedging cuts p99", summary[True] < summary[False] / 2))
+
+    print("5. Every provider down")
+    gemini, groq = Stub("gemini"), Stub("groq")
+    gemini.hang = groq.hang = True
+    install(gemini, groq)
+    _, provider, data = await timed("I want to end my life")
+    results.append(check(f"fallback reply, crisis_flag {data['analysis']['crisis_flag']}",
+                         provider is None and data["analysis"]["crisis_flag"]))
+
+    print("6. Streaming with every breaker open")
+    gemini, groq = Stub("gemini", latency=0.05), Stub("groq", latency=0.05)
+    install(gemini, groq)
+    router.BREAKER_COOLDOWN = 10.0
+    for provider in router.PROVIDERS.values():
+        provider.opened_at = time.monotonic()
+    events = await streamed("I want to end my life")
+    results.append(check(f"fallback streamed as {[kind for kind, _ in events]}, upstream streams opened "
+                         f"{gemini.streams + groq.streams}, crisis_flag {events[-1][1]['analysis']['crisis_flag']}",
+                         [kind for kind, _ in events] == ["token", "done"] and events[0][1] == "canned"
+                         and gemini.streams + groq.streams == 0 and events[-1][1]["analysis"]["crisis_flag"]))
+    router.BREAKER_COOLDOWN = 0.2
+    await asyncio.sleep(router.BREAKER_COOLDOWN)
+    runs = await asyncio.gather(*(streamed() for _ in range(4)))
+    replies = sorted(run[-1][1]["reply"] for run in runs)
+    results.append(check(f"half open: probe streams gemini {gemini.streams} groq {groq.streams}, replies {replies}",
+                         gemini.streams == groq.streams == 1 and replies.count("canned") == 2
+                         and router.PROVIDERS["gemini"].breaker() == "closed"))
+
+    print("all checks passed" if all(results) else "SOME CHECKS FAILED")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
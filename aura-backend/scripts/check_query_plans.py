@@ -0,0 +1,99 @@
+# Checks that the hot per-user queries are served by indexes, not table scans.
+# Builds a throwaway database through the migrations, seeds it and inspects
+# EXPLAIN output for the dashboard, stress-trend, history and stats lookups.
+#   cd aura-backend && python -m scripts.check_query_plans
+# Set DATABASE_URL to a disposable Postgres database to check Postgres plans.
+import datetime
+import os
+import sys
+import tempfile
+import uuid
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/aura_plans.db"
+
+from sqlalchemy import and_, or_, select, text
+from app import models
+from app.database import SessionLocal, engine
+from app.migrations import upgrade_database
+
+USERS = 50
+ENTRIES_PER_USER = 40
+
+
+def seed(db):
+    start = datetime.datetime(2026, 1, 1)
+    user_ids = [str(uuid.uuid4()) for _ in range(USERS)]
+    for user_id in user_ids:
+        db.add(models.User(id=user_id))
+        db.add(models.UserStats(user_id=user_id))
+        for i in range(ENTRIES_PER_USER):
+            created = start + datetime.timedelta(hours=i)
+            db.add(models.JournalEntry(encrypted_content="x", stress_score=5, created_at=created, user_id=user_id))
+            db.add(models.ActivitySession(activity_type="breathing", created_at=created, user_id=user_id))
+            if i % 24 == 0:
+                db.add(models.DailyMoodRollup(user_id=user_id, day=created.date(), entry_count=24, stress_count=24,
+                                              stress_sum=120.0, sentiment_sum=0.0, emotion_counts="{}"))
+    db.commit()
+    return user_ids[0]
+
+
+def hot_queries(user_id):
+    entry, activity, stats, rollup = models.JournalEntry, models.ActivitySession, models.UserStats, models.DailyMoodRollup
+    cursor_at, cursor_id = datetime.datetime(2026, 1, 2), 10**9
+    return {
+        "dashboard recent entries": select(entry).where(entry.user_id == user_id)
+            .order_by(entry.created_at.desc()).limit(10),
+        "stress trends": select(rollup).where(rollup.user_id == user_id, rollup.day >= datetime.date(2026, 1, 1))
+            .order_by(rollup.day),
+        "history page": select(entry).where(entry.user_id == user_id)
+            .where(or_(entry.created_at < cursor_at, and_(entry.created_at == cursor_at, entry.id < cursor_id)))
+            .order_by(entry.created_at.desc(), entry.id.desc()).limit(51),
+        "activity sessions": select(activity).where(activity.user_id == user_id)
+            .order_by(activity.created_at.desc()).limit(10),
+        "user stats lookup": select(stats).where(stats.user_id == user_id).limit(1),
+    }
+
+
+def explain(db, stmt):
+    compiled = stmt.compile(engine, compile_kwargs={"literal_binds": True})
+    if engine.dialect.name == "sqlite":
+        rows = db.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).fetchall()
+        return "\n".join(row[-1] for row in rows)
+    rows = db.execute(text(f"EXPLAIN {compiled}")).fetchall()
+    return "\n".join(row[0] for row in rows)
+
+
+def uses_index(plan: str) -> bool:
+    if engine.dialect.name == "sqlite":
+        # "SCAN <table>" without an index is a full table scan
+        return "USING INDEX" in plan or "USING COVERING INDEX" in plan
+    return "Seq Scan" not in plan and "Index" in plan
+
+
+def main():
+    upgrade_database()
+    db = SessionLocal()
+    try:
+        user_id = seed(db)
+        if engine.dialect.name == "postgresql":
+            # Tiny tables make a seq scan look cheap; we only care that an index path exists
+            db.execute(text("ANALYZE"))
+            db.execute(text("SET enable_seqscan = off"))
+
+        failed = False
+        for name, stmt in hot_queries(user_id).items():
+            plan = explain(db, stmt)
+            ok = uses_index(plan)
+            failed |= not ok
+            print(f"[{'ok' if ok else 'FAIL'}] {name}")
+            for line in plan.splitlines():
+                print(f"       {line}")
+    finally:
+        db.close()
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# Counts database round trips per /chat/message with and without the
+# authenticated-principal cache (AUTH_CACHE_SIZE=0 disables it).
+#   cd aura-backend && python -m scripts.count_db_queries
+import asyncio
+import os
+import tempfile
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/aura_queries.db"
+
+import httpx
+from sqlalchemy import event
+from app.database import async_engine
+from app.main import app
+from app.migrations import upgrade_database
+from app.services import gemini_service
+from app.services.principal_cache import get_cache
+
+MESSAGES = 20
+statements = []
+
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _count(conn, cursor, statement, parameters, context, executemany):
+    statements.append(statement.split()[0].upper())
+
+
+async def fake_gemini(user_message: str):
+    return {"reply": "I'm here for you.", "analysis": {"stress_score": 3}}
+
+
+async def measure(client, headers, label):
+    statements.clear()
+    for _ in range(MESSAGES):
+        (await client.post("/chat/message", headers=headers, json={"message": "hello"})).raise_for_status()
+    selects = statements.count("SELECT")
+    print(f"{label:<24} {len(statements) / MESSAGES:.1f} statements/message ({selects / MESSAGES:.1f} SELECT)")
+
+
+async def main():
+    upgrade_database()
+    gemini_service.get_gemini_response = fake_gemini
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://aura.test") as client:
+        token = (await client.post("/auth/anonymous-login")).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        cache = get_cache()
+        maxsize = cache.maxsize
+        cache.maxsize = 0
+        cache.clear()
+        await measure(client, headers, "principal cache off")
+        cache.maxsize = maxsize
+        await measure(client, headers, "principal cache on")
+        print(f"cache stats: {cache.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,27 @@
+# Writes the weekly mood report for every user with entries in the seven days
+# before period_end (default: today, UTC). Schedule it weekly, e.g. Mondays:
+#   0 3 * * 1  cd aura-backend && python -m scripts.generate_weekly_reports
+# Safe to rerun: users that already have a report for the period are skipped,
+# so an interrupted run picks up where it stopped.
+#   cd aura-backend && python -m scripts.generate_weekly_reports [YYYY-MM-DD] [--chunk N] [--concurrency N]
+import argparse
+import asyncio
+import datetime
+from app.database import async_engine
+from app.migrations import upgrade_database
+from app.services import weekly_reports
+
+
+async def main(period_end, chunk_size, concurrency):
+    await weekly_reports.run(period_end, chunk_size, concurrency)
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("period_end", nargs="?", type=datetime.date.fromisoformat)
+    parser.add_argument("--chunk", type=int)
+    parser.add_argument("--concurrency", type=int)
+    args = parser.parse_args()
+    upgrade_database()
+    asyncio.run(main(args.period_end, args.chunk, args.concurrency))
@@ -0,0 +1,77 @@
+# Load test: concurrent users mixing chat (simulated LLM latency + DB writes)
+# with history and dashboard reads, served in-process through the ASGI app.
+#   cd aura-backend && python -m scripts.load_test [users] [seconds]
+# Uses a throwaway SQLite database unless DATABASE_URL is set.
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/aura_load.db"
+
+import httpx
+from app.main import app
+from app.migrations import upgrade_database
+from app.services import gemini_service
+
+LLM_LATENCY = 0.15  # seconds, simulated provider round trip
+
+
+async def fake_gemini(user_message: str):
+    await asyncio.sleep(LLM_LATENCY)
+    return {
+        "reply": "I'm here for you.",
+        "analysis": {"sentiment": "Neutral", "emotion_detected": "Calm", "stress_score": 3,
+                     "keywords_found": [], "recommended_action": "Rest", "crisis_flag": False},
+    }
+
+
+async def user_loop(client, deadline, latencies):
+    token = (await client.post("/auth/anonymous-login")).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    for i in range(5):
+        await client.post("/journal/entry", headers=headers, json={"content": f"seed entry {i}"})
+
+    step = 0
+    while time.perf_counter() < deadline:
+        kind = ("chat", "history", "dashboard")[step % 3]
+        t0 = time.perf_counter()
+        if kind == "chat":
+            r = await client.post("/chat/message", headers=headers, json={"message": "I had a long day"})
+        elif kind == "history":
+            r = await client.get("/journal/history", headers=headers)
+        else:
+            r = await client.get("/analytics/dashboard", headers=headers)
+        r.raise_for_status()
+        latencies.setdefault(kind, []).append((time.perf_counter() - t0) * 1000)
+        step += 1
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def main(users: int, seconds: float):
+    # ASGITransport does not run the lifespan hook, so migrate here
+    upgrade_database()
+    gemini_service.get_gemini_response = fake_gemini
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://aura.test") as client:
+        latencies = {}
+        start = time.perf_counter()
+        await asyncio.gather(*[user_loop(client, start + seconds, latencies) for _ in range(users)])
+        elapsed = time.perf_counter() - start
+
+    total = sum(len(v) for v in latencies.values())
+    print(f"{users} users, {elapsed:.1f}s: {total / elapsed:.1f} req/s")
+    for kind, values in sorted(latencies.items()):
+        print(f"  {kind:<10} n={len(values):<5} p50 {pct(values, 0.5):7.1f} ms   p99 {pct(values, 0.99):7.1f} ms")
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    asyncio.run(main(users, seconds))
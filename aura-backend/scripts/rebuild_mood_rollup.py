@@ -0,0 +1,22 @@
+# Recomputes daily_mood_rollup from journal_entries, for every user or one.
+# The rollups are kept current on each write; run this after restoring or
+# editing entries outside the API, ideally while writes are quiet.
+#   cd aura-backend && python -m scripts.rebuild_mood_rollup [user_id]
+import asyncio
+import sys
+import time
+from app.database import async_engine
+from app.migrations import upgrade_database
+from app.services import mood_rollup
+
+
+async def main(user_id):
+    started = time.perf_counter()
+    rows = await mood_rollup.rebuild(user_id)
+    print(f"[Rollup] Rebuilt {rows} daily rows for {user_id or 'all users'} in {time.perf_counter() - started:.1f}s")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    upgrade_database()
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else None))
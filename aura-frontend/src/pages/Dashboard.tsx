@@ -17,11 +17,12 @@ export default function Dashboard() {
                 const [dashData, trendData, journalHistory] = await Promise.all([
                     analyticsService.getDashboard(),
                     analyticsService.getTrends(),
-                    journalService.getHistory()
+                    // Only the five newest entries are shown
+                    journalService.getHistoryPage(5)
                 ]);
                 setStats(dashData.stats);
                 setTrends(trendData);
-                setHistory(journalHistory);
+                setHistory(journalHistory.entries);
             } catch (err) {
                 console.error("Failed to fetch dashboard data", err);
             } finally {
@@ -10,8 +10,12 @@ export default function Journal() {
     const [showResult, setShowResult] = useState(false);
     const [isCrisis, setIsCrisis] = useState(false);
     const [analysisData, setAnalysisData] = useState<any>(null);
+    const stopListening = useRef<(() => void) | null>(null);
     const navigate = useNavigate();
 
+    // Stop waiting for an analysis when the page goes away
+    useEffect(() => () => stopListening.current?.(), []);
+
     const analyzeKeywordStress = (text: string) => {
         const lowerText = text.toLowerCase();
         const criticalKeywords = ['die', 'kill myself', 'suicide', 'end my life'];
@@ -25,21 +29,38 @@ export default function Journal() {
         setIsAnalyzing(true);
         const keywordStress = analyzeKeywordStress(entry);
 
-        try {
-            const response = await journalService.createEntry(entry);
-
+        const showAnalysis = (response: any) => {
             const stressVal = keywordStress || response.stress_score;
 
             setAnalysisData({
                 mood: response.emotion_label,
                 stress: stressVal,
-                level: response.stress_level
+                level: response.stress_level,
+                pending: response.analysis_status === 'pending'
             });
 
             setIsCrisis(stressVal === 10 || response.is_high_risk);
+            return stressVal === 10 || response.is_high_risk;
+        };
+
+        try {
+            const saved = await journalService.createEntry(entry);
+            // Shown right away with the offline scores it was saved with; the LLM
+            // analysis replaces them when it arrives
+            const crisis = showAnalysis(saved);
             setShowResult(true);
+            stopListening.current?.();
+            stopListening.current = saved.analysis_status === 'pending'
+                ? journalService.onAnalysis(saved.id, (analyzed) => {
+                    if (showAnalysis(analyzed) && !crisis) {
+                        // Only the LLM saw the risk: bring the support screen back up
+                        setShowResult(true);
+                        setTimeout(() => navigate('/support'), 4000);
+                    }
+                })
+                : null;
 
-            if (stressVal === 10 || response.is_high_risk) {
+            if (crisis) {
                 // Crisis Protocol
                 setTimeout(() => {
                     navigate('/support');
@@ -110,7 +131,7 @@ export default function Journal() {
                                     {isAnalyzing ? (
                                         <>
                                             <RefreshCw size={28} className="animate-spin" />
-                                            Analyzing...
+                                            Saving...
                                         </>
                                     ) : (
                                         <>
@@ -207,6 +228,11 @@ export default function Journal() {
                                         <div className="space-y-4">
                                             <h2 className="text-8xl font-black text-emerald-950 italic tracking-tighter">Done.</h2>
                                             <p className="text-emerald-800/50 text-2xl font-medium">Your feelings have been safely recorded.</p>
+                                            {analysisData?.pending && (
+                                                <p className="text-emerald-800/40 text-lg font-medium italic flex items-center justify-center gap-3">
+                                                    <RefreshCw size={18} className="animate-spin" /> Taking a closer look...
+                                                </p>
+                                            )}
                                         </div>
                                     </div>
 
@@ -227,7 +253,7 @@ export default function Journal() {
                                     </div>
 
                                     <button
-                                        onClick={() => { setEntry(''); setShowResult(false); navigate('/focus'); }}
+                                        onClick={() => { stopListening.current?.(); setEntry(''); setShowResult(false); navigate('/focus'); }}
                                         className="w-full py-10 font-black text-sm tracking-[0.4em] uppercase bg-emerald-600 text-white rounded-[35px] shadow-3xl hover:scale-105 active:scale-95 transition-all shadow-emerald-200"
                                     >
                                         Take a Break
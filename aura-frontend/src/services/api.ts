@@ -27,10 +27,58 @@ export const journalService = {
         const response = await api.post('/journal/entry', { content });
         return response.data;
     },
+    // One page, newest first. X-Next-Cursor is the `before` cursor of the next older page.
+    getHistoryPage: async (limit?: number, before?: string) => {
+        const response = await api.get('/journal/history', { params: { limit, before } });
+        return { entries: response.data, nextCursor: response.headers['x-next-cursor'] as string | undefined };
+    },
+    // The whole history: follows the cursor until the oldest page
     getHistory: async () => {
-        const response = await api.get('/journal/history');
+        const entries: any[] = [];
+        let cursor: string | undefined;
+        do {
+            const page = await journalService.getHistoryPage(200, cursor);
+            entries.push(...page.entries);
+            cursor = page.nextCursor;
+        } while (cursor);
+        return entries;
+    },
+    getEntry: async (id: number) => {
+        const response = await api.get(`/journal/entry/${id}`);
         return response.data;
     },
+    // Entries are saved before they are analyzed. Calls onAnalysis with the analyzed
+    // entry when GET /journal/entry/{id}/events delivers it; nothing on timeout.
+    // fetch rather than EventSource, which cannot send the Authorization header.
+    // Returns a function that stops listening.
+    onAnalysis: (id: number, onAnalysis: (entry: any) => void) => {
+        const controller = new AbortController();
+        const listen = async () => {
+            const response = await fetch(`${API_BASE_URL}/journal/entry/${id}/events`, {
+                headers: { Authorization: `Bearer ${localStorage.getItem('aura_token')}` },
+                signal: controller.signal,
+            });
+            if (!response.ok || !response.body) return;
+            const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+            let buffer = '';
+            let event = '';
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) return;
+                buffer += value;
+                const lines = buffer.split('\n');
+                buffer = lines.pop() ?? '';
+                for (const line of lines) {
+                    if (line.startsWith('event:')) event = line.slice(6).trim();
+                    else if (line.startsWith('data:') && event === 'analysis') onAnalysis(JSON.parse(line.slice(5)));
+                }
+            }
+        };
+        listen().catch((err) => {
+            if (err.name !== 'AbortError') console.error('Analysis events failed:', err);
+        });
+        return () => controller.abort();
+    },
 };
 
 export const analyticsService = {
@@ -38,8 +86,8 @@ export const analyticsService = {
         const response = await api.get('/analytics/dashboard');
         return response.data;
     },
-    getTrends: async () => {
-        const response = await api.get('/analytics/stress-trends');
+    getTrends: async (days: number = 7, granularity: 'day' | 'week' | 'month' = 'day') => {
+        const response = await api.get('/analytics/stress-trends', { params: { days, granularity } });
         return response.data;
     },
 };
@@ -0,0 +1,89 @@
+# Forward latency of the fused attention path vs the original per-head modules.
+# Both models load the same aura_mental_health_model.pth (the fused one through
+# its weight-remapping hook), so outputs are compared too.
+#   cd aura-ml && python bench_attention.py
+import os
+import time
+import torch
+import torch.nn as nn
+from torch.nn import functional as F
+import model as aura
+from model import AuraLLM, device, block_size, batch_size, n_embd, dropout
+
+here = os.path.dirname(os.path.abspath(__file__))
+checkpoint = os.path.join(here, 'aura_mental_health_model.pth')
+
+class LegacyHead(nn.Module):
+    """ The original per-head attention, kept here as the benchmark baseline """
+    def __init__(self, head_size):
+        super().__init__()
+        self.key = nn.Linear(n_embd, head_size, bias=False)
+        self.query = nn.Linear(n_embd, head_size, bias=False)
+        self.value = nn.Linear(n_embd, head_size, bias=False)
+        self.register_buffer('tril', torch.tril(torch.ones(block_size, block_size)))
+        self.dropout = nn.Dropout(dropout)
+
+    def forward(self, x):
+        B, T, C = x.shape
+        k = self.key(x)
+        q = self.query(x)
+        wei = q @ k.transpose(-2,-1) * C**-0.5
+        wei = wei.masked_fill(self.tril[:T, :T] == 0, float('-inf'))
+        wei = F.softmax(wei, dim=-1)
+        wei = self.dropout(wei)
+        return wei @ self.value(x)
+
+class LegacyMultiHeadAttention(nn.Module):
+    def __init__(self, num_heads, head_size):
+        super().__init__()
+        self.heads = nn.ModuleList([LegacyHead(head_size) for _ in range(num_heads)])
+        self.proj = nn.Linear(n_embd, n_embd)
+        self.dropout = nn.Dropout(dropout)
+
+    def forward(self, x, cache=None):
+        out = torch.cat([h(x) for h in self.heads], dim=-1)
+        return self.dropout(self.proj(out))
+
+def load(fused):
+    if not fused:
+        aura.MultiHeadAttention, original = LegacyMultiHeadAttention, aura.MultiHeadAttention
+    try:
+        vocab_size = torch.load(checkpoint, map_location=device)['token_embedding_table.weight'].shape[0]
+        m = AuraLLM(vocab_size)
+        m.load_state_dict(torch.load(checkpoint, map_location=device))
+    finally:
+        if not fused:
+            aura.MultiHeadAttention = original
+    return m.to(device), vocab_size
+
+def timed(fn, repeat):
+    fn()  # warm up
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+legacy, vocab_size = load(fused=False)
+fused, _ = load(fused=True)
+
+x = torch.randint(0, vocab_size, (batch_size, block_size), device=device)
+y = torch.randint(0, vocab_size, (batch_size, block_size), device=device)
+single = x[:1]
+
+legacy.eval(); fused.eval()
+with torch.no_grad():
+    diff = (legacy(x)[0] - fused(x)[0]).abs().max().item()
+print(f"max |logit difference| legacy vs fused: {diff:.2e}")
+
+results = {}
+for name, m in (("per-head", legacy), ("fused sdpa", fused)):
+    m.train()
+    train_ms = timed(lambda: m(x, y), 10)
+    m.eval()
+    with torch.no_grad():
+        infer_ms = timed(lambda: m(single), 50)
+    results[name] = (train_ms, infer_ms)
+    print(f"{name:<11} train batch {tuple(x.shape)} fwd {train_ms:7.2f} ms   single sequence fwd {infer_ms:6.2f} ms")
+
+(lt, li), (ft, fi) = results["per-head"], results["fused sdpa"]
+print(f"speedup: train {lt / ft:.2f}x, inference {li / fi:.2f}x")
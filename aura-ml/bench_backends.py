@@ -0,0 +1,66 @@
+# Latency and memory of the Mini-Aura CPU backends: fp32 eager, dynamic INT8 and
+# the torch.export program. Each backend runs in its own process so the resident
+# memory numbers do not overlap. Run export_model.py first.
+#   cd aura-ml && python bench_backends.py
+import os
+import resource
+import subprocess
+import sys
+import time
+import torch
+from model import AuraLLM, device, block_size, quantize_int8, ExportedAuraLLM
+from tokenizer import CharTokenizer
+
+here = os.path.dirname(os.path.abspath(__file__))
+BACKENDS = ("fp32", "int8", "exported")
+NEW_TOKENS = 200
+ROUNDS = 5
+PROMPT = "User: I have exams next week and I can't sleep, everything feels like too much.\nAura: "
+
+def rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+
+def load(backend, vocab_size):
+    if backend == "exported":
+        return ExportedAuraLLM(os.path.join(here, 'aura_mental_health_model.pt2'))
+    model = AuraLLM(vocab_size).eval()
+    if backend == "int8":
+        model = quantize_int8(model)
+        state = torch.load(os.path.join(here, 'aura_mental_health_model.int8.pth'), map_location='cpu', weights_only=False)
+    else:
+        state = torch.load(os.path.join(here, 'aura_mental_health_model.pth'), map_location='cpu')
+    model.load_state_dict(state)
+    return model.eval()
+
+def measure(backend):
+    tokenizer = CharTokenizer.load(os.path.join(here, 'aura_tokenizer.json'))
+    idx = torch.tensor([tokenizer.encode(PROMPT)[-block_size:]], dtype=torch.long)
+    before = rss_mb()
+    t0 = time.perf_counter()
+    model = load(backend, tokenizer.vocab_size)
+    load_ms = (time.perf_counter() - t0) * 1000
+    loaded = rss_mb()
+
+    with torch.no_grad():
+        model.generate(idx, 20, temperature=0.7)  # warm up
+        results = []
+        for batch in (1, 8):
+            times = []
+            for r in range(ROUNDS):
+                torch.manual_seed(r)
+                t0 = time.perf_counter()
+                model.generate(idx.repeat(batch, 1), NEW_TOKENS, temperature=0.7)
+                times.append(time.perf_counter() - t0)
+            results.append(sorted(times)[ROUNDS // 2] * 1000)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+    print(f"{backend:<9} load {load_ms:6.0f} ms   +{loaded - before:5.1f} MB after load   peak RSS {peak:6.0f} MB   "
+          f"batch 1 {results[0]:6.0f} ms   batch 8 {results[1]:6.0f} ms")
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        measure(sys.argv[1])
+    else:
+        print(f"{NEW_TOKENS} new tokens per reply, median of {ROUNDS}, torch threads {torch.get_num_threads()}")
+        for backend in BACKENDS:
+            subprocess.run([sys.executable, os.path.abspath(__file__), backend], check=True)
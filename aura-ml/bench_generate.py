@@ -0,0 +1,45 @@
+# Tokens/sec of AuraLLM.generate with and without the KV cache, plus a seeded
+# equivalence check while the context fits in block_size.
+#   cd aura-ml && python bench_generate.py
+import os
+import time
+import torch
+from model import AuraLLM, device, block_size
+
+here = os.path.dirname(os.path.abspath(__file__))
+with open(os.path.join(here, 'dataset.txt'), 'r', encoding='utf-8') as f:
+    text = f.read()
+
+chars = sorted(list(set(text)))
+stoi = { ch:i for i,ch in enumerate(chars) }
+itos = { i:ch for i,ch in enumerate(chars) }
+encode = lambda s: [stoi.get(c, 0) for c in s]
+decode = lambda l: ''.join([itos[i] for i in l])
+
+model = AuraLLM(len(chars))
+model.load_state_dict(torch.load(os.path.join(here, 'aura_mental_health_model.pth'), map_location=device))
+model.to(device)
+model.eval()
+
+def run(idx, max_new_tokens, use_cache, seed=1337):
+    torch.manual_seed(seed)
+    with torch.no_grad():
+        return model.generate(idx, max_new_tokens, temperature=0.7, use_cache=use_cache)
+
+# 1. Seeded equivalence while prompt + reply fit in the context window
+short = torch.tensor([encode("User: I feel anxious\nAura: ")], dtype=torch.long, device=device)
+n = block_size - short.shape[1]
+same = run(short, n, use_cache=False).tolist() == run(short, n, use_cache=True).tolist()
+print(f"seeded output identical within block_size ({n} tokens): {same}")
+
+# 2. Throughput for the service's shape: full 64-token prompt, 200 new tokens
+prompt = "User: I have exams next week and I can't sleep, everything feels like too much.\nAura: "
+idx = torch.tensor([encode(prompt)[-block_size:]], dtype=torch.long, device=device)
+for use_cache in (False, True):
+    run(idx, 20, use_cache)  # warm up
+    t0 = time.perf_counter()
+    out = run(idx, 200, use_cache)
+    elapsed = time.perf_counter() - t0
+    label = "kv cache" if use_cache else "full recompute"
+    print(f"{label:<15} {200 / elapsed:8.1f} tokens/s  ({elapsed * 1000:.0f} ms for 200 tokens on {device})")
+print("sample:", repr(decode(out[0].tolist())[len(prompt):][:80]))
@@ -0,0 +1,76 @@
+# Tokens generated per reply and wall time with and without stop sequences, for a
+# single prompt and a batch of 8, plus a seeded check that the reply text (cut at
+# the first delimiter) is unchanged.
+#   cd aura-ml && python bench_stop_sequences.py
+import os
+import time
+import torch
+from model import AuraLLM, device, block_size
+from tokenizer import CharTokenizer
+
+here = os.path.dirname(os.path.abspath(__file__))
+tokenizer = CharTokenizer.load(os.path.join(here, 'aura_tokenizer.json'))
+model = AuraLLM(tokenizer.vocab_size)
+model.load_state_dict(torch.load(os.path.join(here, 'aura_mental_health_model.pth'), map_location=device))
+model.to(device)
+model.eval()
+
+DELIMITERS = ["User:", "\n\n", "Aura:"]
+STOPS = [tokenizer.encode(d) for d in DELIMITERS]
+MAX_NEW_TOKENS = 200
+ROUNDS = 20
+PROMPTS = [
+    "User: I have exams next week and I can't sleep.\nAura: ",
+    "User: I feel lonely since I moved to a new city.\nAura: ",
+    "User: My parents keep fighting and I don't know what to do.\nAura: ",
+    "User: I think I'm doing a bit better today.\nAura: ",
+]
+
+def cut(text):
+    # The service's reply extraction: everything before the first delimiter
+    for d in DELIMITERS:
+        text = text.split(d)[0]
+    return text.strip()
+
+def run(prompts, stop_sequences, seed):
+    encoded = [tokenizer.encode(p)[-block_size:] for p in prompts]
+    # Same-length prompts batch cleanly: left-crop everything to the shortest
+    width = min(len(e) for e in encoded)
+    idx = torch.tensor([e[-width:] for e in encoded], dtype=torch.long, device=device)
+    torch.manual_seed(seed)
+    t0 = time.perf_counter()
+    with torch.no_grad():
+        out = model.generate(idx, MAX_NEW_TOKENS, temperature=0.7, stop_sequences=stop_sequences)
+    elapsed = time.perf_counter() - t0
+    replies, tokens, stopped = [], 0, 0
+    for row in out[:, width:].tolist():
+        text = tokenizer.decode(row)
+        if stop_sequences:
+            # Padding after the stop sequence is not part of the reply
+            ends = [text.find(d) + len(d) for d in DELIMITERS if d in text]
+            n = min(ends) if ends else len(text)
+            stopped += bool(ends)
+        else:
+            n = len(text)
+        tokens += n
+        replies.append(cut(text[:n]))
+    return replies, tokens / len(prompts), stopped / len(prompts), elapsed
+
+model.generate(torch.zeros((1, 8), dtype=torch.long, device=device), 20)  # warm up
+for batch in (1, 8):
+    prompts = [PROMPTS[i % len(PROMPTS)] for i in range(batch)]
+    results = {}
+    for label, stops in (("no stops", None), ("stop sequences", STOPS)):
+        tokens = stopped = elapsed = 0.0
+        replies = []
+        for r in range(ROUNDS):
+            out, t, s, e = run(prompts, stops, seed=r)
+            replies.append(out)
+            tokens += t
+            stopped += s
+            elapsed += e
+        results[label] = (tokens / ROUNDS, stopped / ROUNDS, elapsed / ROUNDS * 1000, replies)
+    same = results["no stops"][3] == results["stop sequences"][3]
+    print(f"batch {batch}: replies identical after cutting at delimiters: {same}")
+    for label, (tokens, stopped, ms, _) in results.items():
+        print(f"  {label:<15} {tokens:6.1f} tokens per reply   {stopped:4.0%} stopped early   {ms:7.1f} ms per call")
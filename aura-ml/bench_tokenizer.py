@@ -0,0 +1,38 @@
+# Cold start and per-request tokenization: rescanning dataset.txt with the old
+# per-character dict lambdas vs loading aura_tokenizer.json with lookup arrays.
+#   cd aura-ml && python bench_tokenizer.py
+import os
+import time
+from tokenizer import CharTokenizer
+
+here = os.path.dirname(os.path.abspath(__file__))
+data_path = os.path.join(here, 'dataset.txt')
+tokenizer_path = os.path.join(here, 'aura_tokenizer.json')
+
+def legacy_init():
+    with open(data_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    chars = sorted(list(set(text)))
+    encode = lambda s: [ { ch:i for i,ch in enumerate(chars) }.get(c, 0) for c in s]
+    decode = lambda l: ''.join([{ i:ch for i,ch in enumerate(chars) }[i] for i in l])
+    return encode, decode
+
+def timed(fn, repeat=1):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - t0) / repeat * 1000, result
+
+legacy_ms, (encode, decode) = timed(legacy_init, 3)
+artifact_ms, tokenizer = timed(lambda: CharTokenizer.load(tokenizer_path), 20)
+print(f"cold start: rescan dataset.txt {legacy_ms:8.2f} ms   load artifact {artifact_ms:6.2f} ms")
+
+# A typical request: four lines of history in, 200 characters back out
+prompt = "User: I have exams next week and I can't sleep.\nAura: That sounds exhausting.\n" * 2 + "Aura: "
+ids = tokenizer.encode(prompt)
+reply = tokenizer.encode("It is okay to feel overwhelmed. Try one small step today, like a short walk. " * 3)[:200]
+assert encode(prompt) == ids and decode(reply) == tokenizer.decode(reply)
+
+legacy_req, _ = timed(lambda: (decode(reply), encode(prompt)), 200)
+new_req, _ = timed(lambda: (tokenizer.decode(reply), tokenizer.encode_array(prompt)), 200)
+print(f"per request: dict lambdas {legacy_req:8.3f} ms   lookup arrays {new_req:6.3f} ms")
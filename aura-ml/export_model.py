@@ -0,0 +1,72 @@
+import os
+import sys
+import torch
+from model import AuraLLM, block_size, quantize_int8, export_step, ExportedAuraLLM
+from tokenizer import CharTokenizer
+
+# Build step for the CPU inference backends served by aura-backend
+# (AURA_MODEL_BACKEND=fp32|int8|exported). Writes, next to the fp32 weights:
+#   aura_mental_health_model.int8.pth  dynamically quantized INT8 state dict
+#   aura_mental_health_model.pt2       torch.export program of one cached step
+# Accuracy guard: every variant's validation loss on dataset.txt (the last 10%,
+# the same split as train.py) must stay within TOLERANCE of fp32, or the build
+# fails and nothing is written.
+#   cd aura-ml && python export_model.py [tolerance]
+
+here = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(here, 'aura_mental_health_model.pth')
+INT8_PATH = os.path.join(here, 'aura_mental_health_model.int8.pth')
+EXPORT_PATH = os.path.join(here, 'aura_mental_health_model.pt2')
+TOLERANCE = 0.02 # relative increase in validation loss
+
+def load_fp32(tokenizer):
+    model = AuraLLM(tokenizer.vocab_size)
+    model.load_state_dict(torch.load(MODEL_PATH, map_location='cpu'))
+    return model.eval()
+
+@torch.no_grad()
+def validation_loss(model, tokenizer, batch=64):
+    # Deterministic: every non-overlapping block_size window of the validation split
+    with open(os.path.join(here, 'dataset.txt'), 'r', encoding='utf-8') as f:
+        text = f.read()
+    data = torch.from_numpy(tokenizer.encode_array(text))
+    val = data[int(0.9 * len(data)):]
+    n = (len(val) - 1) // block_size
+    x = val[:n * block_size].view(n, block_size)
+    y = val[1:n * block_size + 1].view(n, block_size)
+    total = 0.0
+    for i in range(0, n, batch):
+        _, loss = model(x[i:i + batch], y[i:i + batch])
+        total += loss.item() * len(x[i:i + batch])
+    return total / n
+
+def main(tolerance):
+    tokenizer = CharTokenizer.load(os.path.join(here, 'aura_tokenizer.json'))
+    fp32 = load_fp32(tokenizer)
+    int8 = quantize_int8(load_fp32(tokenizer))
+    tmp_export = EXPORT_PATH[:-len('.pt2')] + '.tmp.pt2' # torch.export only loads *.pt2
+    export_step(load_fp32(tokenizer), tmp_export)
+    exported = ExportedAuraLLM(tmp_export)
+
+    baseline = validation_loss(fp32, tokenizer)
+    print(f"fp32      val loss {baseline:.4f}")
+    failed = False
+    for name, model in (("int8", int8), ("exported", exported)):
+        loss = validation_loss(model, tokenizer)
+        change = (loss - baseline) / baseline
+        ok = change <= tolerance
+        failed = failed or not ok
+        print(f"{name:<9} val loss {loss:.4f}  ({change:+.2%}, limit +{tolerance:.0%})  {'ok' if ok else 'FAILED'}")
+
+    if failed:
+        os.remove(tmp_export)
+        print("Accuracy guard failed, no artifacts written.")
+        sys.exit(1)
+
+    torch.save(int8.state_dict(), INT8_PATH)
+    os.replace(tmp_export, EXPORT_PATH)
+    print(f"Wrote {INT8_PATH} ({os.path.getsize(INT8_PATH) / 1e6:.1f} MB)")
+    print(f"Wrote {EXPORT_PATH} ({os.path.getsize(EXPORT_PATH) / 1e6:.1f} MB)")
+
+if __name__ == '__main__':
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else TOLERANCE)
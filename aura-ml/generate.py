@@ -1,15 +1,11 @@
 import torch
 from model import AuraLLM, device, block_size
+from tokenizer import CharTokenizer
 
-# Load the tokenizer from the dataset again
-with open('c:/Users/Beulah/MENTAL HEALTH/aura-ml/dataset.txt', 'r', encoding='utf-8') as f:
-    text = f.read()
-
-chars = sorted(list(set(text)))
-vocab_size = len(chars)
-stoi = { ch:i for i,ch in enumerate(chars) }
-itos = { i:ch for i,ch in enumerate(chars) }
-decode = lambda l: ''.join([itos[i] for i in l])
+# Load the tokenizer written by train.py
+tokenizer = CharTokenizer.load('aura_tokenizer.json')
+vocab_size = tokenizer.vocab_size
+decode = tokenizer.decode
 
 # Initialize and load model
 model = AuraLLM(vocab_size)
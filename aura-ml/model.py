@@ -15,38 +15,59 @@ n_head = 4
 n_layer = 4
 dropout = 0.2
 
-class Head(nn.Module):
-    """ One head of self-attention """
-    def __init__(self, head_size):
-        super().__init__()
-        self.key = nn.Linear(n_embd, head_size, bias=False)
-        self.query = nn.Linear(n_embd, head_size, bias=False)
-        self.value = nn.Linear(n_embd, head_size, bias=False)
-        self.register_buffer('tril', torch.tril(torch.ones(block_size, block_size)))
-        self.dropout = nn.Dropout(dropout)
-
-    def forward(self, x):
-        B, T, C = x.shape
-        k = self.key(x)   # (B,T,C)
-        q = self.query(x) # (B,T,C)
-        wei = q @ k.transpose(-2,-1) * C**-0.5 # (B, T, T)
-        wei = wei.masked_fill(self.tril[:T, :T] == 0, float('-inf'))
-        wei = F.softmax(wei, dim=-1)
-        wei = self.dropout(wei)
-        v = self.value(x)
-        out = wei @ v 
-        return out
-
 class MultiHeadAttention(nn.Module):
-    """ Multiple heads of self-attention in parallel """
+    """ Multiple heads of causal self-attention, fused into one QKV projection """
     def __init__(self, num_heads, head_size):
         super().__init__()
-        self.heads = nn.ModuleList([Head(head_size) for _ in range(num_heads)])
+        self.num_heads = num_heads
+        self.head_size = head_size
+        self.qkv = nn.Linear(n_embd, 3 * num_heads * head_size, bias=False)
         self.proj = nn.Linear(n_embd, n_embd)
         self.dropout = nn.Dropout(dropout)
+        self._register_load_state_dict_pre_hook(self._remap_legacy_heads)
 
-    def forward(self, x):
-        out = torch.cat([h(x) for h in self.heads], dim=-1)
+    def _remap_legacy_heads(self, state_dict, prefix, *args):
+        # Checkpoints from the per-head implementation store heads.{i}.query/key/value
+        # weights and a tril buffer per head; stack them into the fused qkv weight
+        legacy = f"{prefix}heads.0.query.weight"
+        if legacy not in state_dict:
+            return
+        parts = []
+        for name in ("query", "key", "value"):
+            for i in range(self.num_heads):
+                parts.append(state_dict.pop(f"{prefix}heads.{i}.{name}.weight"))
+        for i in range(self.num_heads):
+            state_dict.pop(f"{prefix}heads.{i}.tril", None)
+        state_dict[f"{prefix}qkv.weight"] = torch.cat(parts, dim=0)
+
+    def forward(self, x, cache=None, attn_mask=None):
+        B, T, C = x.shape
+        q, k, v = self.qkv(x).split(self.num_heads * self.head_size, dim=2)
+        q = q.view(B, T, self.num_heads, self.head_size).transpose(1, 2) # (B, nh, T, hs)
+        k = k.view(B, T, self.num_heads, self.head_size).transpose(1, 2)
+        v = v.view(B, T, self.num_heads, self.head_size).transpose(1, 2)
+        if cache is not None:
+            # cache is [k, v] for the tokens already seen; extend it in place
+            if cache[0] is not None:
+                k = torch.cat((cache[0], k), dim=2)
+                v = torch.cat((cache[1], v), dim=2)
+            cache[0], cache[1] = k, v
+        Tk = k.shape[2]
+
+        # A full window is plain causal attention and a single new token sees every
+        # cached key; only a multi-token step on top of a cache needs an explicit mask.
+        # Batched decoding over padded caches passes its own (B, 1, T, Tk) mask.
+        mask = attn_mask
+        if mask is None and T > 1 and T != Tk:
+            mask = torch.ones(T, Tk, dtype=torch.bool, device=x.device).tril(Tk - T)
+        out = F.scaled_dot_product_attention(
+            q, k, v,
+            attn_mask=mask,
+            dropout_p=dropout if self.training else 0.0,
+            is_causal=mask is None and T > 1,
+            scale=C**-0.5, # the original heads scaled by n_embd, not head_size
+        )
+        out = out.transpose(1, 2).contiguous().view(B, T, C)
         out = self.dropout(self.proj(out))
         return out
 
@@ -74,8 +95,8 @@ class Block(nn.Module):
         self.ln1 = nn.LayerNorm(n_embd)
         self.ln2 = nn.LayerNorm(n_embd)
 
-    def forward(self, x):
-        x = x + self.sa(self.ln1(x))
+    def forward(self, x, cache=None, attn_mask=None):
+        x = x + self.sa(self.ln1(x), cache, attn_mask)
         x = x + self.ffwd(self.ln2(x))
         return x
 
@@ -88,12 +109,22 @@ class AuraLLM(nn.Module):
         self.ln_f = nn.LayerNorm(n_embd)
         self.lm_head = nn.Linear(n_embd, vocab_size)
 
-    def forward(self, idx, targets=None):
+    def new_cache(self):
+        # Per-layer [key, value] tensors of shape (B, n_head, T, head_size)
+        return [[None, None] for _ in self.blocks]
+
+    def forward(self, idx, targets=None, cache=None, pos_offset=0, attn_mask=None):
         B, T = idx.shape
         tok_emb = self.token_embedding_table(idx) # (B,T,C)
-        pos_emb = self.position_embedding_table(torch.arange(T, device=device)) # (T,C)
+        # pos_offset is an int, or a (B, 1) tensor when batched sequences sit at different positions
+        pos = torch.arange(T, device=idx.device) + pos_offset
+        pos_emb = self.position_embedding_table(pos) # (T,C) or (B,T,C)
         x = tok_emb + pos_emb # (B,T,C)
-        x = self.blocks(x) # (B,T,C)
+        if cache is None:
+            x = self.blocks(x) # (B,T,C)
+        else:
+            for block, layer_cache in zip(self.blocks, cache):
+                x = block(x, layer_cache, attn_mask)
         x = self.ln_f(x) # (B,T,C)
         logits = self.lm_head(x) # (B,T,vocab_size)
 
@@ -107,12 +138,154 @@ class AuraLLM(nn.Module):
 
         return logits, loss
 
-    def generate(self, idx, max_new_tokens, temperature=1.0):
-        for _ in range(max_new_tokens):
-            idx_cond = idx[:, -block_size:]
-            logits, loss = self(idx_cond)
-            logits = logits[:, -1, :] / temperature # Scale logits by temperature
-            probs = F.softmax(logits, dim=-1) # (B, C)
-            idx_next = torch.multinomial(probs, num_samples=1) # (B, 1)
-            idx = torch.cat((idx, idx_next), dim=1) # (B, T+1)
+    def generate(self, idx, max_new_tokens, temperature=1.0, use_cache=True, window_stride=block_size // 4,
+                 stop_sequences=None, pad_id=0):
+        # stop_sequences: token id lists. A row is done as soon as its new tokens end
+        # with one of them; done rows are padded with pad_id from then on, and the
+        # loop ends early once every row is done. Without stop sequences the output
+        # always has max_new_tokens new tokens.
+        stops = [torch.tensor(s, dtype=torch.long, device=idx.device) for s in (stop_sequences or []) if len(s)]
+        start = idx.shape[1]
+        done = torch.zeros(idx.shape[0], dtype=torch.bool, device=idx.device)
+
+        if not use_cache:
+            for _ in range(max_new_tokens):
+                idx_cond = idx[:, -block_size:]
+                logits, loss = self(idx_cond)
+                idx_next = self._sample(logits, temperature, done, pad_id) # (B, 1)
+                idx = torch.cat((idx, idx_next), dim=1) # (B, T+1)
+                if stops and self._update_done(done, idx, start, stops).all():
+                    break
+            return idx
+
+        # Incremental decoding: each step only runs the newest token through the
+        # blocks, reusing cached keys/values. Identical to the uncached loop while
+        # the context fits in block_size. Past that, positions are re-anchored on a
+        # rolling window: the last block_size - window_stride tokens are re-encoded
+        # from position 0 once every window_stride tokens.
+        idx_cond = idx[:, -block_size:]
+        cache = self.new_cache()
+        logits, _ = self(idx_cond, cache=cache)
+        pos = idx_cond.shape[1]
+        for step in range(max_new_tokens):
+            idx_next = self._sample(logits, temperature, done, pad_id)
+            idx = torch.cat((idx, idx_next), dim=1)
+            if stops and self._update_done(done, idx, start, stops).all():
+                break
+            if step == max_new_tokens - 1:
+                break
+            if pos >= block_size:
+                idx_cond = idx[:, -(block_size - window_stride):]
+                cache = self.new_cache()
+                logits, _ = self(idx_cond, cache=cache)
+                pos = idx_cond.shape[1]
+            else:
+                logits, _ = self(idx_next, cache=cache, pos_offset=pos)
+                pos += 1
         return idx
+
+    @staticmethod
+    def _sample(logits, temperature, done, pad_id):
+        logits = logits[:, -1, :] / temperature # Scale logits by temperature
+        probs = F.softmax(logits, dim=-1) # (B, C)
+        idx_next = torch.multinomial(probs, num_samples=1) # (B, 1)
+        return idx_next.masked_fill(done.unsqueeze(1), pad_id)
+
+    @staticmethod
+    def _update_done(done, idx, start, stops):
+        # Marks rows whose generated tokens now end with a stop sequence (in place).
+        # Most steps end on no stop sequence's last token, so test that first.
+        last = idx[:, -1].tolist()
+        generated = idx.shape[1] - start
+        for stop in stops:
+            if generated >= len(stop) and stop[-1].item() in last:
+                done |= (idx[:, -len(stop):] == stop).all(dim=1)
+        return done
+
+def quantize_int8(model):
+    # Dynamic INT8 quantization of every Linear layer (weights stored as int8,
+    # activations quantized on the fly); embeddings and LayerNorms stay fp32
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+class AuraStep(nn.Module):
+    """ Export wrapper: one forward step with the key/value caches as stacked tensors """
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, idx, keys, values, pos, mask):
+        # keys/values: (n_layer, B, n_head, Tk, head_size), Tk may be 0
+        # pos: (B, 1) position of idx[:, 0]; mask: (B, 1, T, Tk + T) bool
+        cache = [[keys[i], values[i]] for i in range(keys.shape[0])]
+        logits, _ = self.model(idx, cache=cache, pos_offset=pos, attn_mask=mask)
+        return logits, torch.stack([c[0] for c in cache]), torch.stack([c[1] for c in cache])
+
+def export_step(model, path):
+    # Shapes are dynamic in batch size, new tokens and cached tokens, so one
+    # program serves prefill, single-token decoding and batched decoding
+    from torch.export import Dim
+    hs = n_embd // n_head
+    B, T, Tk = 2, 8, 3
+    example = (
+        torch.zeros(B, T, dtype=torch.long),
+        torch.zeros(n_layer, B, n_head, Tk, hs),
+        torch.zeros(n_layer, B, n_head, Tk, hs),
+        torch.zeros(B, 1, dtype=torch.long),
+        torch.ones(B, 1, T, Tk + T, dtype=torch.bool),
+    )
+    batch = Dim("batch", min=1, max=256)
+    new = Dim("new", min=1, max=block_size)
+    cached = Dim("cached", min=0, max=block_size)
+    keys = Dim("keys", min=1, max=2 * block_size)
+    dynamic_shapes = {
+        "idx": {0: batch, 1: new},
+        "keys": {1: batch, 3: cached},
+        "values": {1: batch, 3: cached},
+        "pos": {0: batch},
+        "mask": {0: batch, 2: new, 3: keys},
+    }
+    program = torch.export.export(AuraStep(model.cpu().eval()), example, dynamic_shapes=dynamic_shapes)
+    torch.export.save(program, path)
+
+class ExportedAuraLLM(nn.Module):
+    """ AuraLLM interface (forward, new_cache, generate) over an exported AuraStep program """
+    def __init__(self, path):
+        super().__init__()
+        self.step = torch.export.load(path).module()
+
+    new_cache = AuraLLM.new_cache
+    generate = AuraLLM.generate
+    _sample = staticmethod(AuraLLM._sample)
+    _update_done = staticmethod(AuraLLM._update_done)
+
+    @property
+    def blocks(self):
+        return range(n_layer)
+
+    def train(self, mode=True):
+        # The exported graph is fixed in inference mode (dropout off)
+        return self
+
+    def forward(self, idx, targets=None, cache=None, pos_offset=0, attn_mask=None):
+        B, T = idx.shape
+        if cache is None:
+            cache = self.new_cache()
+        if cache[0][0] is None:
+            empty = torch.zeros(n_layer, B, n_head, 0, n_embd // n_head, device=idx.device)
+            keys, values = empty, empty
+        else:
+            keys = torch.stack([c[0] for c in cache])
+            values = torch.stack([c[1] for c in cache])
+        Tk = keys.shape[3]
+        if attn_mask is None:
+            # Same rule as the eager model: new tokens see the cache and their causal prefix
+            attn_mask = torch.ones(T, Tk + T, dtype=torch.bool, device=idx.device).tril(Tk).expand(B, 1, T, Tk + T)
+        pos = torch.as_tensor(pos_offset, device=idx.device).reshape(-1, 1).expand(B, 1)
+        logits, keys, values = self.step(idx, keys, values, pos, attn_mask)
+        for layer, c in enumerate(cache):
+            c[0], c[1] = keys[layer], values[layer]
+
+        loss = None
+        if targets is not None:
+            loss = F.cross_entropy(logits.view(B * T, -1), targets.view(B * T))
+        return logits, loss
@@ -1,6 +1,7 @@
 import torch
 import os
 from model import AuraLLM, device, block_size, batch_size, learning_rate, max_iters, eval_interval, eval_iters
+from tokenizer import CharTokenizer
 
 # 1. Load your Mental Health Dataset
 # If you don't have one yet, I will use a placeholder. 
@@ -16,15 +17,15 @@ with open(data_path, 'r', encoding='utf-8') as f:
     text = f.read()
 
 # 2. Simple Character-Level Tokenizer (Build from scratch)
-chars = sorted(list(set(text)))
-vocab_size = len(chars)
-stoi = { ch:i for i,ch in enumerate(chars) }
-itos = { i:ch for i,ch in enumerate(chars) }
-encode = lambda s: [stoi[c] for c in s] 
-decode = lambda l: ''.join([itos[i] for i in l])
+# Saved next to the weights so inference never has to rescan the dataset
+tokenizer = CharTokenizer.from_text(text)
+tokenizer.save('aura_tokenizer.json')
+vocab_size = tokenizer.vocab_size
+encode = tokenizer.encode
+decode = tokenizer.decode
 
 # 3. Train/Val Split
-data = torch.tensor(encode(text), dtype=torch.long)
+data = torch.from_numpy(tokenizer.encode_array(text))
 n = int(0.9*len(data))
 train_data = data[:n]
 val_data = data[n:]